@@ -1,6 +1,12 @@
 # Path: scripts/fix_tsv_quotes.py
 import re
 import os
+import sys
+
+# Add project root to python path to allow imports from src
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.processors.token_stream import TokenStream
 
 INPUT_FILE = 'data/content/content_source.tsv'
 
@@ -25,18 +31,15 @@ def process_cell_content(text):
     if not text:
         return text
     
-    # Split by tags to protect attributes
-    # Capturing parentheses in re.split keep the separators
-    parts = re.split(r'(<[^>]+>)', text)
-    
-    processed_parts = []
-    for part in parts:
-        if part.startswith('<') and part.endswith('>'):
-            processed_parts.append(part)
+    # Split by tags to protect attributes (shared tokenizer with the data builder)
+    processed = TokenStream()
+    for token in TokenStream.parse(text):
+        if token.is_tag:
+            processed.append_tag(token.value)
         else:
-            processed_parts.append(smarten_text_segment(part))
+            processed.append_text(smarten_text_segment(token.value))
             
-    return "".join(processed_parts)
+    return processed.serialize()
 
 def main():
     if not os.path.exists(INPUT_FILE):
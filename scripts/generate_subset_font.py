@@ -1,72 +1,188 @@
 # Path: scripts/generate_subset_font.py
+import argparse
+import csv
+import glob
+import hashlib
+import html
+import json
 import os
+import re
+import sqlite3
 import subprocess
 import sys
+import unicodedata
+from typing import Dict, Iterable, List, Set
+
+__all__ = ["collect_charset", "format_unicode_ranges", "main"]
+
+# Đường dẫn file font gốc (Variable Font)
+INPUT_FONT: str = "tmp/Noto_Sans_Mono/NotoSansMono-VariableFont_wdth,wght.ttf"
+OUTPUT_DIR: str = "web/public/assets/fonts/noto-sans-mono"
+OUTPUT_FILE: str = f"{OUTPUT_DIR}/noto-sans-mono-pali-viet.woff2"
+FONT_CSS: str = "web/css/base/_fonts.css"
+CACHE_FILE: str = "data/content/build-cache/font_subset.json"
+
+# Nguồn ký tự: DB đã build, TSV nguồn và chuỗi giao diện
+DB_GLOB: str = "web/public/**/content.db"
+TSV_SOURCES: List[str] = ["data/content/content_source.tsv", "data/content/rule_groups.tsv"]
+UI_GLOBS: List[str] = ["web/index.html", "web/modules/**/*.js", "web/utils/*.js", "web/css/**/*.css"]
+
+# Luôn giữ ASCII in được (ô tìm kiếm, số, ký hiệu người dùng gõ vào)
+BASE_CODEPOINTS: Set[int] = set(range(0x20, 0x7F))
+# Bỏ qua ký tự ngoài dải chữ/dấu câu/ký hiệu tiền tệ (emoji trong log, icon...) vì Noto Sans Mono không có glyph
+MAX_CODEPOINT: int = 0x20CF
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+DB_TEXT_QUERIES: List[str] = [
+    "SELECT html, segment_html, hint_text FROM contents",
+    "SELECT text, breadcrumbs FROM headings",
+    "SELECT acronym, pali, viet FROM rules",
+]
+
+
+def _visible_text(value: str) -> str:
+    return html.unescape(TAG_PATTERN.sub("", value))
+
+
+def _iter_db_texts(db_path: str) -> Iterable[str]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for query in DB_TEXT_QUERIES:
+            for row in conn.execute(query):
+                yield from (_visible_text(value) for value in row if value)
+    finally:
+        conn.close()
+
+
+def _iter_tsv_texts(tsv_path: str) -> Iterable[str]:
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            yield from (_visible_text(value) for value in row)
+
+
+def _iter_ui_texts(paths: Iterable[str]) -> Iterable[str]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f.read()
+
+
+def collect_charset(db_paths: Iterable[str], tsv_paths: Iterable[str], ui_paths: Iterable[str]) -> Set[int]:
+    """
+    Tập code point thực sự được dùng trong nội dung và giao diện.
+    Mỗi chữ được thêm cả chữ hoa/thường tương ứng (tiêu đề viết hoa, người dùng gõ tìm kiếm), và cả dạng NFC lẫn NFD
+    (chữ tổ hợp sẵn + dấu kết hợp) để hiển thị đúng dù văn bản chuẩn hoá kiểu nào.
+    """
+    texts: List[Iterable[str]] = [_iter_db_texts(p) for p in db_paths]
+    texts += [_iter_tsv_texts(p) for p in tsv_paths]
+    texts.append(_iter_ui_texts(ui_paths))
+
+    chars: Set[str] = set()
+    for source in texts:
+        for text in source:
+            chars.update(text)
+
+    codepoints: Set[int] = set(BASE_CODEPOINTS)
+    for char in chars | {c.upper() for c in chars} | {c.lower() for c in chars}:
+        for form in (unicodedata.normalize("NFC", char), unicodedata.normalize("NFD", char)):
+            for c in form:
+                if ord(c) <= MAX_CODEPOINT and not unicodedata.category(c).startswith("C"):
+                    codepoints.add(ord(c))
+    return codepoints
+
+
+def format_unicode_ranges(codepoints: Iterable[int]) -> List[str]:
+    """Gom code point thành các dải U+XXXX-YYYY liên tục."""
+    ranges: List[List[int]] = []
+    for cp in sorted(set(codepoints)):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return [f"U+{start:04X}" if start == end else f"U+{start:04X}-{end:04X}" for start, end in ranges]
+
+
+def _charset_key(ranges: List[str]) -> str:
+    """Khoá cache: tập ký tự + file font gốc (kích thước/mtime) + các tham số pyftsubset."""
+    font_stat = os.stat(INPUT_FONT)
+    key = json.dumps([ranges, font_stat.st_size, font_stat.st_mtime_ns, _subset_flags()])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _subset_flags() -> List[str]:
+    # --flavor=woff2: Nén định dạng woff2
+    # --layout-features='*': Giữ lại các tính năng Opentype (kerning, ligatures, dấu kết hợp)
+    # --desubroutinize: Tối ưu hóa cấu trúc font (giảm dung lượng)
+    return ["--flavor=woff2", "--layout-features=*", "--desubroutinize"]
+
+
+def _load_cache() -> Dict[str, str]:
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_font_css(ranges: List[str]) -> None:
+    """Đồng bộ unicode-range của @font-face với đúng tập ký tự trong subset."""
+    with open(FONT_CSS, "r", encoding="utf-8") as f:
+        css = f.read()
+    updated = re.sub(r"unicode-range:[^;]*;", f"unicode-range: {', '.join(ranges)};", css, count=1)
+    if updated != css:
+        with open(FONT_CSS, "w", encoding="utf-8") as f:
+            f.write(updated)
+        print(f"🎨 Đã cập nhật unicode-range trong {FONT_CSS}")
 
-__all__ = ["main"]
 
 def main() -> None:
     """
-    Cắt subset cho font Noto Sans Mono để tối ưu hóa việc hiển thị tiếng Việt và Pali.
-    Dung lượng mục tiêu: < 100KB.
+    Cắt subset cho font Noto Sans Mono theo đúng các ký tự có trong nội dung (content.db, TSV nguồn) và giao diện.
+    Kết quả được cache theo hash tập ký tự: chỉ chạy lại pyftsubset khi tập ký tự (hoặc font gốc) thay đổi.
     """
-    # Đường dẫn file font gốc (Variable Font)
-    INPUT_FONT: str = "tmp/Noto_Sans_Mono/NotoSansMono-VariableFont_wdth,wght.ttf"
-    OUTPUT_DIR: str = "web/public/assets/fonts/noto-sans-mono"
-    OUTPUT_FILE: str = f"{OUTPUT_DIR}/noto-sans-mono-pali-viet.woff2"
-
-    # Dải Unicode: Basic Latin + Tiếng Việt + Pali
-    UNICODES: str = (
-        "U+0000-00FF,"  # Basic Latin
-        "U+0100-0103,U+0110-0111,U+0128-012B,U+0168-016B," # Latin Extended (Pali/Viet)
-        "U+01A0-01A1,U+01AF-01B0," # Latin Extended-B
-        "U+0300-0309,U+0323,U+0329," # Combining Diacritical Marks
-        "U+1E0C-1E0D,U+1E36-1E37,U+1E40-1E47,U+1E6C-1E6D," # Latin Extended Additional (Pali)
-        "U+1EA0-1EF9," # Latin Extended Additional (Vietnamese)
-        "U+2000-206F," # General Punctuation
-        "U+20AB"       # Đồng Sign
-    )
-
-    if not os.path.exists(os.path.dirname(OUTPUT_FILE)):
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+    parser = argparse.ArgumentParser(description="Cắt subset font Noto Sans Mono theo ký tự thực tế của corpus")
+    parser.add_argument("--force", action="store_true", help="Chạy pyftsubset kể cả khi tập ký tự không đổi.")
+    args = parser.parse_args()
 
     if not os.path.exists(INPUT_FONT):
         print(f"❌ Lỗi: Không tìm thấy file font gốc tại {INPUT_FONT}")
         return
 
+    db_paths = sorted(glob.glob(DB_GLOB, recursive=True))
+    tsv_paths = [p for p in TSV_SOURCES if os.path.exists(p)]
+    ui_paths = sorted({p for pattern in UI_GLOBS for p in glob.glob(pattern, recursive=True)})
+    if not db_paths:
+        print("⚠️  Chưa có content.db, chỉ quét TSV nguồn và giao diện (chạy `gioibon data` trước để có nội dung đã render).")
+
+    codepoints = collect_charset(db_paths, tsv_paths, ui_paths)
+    ranges = format_unicode_ranges(codepoints)
+    charset_key = _charset_key(ranges)
+    print(f"🔤 {len(codepoints)} ký tự từ {len(db_paths)} DB, {len(tsv_paths)} TSV, {len(ui_paths)} file giao diện.")
+
+    if not args.force and _load_cache().get("key") == charset_key and os.path.exists(OUTPUT_FILE):
+        print("💤 Tập ký tự không đổi, giữ nguyên font subset hiện có.")
+        return
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     try:
         print(f"✂️  Đang tiến hành cắt subset font từ: {INPUT_FONT}")
-        
         # Sử dụng pyftsubset (thuộc gói fonttools)
-        # Các flag bổ sung:
-        # --flavor=woff2: Nén định dạng woff2
-        # --layout-features='*': Giữ lại các tính năng Opentype (kerning, ligatures)
-        # --desubroutinize: Tối ưu hóa cấu trúc font (giảm dung lượng)
-        args = [
-            "pyftsubset",
-            INPUT_FONT,
-            f"--unicodes={UNICODES}",
-            "--flavor=woff2",
-            "--layout-features=*",
-            "--desubroutinize",
-            f"--output-file={OUTPUT_FILE}"
-        ]
-
-        subprocess.run(args, check=True)
-        
-        size_kb: float = os.path.getsize(OUTPUT_FILE) / 1024
-        print(f"✅ Hoàn tất! Đã tạo file font tối ưu tại: {OUTPUT_FILE}")
-        print(f"📊 Kích thước file: {size_kb:.2f} KB")
-        
-        if size_kb > 150:
-            print("⚠️  Cảnh báo: File font vẫn hơi lớn. Hãy kiểm tra lại các dải Unicode.")
-        else:
-            print("✨ Kích thước font rất tốt cho việc sử dụng trên Web.")
-        
-    except subprocess.CalledProcessError as e:
+        args_list = ["pyftsubset", INPUT_FONT, f"--unicodes={','.join(ranges)}", *_subset_flags(), f"--output-file={OUTPUT_FILE}"]
+        subprocess.run(args_list, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
         print(f"❌ Lỗi thực thi pyftsubset: {e}")
-    except Exception as e:
-        print(f"❌ Lỗi không xác định: {e}")
+        sys.exit(1)
+
+    _update_font_css(ranges)
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"key": charset_key, "codepoints": len(codepoints), "unicodes": ranges}, f, ensure_ascii=False, indent=2)
+
+    size_kb: float = os.path.getsize(OUTPUT_FILE) / 1024
+    print(f"✅ Hoàn tất! Đã tạo file font tối ưu tại: {OUTPUT_FILE}")
+    print(f"📊 Kích thước file: {size_kb:.2f} KB")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1 @@
+# Path: src/benchmarks/__init__.py
@@ -0,0 +1,197 @@
+# Path: src/benchmarks/builder_benchmark.py
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.benchmarks.synthetic_corpus import generate_synthetic_corpus
+from src.data_builder.audio_profiles import DEFAULT_AUDIO_PROFILE, AudioProfile
+from src.data_builder.processors import TsvContentProcessor
+from src.data_builder.processors.addition_processor import AdditionProcessor
+from src.data_builder.processors.hint_processor import HintProcessor
+from src.data_builder.processors.list_processor import ListProcessor
+from src.data_builder.processors.quote_processor import QuoteStateProcessor
+from src.data_builder.processors.selection_processor import SelectionProcessor
+from src.data_builder.processors.structure_processor import StructureProcessor
+from src.data_builder.processors.token_stream import TokenStream
+from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.writer import DataWriter
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "OfflineTTSGenerator", "run_builder_benchmark", "compare_with_baseline", "load_baseline", "save_baseline",
+    "DEFAULT_SCALES", "DEFAULT_THRESHOLD",
+]
+
+DEFAULT_SCALES = (1, 10, 100)
+# Ngưỡng hồi quy mặc định: chậm hơn baseline quá 25% (tính theo µs/dòng) thì báo lỗi
+DEFAULT_THRESHOLD = 0.25
+# Chỉ số quá ngắn (tổng thời gian dưới ngưỡng này) bị nhiễu đo lớn, không đem ra so sánh
+MIN_COMPARABLE_SECONDS = 0.005
+
+SourceRow = Tuple[str, str, str]
+
+
+class OfflineTTSGenerator(TTSGenerator):
+    """TTS giả lập cho benchmark: ghi nội dung văn bản thay cho MP3, không gọi mạng."""
+
+    def _fetch_audio_from_api(
+        self, text: str, output_filepath: str, voice_name: Optional[str] = None, profile: AudioProfile = DEFAULT_AUDIO_PROFILE
+    ) -> bool:
+        with open(output_filepath, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        return True
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _load_rows(tsv_path: str) -> List[SourceRow]:
+    with open(tsv_path, 'r', encoding='utf-8') as f:
+        return [(row['html'], row['label'], row['segment']) for row in csv.DictReader(f, delimiter='\t')]
+
+
+def _is_heading(html: str, label: str) -> bool:
+    return html.startswith("<h") or label in ["title", "subtitle"] or label.endswith("-name") or label.endswith("-chapter")
+
+
+def _bench_processors(rows: List[SourceRow], rule_groups_path: str) -> Dict[str, float]:
+    """Đo riêng từng bộ xử lý trên các dòng mà pipeline thực sự đưa vào bộ xử lý đó."""
+    segments = [segment for _, _, segment in rows]
+    body_rows = [(html, label, segment) for html, label, segment in rows if not _is_heading(html, label)]
+    results: Dict[str, float] = {}
+
+    results["parse"] = _timed(lambda: [TokenStream.parse(segment) for segment in segments])
+
+    streams = [TokenStream.parse(segment) for segment in segments]
+    quote_proc = QuoteStateProcessor()
+    results["quote"] = _timed(lambda: [quote_proc.process(tokens) for tokens in streams])
+
+    addition_proc = AdditionProcessor()
+    inputs = [(TokenStream.parse(segment), _is_heading(html, label), label, html) for html, label, segment in rows]
+    results["addition"] = _timed(lambda: [addition_proc.process(*args) for args in inputs])
+
+    selection_proc = SelectionProcessor()
+    body_streams = [TokenStream.parse(segment) for _, _, segment in body_rows]
+    results["selection"] = _timed(lambda: [selection_proc.process(tokens) for tokens in body_streams])
+
+    list_proc = ListProcessor()
+    duyenco_streams = [TokenStream.parse(segment) for _, label, segment in body_rows if label.endswith('-duyenco')]
+    results["list"] = _timed(lambda: [list_proc.process_duyenco(tokens) for tokens in duyenco_streams])
+
+    hint_proc = HintProcessor()
+    results["hint"] = _timed(lambda: [hint_proc.process(tokens) for tokens in body_streams])
+
+    structure_proc = StructureProcessor(rule_groups_path)
+    results["structure"] = _timed(
+        lambda: [structure_proc.process_segment(uid, html, label, segment) for uid, (html, label, segment) in enumerate(rows, 1)]
+    )
+    return results
+
+
+def _bench_pipeline(tsv_path: str, rule_groups_path: str, work_dir: str) -> Dict[str, float]:
+    """Đo process_tsv (TTS giả lập, cache audio đã ấm) và DataWriter.save trên thư mục tạm."""
+    audio_tmp_dir = os.path.join(work_dir, "audio-tmp")
+    tts_generator = OfflineTTSGenerator(os.path.join(work_dir, "audio"), audio_tmp_dir)
+
+    # Lượt đầu sinh audio giả lập vào cache; lượt đo dùng cache ấm như một lần build thông thường
+    results: Dict[str, float] = {}
+    results["process_tsv_cold"] = _timed(lambda: TsvContentProcessor(tts_generator, rule_groups_path).process_tsv(tsv_path))
+
+    processor = TsvContentProcessor(tts_generator, rule_groups_path)
+    output: Dict[str, Any] = {}
+    results["process_tsv"] = _timed(lambda: output.update(data=processor.process_tsv(tsv_path)))
+    segments, rules, headings = output["data"]
+
+    writer = DataWriter(
+        os.path.join(work_dir, "content.tsv"), os.path.join(work_dir, "web", "content.db"),
+        audio_tmp_dir, os.path.join(work_dir, "web", "audio"),
+    )
+    results["writer_save"] = _timed(lambda: writer.save(segments, rules, headings))
+    return results
+
+
+def run_builder_benchmark(base_tsv: str, rule_groups_path: str, scales: Sequence[int] = DEFAULT_SCALES) -> Dict[str, Any]:
+    """
+    Chạy bộ benchmark data builder trên các corpus tổng hợp theo từng hệ số kích thước.
+    Kết quả được chuẩn hoá theo µs/dòng để so sánh được giữa các kích thước và giữa các lần chạy.
+    """
+    report: Dict[str, Any] = {"generated_at": int(time.time()), "scales": {}}
+    work_root = tempfile.mkdtemp(prefix="gioibon-bench-")
+    try:
+        for scale in scales:
+            work_dir = os.path.join(work_root, f"{scale}x")
+            tsv_path = os.path.join(work_dir, "content_source.tsv")
+            row_count = generate_synthetic_corpus(base_tsv, tsv_path, scale)
+            rows = _load_rows(tsv_path)
+
+            seconds = _bench_processors(rows, rule_groups_path)
+            seconds.update(_bench_pipeline(tsv_path, rule_groups_path, work_dir))
+            report["scales"][str(scale)] = {
+                "rows": row_count,
+                "seconds": {name: round(value, 6) for name, value in seconds.items()},
+                "us_per_row": {name: round(value / row_count * 1e6, 3) for name, value in seconds.items()},
+            }
+
+            logger.info(f"📊 Corpus {scale}x ({row_count} dòng):")
+            for name, value in seconds.items():
+                logger.info(f"  {name:<18} {value * 1000:10.1f} ms | {value / row_count * 1e6:8.2f} µs/dòng")
+            shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+    return report
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    So sánh kết quả với baseline theo µs/dòng. Mỗi chỉ số có thể có ngưỡng riêng trong baseline["thresholds"],
+    mặc định dùng baseline["thresholds"]["default"]. Trả về danh sách các hồi quy (rỗng nếu đạt).
+    """
+    thresholds: Dict[str, float] = baseline.get("thresholds", {})
+    default_threshold = thresholds.get("default", DEFAULT_THRESHOLD)
+    regressions: List[str] = []
+
+    for scale, result in report["scales"].items():
+        base_result = baseline.get("scales", {}).get(scale)
+        if not base_result:
+            continue
+        for name, value in result["us_per_row"].items():
+            base_value = base_result["us_per_row"].get(name)
+            if not base_value:
+                continue
+            if max(result["seconds"][name], base_result["seconds"].get(name, 0)) < MIN_COMPARABLE_SECONDS:
+                continue
+            limit = base_value * (1 + thresholds.get(name, default_threshold))
+            ratio = value / base_value
+            status = "❌" if value > limit else "✅"
+            logger.info(f"  {status} {scale}x {name:<18} {base_value:8.2f} -> {value:8.2f} µs/dòng (x{ratio:.2f})")
+            if value > limit:
+                regressions.append(f"{scale}x {name}: {base_value:.2f} -> {value:.2f} µs/dòng (x{ratio:.2f})")
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, report: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> None:
+    """Lưu kết quả làm baseline mới (giữ lại các ngưỡng riêng đã cấu hình trong baseline cũ)."""
+    previous = load_baseline(path) or {}
+    thresholds = dict(previous.get("thresholds", {}))
+    thresholds["default"] = threshold
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({**report, "thresholds": thresholds}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    logger.info(f"💾 Đã lưu baseline benchmark tại: {path}")
@@ -0,0 +1,319 @@
+# Path: src/benchmarks/query_benchmark.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.data_builder.spell_index import delete_variants, fold_diacritics, spell_db_path, spell_lookup_query, word_max_distance
+from src.data_builder.telemetry import percentile
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "LOAD_QUERY", "HEADINGS_QUERY", "fts_search_query", "joined_fts_search_query", "like_search_query", "joined_like_search_query",
+    "spell_suggest_query", "default_search_terms", "run_query_benchmark", "compare_search_shapes", "check_query_report", "load_query_baseline", "save_query_baseline",
+]
+
+# Các câu query được sao y từ web/modules/data/content_loader.js (ContentLoader). Khi sửa bên JS phải sửa cả ở đây.
+LOAD_QUERY = """SELECT c.uid, c.html, c.label, c.audio_name, c.segment,
+                 c.segment_html, c.has_hint, c.hint_text, c.heading_id, c.rule_id, h.level as heading_level
+                 FROM contents c
+                 LEFT JOIN headings h ON c.heading_id = h.uid
+                 ORDER BY c.uid ASC"""
+
+HEADINGS_QUERY = "SELECT uid, text, level, parent_uid, breadcrumbs FROM headings ORDER BY uid ASC"
+
+SEARCH_SELECT = """
+                SELECT
+                    rowid as id,
+                    segment as raw_segment,
+                    heading_id,
+                    breadcrumbs,
+                    rule_id,
+                    rule_viet,
+                    rule_pali,
+                    rule_acronym"""
+
+# Dạng cũ (tra contents rồi join headings -> rules), chỉ dùng để benchmark so sánh với dạng phi chuẩn hoá
+JOINED_SEARCH_SELECT = """
+                SELECT
+                    c.uid as id,
+                    c.segment as raw_segment,
+                    c.heading_id,
+                    h.breadcrumbs,
+                    r.id as rule_id,
+                    r.viet as rule_viet,
+                    r.pali as rule_pali,
+                    r.acronym as rule_acronym"""
+
+# Ngưỡng mặc định: p95 chậm hơn baseline quá 100% (và quá MIN_REGRESSION_MS) thì báo lỗi
+DEFAULT_LATENCY_THRESHOLD = 1.0
+MIN_REGRESSION_MS = 0.5
+DEFAULT_REPEATS = 5
+SEARCH_TERM_LIMIT = 40
+
+# Từ khoá tìm kiếm điển hình của người dùng (có dấu, không dấu, Pali, cụm từ)
+COMMON_SEARCH_TERMS = [
+    "tỳ khưu", "tỳ khưu ni", "uposatha", "pātimokkha", "y", "bát", "tội", "pācittiya", "saṅghādisesa",
+    "hội chúng", "nói dối", "ty khuu", "vi ty khuu nao", "thọ thực", "an cư", "kathina",
+]
+
+FULL_SCAN_PATTERN = re.compile(r"^SCAN (\w+)(?!\w| VIRTUAL TABLE)")
+
+
+def _search_tokens(keyword: str) -> List[str]:
+    return [token for token in keyword.strip().split() if token]
+
+
+def _fts_tokens(keyword: str) -> List[str]:
+    """Token của từ khoá sau khi lọc ký tự làm hỏng cú pháp MATCH của FTS5."""
+    return _search_tokens(re.sub(r"['\"^*]", " ", keyword))
+
+
+def fts_search_query(keyword: str) -> Optional[str]:
+    """Dựng câu query FTS giống hệt ContentLoader.searchSegments (None nếu từ khoá rỗng sau khi lọc)."""
+    tokens = _fts_tokens(keyword)
+    if not tokens:
+        return None
+    fts_match = f'"{" ".join(tokens)}"'
+    limit_clause = '' if len(tokens) >= 2 else 'LIMIT 51'
+    return f"""{SEARCH_SELECT}
+                FROM contents_fts
+                WHERE contents_fts MATCH '{fts_match}'
+                ORDER BY rank
+                {limit_clause}
+            """
+
+
+def joined_fts_search_query(keyword: str) -> Optional[str]:
+    """
+    Dạng query cũ (tra FTS rồi join contents -> headings -> rules), chỉ giữ lại để benchmark so sánh
+    với dạng phi chuẩn hoá đang dùng. Cùng kết quả với fts_search_query.
+    """
+    tokens = _fts_tokens(keyword)
+    if not tokens:
+        return None
+    fts_match = f'"{" ".join(tokens)}"'
+    limit_clause = '' if len(tokens) >= 2 else 'LIMIT 51'
+    return f"""{JOINED_SEARCH_SELECT}
+                FROM contents_fts fts
+                JOIN contents c ON fts.rowid = c.uid
+                LEFT JOIN headings h ON c.heading_id = h.uid
+                LEFT JOIN rules r ON c.rule_id = r.id
+                WHERE contents_fts MATCH '{fts_match}'
+                ORDER BY fts.rank
+                {limit_clause}
+            """
+
+
+def like_search_query(keyword: str) -> str:
+    """Dựng câu query LIKE dự phòng giống hệt ContentLoader.searchSegments."""
+    limit_clause = '' if len(_search_tokens(keyword)) >= 2 else 'LIMIT 51'
+    safe_keyword = keyword.replace("'", "''")
+    return f"""{SEARCH_SELECT}
+                    FROM search_rows
+                    WHERE segment LIKE '%{safe_keyword}%'
+                    ORDER BY rowid ASC
+                    {limit_clause}
+                """
+
+
+def joined_like_search_query(keyword: str) -> str:
+    """Dạng LIKE cũ (quét contents rồi join headings -> rules), chỉ để benchmark so sánh. Cùng kết quả với like_search_query."""
+    limit_clause = '' if len(_search_tokens(keyword)) >= 2 else 'LIMIT 51'
+    safe_keyword = keyword.replace("'", "''")
+    return f"""{JOINED_SEARCH_SELECT}
+                    FROM contents c
+                    LEFT JOIN headings h ON c.heading_id = h.uid
+                    LEFT JOIN rules r ON c.rule_id = r.id
+                    WHERE c.segment LIKE '%{safe_keyword}%'
+                    ORDER BY c.uid ASC
+                    {limit_clause}
+                """
+
+
+def spell_suggest_query(word: str) -> Optional[str]:
+    """Câu tra gợi ý chính tả của ContentLoader.suggestWords cho một từ (biến thể xoá được nhúng thẳng vào SQL)."""
+    folded = fold_diacritics(word)
+    if len(folded) < 2:
+        return None
+    variants = sorted(delete_variants(folded, word_max_distance(folded)))
+    sql = spell_lookup_query(len(variants))
+    for variant in variants:
+        sql = sql.replace("?", "'" + variant.replace("'", "''") + "'", 1)
+    return sql
+
+
+def default_search_terms(conn: sqlite3.Connection, limit: int = SEARCH_TERM_LIMIT) -> List[str]:
+    """
+    Bộ từ khoá tìm kiếm: các từ khoá điển hình + từ/cụm hai từ phổ biến nhất trong DB + tên Việt/Pali của rule.
+    Kết quả xác định (sắp theo tần suất rồi theo chữ cái).
+    """
+    words: Counter = Counter()
+    bigrams: Counter = Counter()
+    for (segment,) in conn.execute("SELECT segment FROM contents"):
+        tokens = re.findall(r"[^\W\d_]+", (segment or "").lower())
+        words.update(t for t in tokens if len(t) >= 3)
+        bigrams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    terms: List[str] = list(COMMON_SEARCH_TERMS)
+    terms += [w for w, _ in sorted(words.items(), key=lambda kv: (-kv[1], kv[0]))[:limit // 2]]
+    terms += [b for b, _ in sorted(bigrams.items(), key=lambda kv: (-kv[1], kv[0]))[:limit // 4]]
+    terms += [viet for (viet,) in conn.execute("SELECT viet FROM rules WHERE viet != '' ORDER BY id LIMIT ?", (limit // 4,))]
+    return list(dict.fromkeys(terms))
+
+
+def _query_plan(conn: sqlite3.Connection, sql: str) -> List[str]:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def _run_timed(conn: sqlite3.Connection, sql: str) -> Dict[str, Any]:
+    """Chạy query, đo độ trễ, số dòng trả về và số bước máy ảo SQLite (đại diện cho số dòng phải duyệt)."""
+    steps = [0]
+
+    def on_progress() -> int:
+        steps[0] += 1
+        return 0
+
+    conn.set_progress_handler(on_progress, 100)
+    try:
+        start = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.set_progress_handler(None, 0)
+    return {"seconds": elapsed, "rows": len(rows), "vm_steps": steps[0] * 100}
+
+
+def run_query_benchmark(db_path: str, terms: Optional[Sequence[str]] = None, repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """
+    Phát lại các query đọc của web app trên DB vừa build: ghi nhận độ trễ (p50/p95), số dòng trả về,
+    số bước VM và EXPLAIN QUERY PLAN cho từng loại query.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        search_terms = list(terms) if terms is not None else default_search_terms(conn)
+        # Chỉ mục sửa chính tả nằm ở file riêng (content_spell.db), gắn vào cùng kết nối để đo như web app
+        spell_path = spell_db_path(db_path)
+        has_spell = os.path.exists(spell_path)
+        if has_spell:
+            conn.execute("ATTACH DATABASE ? AS spell", (f"file:{spell_path}?mode=ro",))
+
+        # Gom các câu query theo loại (plan của một loại không phụ thuộc từ khoá cụ thể)
+        cases: Dict[str, List[str]] = {"load": [LOAD_QUERY], "headings": [HEADINGS_QUERY]}
+        for term in search_terms:
+            suffix = "multi" if len(_search_tokens(term)) >= 2 else "single"
+            fts_sql = fts_search_query(term)
+            if fts_sql:
+                cases.setdefault(f"search_fts_{suffix}", []).append(fts_sql)
+                cases.setdefault(f"search_fts_joined_{suffix}", []).append(joined_fts_search_query(term))
+            cases.setdefault(f"search_like_{suffix}", []).append(like_search_query(term))
+            cases.setdefault(f"search_like_joined_{suffix}", []).append(joined_like_search_query(term))
+            for word in _search_tokens(term) if has_spell else []:
+                spell_sql = spell_suggest_query(word)
+                if spell_sql:
+                    cases.setdefault("spell_suggest", []).append(spell_sql)
+
+        queries: Dict[str, Any] = {}
+        for kind, sqls in cases.items():
+            plan = _query_plan(conn, sqls[0])
+            samples: List[float] = []
+            rows = vm_steps = 0
+            for sql in sqls:
+                for _ in range(repeats):
+                    run = _run_timed(conn, sql)
+                    samples.append(run["seconds"])
+                rows += run["rows"]
+                vm_steps += run["vm_steps"]
+            samples.sort()
+            queries[kind] = {
+                "queries": len(sqls),
+                "plan": plan,
+                "full_scans": sorted({m.group(1) for m in (FULL_SCAN_PATTERN.match(d) for d in plan) if m}),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+                "rows": rows,
+                "vm_steps": vm_steps,
+            }
+            logger.info(
+                f"  {kind:<20} p50 {queries[kind]['p50_ms']:8.3f} ms | p95 {queries[kind]['p95_ms']:8.3f} ms | "
+                f"{rows:6d} dòng | plan: {'; '.join(plan)}"
+            )
+    finally:
+        conn.close()
+    return {"generated_at": int(time.time()), "terms": search_terms, "queries": queries, "comparisons": compare_search_shapes(queries)}
+
+
+def compare_search_shapes(queries: Dict[str, Any]) -> Dict[str, Any]:
+    """So sánh dạng tìm kiếm phi chuẩn hoá (chỉ đọc contents_fts/search_rows) với dạng join cũ theo p50/p95 và số bước VM."""
+    comparisons: Dict[str, Any] = {}
+    for shape in ("fts", "like"):
+        for suffix in ("single", "multi"):
+            kind = f"search_{shape}_{suffix}"
+            denormalized, joined = queries.get(kind), queries.get(f"search_{shape}_joined_{suffix}")
+            if not denormalized or not joined:
+                continue
+            comparisons[kind] = {
+                "plan": denormalized["plan"],
+                "joined_plan": joined["plan"],
+                "p50_speedup": round(joined["p50_ms"] / denormalized["p50_ms"], 2) if denormalized["p50_ms"] else None,
+                "p95_speedup": round(joined["p95_ms"] / denormalized["p95_ms"], 2) if denormalized["p95_ms"] else None,
+                "vm_steps_saved": joined["vm_steps"] - denormalized["vm_steps"],
+            }
+            logger.info(
+                f"  ⚖️  {kind}: phi chuẩn hoá p50 {denormalized['p50_ms']:.3f} ms vs join {joined['p50_ms']:.3f} ms "
+                f"(x{comparisons[kind]['p50_speedup']}), bớt {comparisons[kind]['vm_steps_saved']} bước VM"
+            )
+    return comparisons
+
+
+def check_query_report(report: Dict[str, Any], baseline: Dict[str, Any], threshold: Optional[float] = None) -> List[str]:
+    """
+    So sánh với baseline: báo lỗi khi một loại query có bảng bị full scan mới, hoặc p95 chậm hơn ngưỡng.
+    Trả về danh sách vi phạm (rỗng nếu đạt).
+    """
+    if threshold is None:
+        threshold = baseline.get("thresholds", {}).get("latency", DEFAULT_LATENCY_THRESHOLD)
+    problems: List[str] = []
+    for kind, result in report["queries"].items():
+        base = baseline.get("queries", {}).get(kind)
+        if base is None:
+            continue
+        new_scans = sorted(set(result["full_scans"]) - set(base.get("full_scans", [])))
+        if new_scans:
+            problems.append(f"{kind}: full scan mới trên {', '.join(new_scans)} (plan: {'; '.join(result['plan'])})")
+        limit = base["p95_ms"] * (1 + threshold)
+        if result["p95_ms"] > limit and result["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS:
+            problems.append(f"{kind}: p95 {base['p95_ms']:.3f} -> {result['p95_ms']:.3f} ms")
+    return problems
+
+
+def load_query_baseline(path: str, corpus_id: str) -> Optional[Dict[str, Any]]:
+    """Đọc baseline của một corpus (kèm ngưỡng dùng chung)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    corpus = data.get("corpora", {}).get(corpus_id)
+    if corpus is None:
+        return None
+    return {**corpus, "thresholds": data.get("thresholds", {})}
+
+
+def save_query_baseline(path: str, corpus_id: str, report: Dict[str, Any]) -> None:
+    """Ghi kết quả của một corpus làm baseline (giữ nguyên baseline của các corpus khác)."""
+    data: Dict[str, Any] = {"thresholds": {"latency": DEFAULT_LATENCY_THRESHOLD}, "corpora": {}}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    data.setdefault("corpora", {})[corpus_id] = {"queries": report["queries"], "comparisons": report.get("comparisons", {})}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    logger.info(f"💾 Đã lưu baseline query [{corpus_id}] tại: {path}")
@@ -0,0 +1,110 @@
+# Path: src/benchmarks/record_benchmark.py
+import csv
+import io
+import logging
+import sqlite3
+import time
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from src.data_builder.models import SegmentData
+from src.data_builder.records import CONTENT_COLUMN_COUNT, SegmentRecord
+from src.data_builder.writer import TSV_FIELDNAMES
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["RecordBenchmarkResult", "load_base_rows", "run_record_benchmark"]
+
+
+class RecordBenchmarkResult(NamedTuple):
+    rows: int
+    pydantic_seconds: Dict[str, float]
+    record_seconds: Dict[str, float]
+
+
+def load_base_rows(tsv_path: str) -> List[Dict[str, object]]:
+    """Tạo các dòng mẫu (đủ các cột của SegmentData) từ file TSV nguồn."""
+    rows: List[Dict[str, object]] = []
+    with open(tsv_path, 'r', encoding='utf-8') as f:
+        for i, row in enumerate(csv.DictReader(f, delimiter='\t')):
+            words = row['segment'].split()
+            rows.append({
+                "uid": i + 1,
+                "html": row['html'],
+                "label": row['label'],
+                "segment": row['segment'],
+                "audio": f"{i:016x}.mp3",
+                "segment_html": row['segment'],
+                "has_hint": 1,
+                "hint_text": " ".join(words[:4]),
+                "heading_id": i // 10 + 1,
+                "rule_id": row['label'].split('-')[0] or None,
+            })
+    return rows
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _bench_rows(items: Sequence[Any], to_row: Callable[[Any], Tuple[object, ...]]) -> Dict[str, float]:
+    """
+    Hai bên làm cùng một việc như DataWriter._write_segment_chunk: dựng tuple 10 cột của contents/TSV cho từng item,
+    ghi bằng csv.writer và executemany vào bảng contents (SQLite trong bộ nhớ). Chỉ khác ở cách lấy tuple.
+    """
+    def serialize_tsv() -> None:
+        csv.writer(io.StringIO(), delimiter='\t').writerows(to_row(item) for item in items)
+
+    def insert_sqlite() -> None:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute(f"CREATE TABLE contents ({', '.join(TSV_FIELDNAMES)}, PRIMARY KEY (uid))")
+            placeholders = ", ".join("?" * CONTENT_COLUMN_COUNT)
+            conn.executemany(f"INSERT INTO contents VALUES ({placeholders})", (to_row(item) for item in items))
+        finally:
+            conn.close()
+
+    return {"tsv": _timed(serialize_tsv), "sqlite": _timed(insert_sqlite)}
+
+
+def _bench_pydantic(rows: List[Dict[str, object]]) -> Dict[str, float]:
+    models: List[SegmentData] = []
+
+    def construct() -> None:
+        models.extend(SegmentData(**row) for row in rows)
+
+    construct_seconds = _timed(construct)
+    return {"construct": construct_seconds, **_bench_rows(models, attrgetter(*TSV_FIELDNAMES))}
+
+
+def _bench_records(rows: List[Dict[str, object]]) -> Dict[str, float]:
+    records: List[SegmentRecord] = []
+
+    def construct() -> None:
+        records.extend(SegmentRecord(**row) for row in rows)
+
+    construct_seconds = _timed(construct)
+    # Record có thứ tự field trùng cột nên chỉ cần cắt phần đầu (bỏ voice_audio), giống writer
+    return {"construct": construct_seconds, **_bench_rows(records, lambda item: item[:CONTENT_COLUMN_COUNT])}
+
+
+def run_record_benchmark(tsv_path: str, scale: int = 100) -> RecordBenchmarkResult:
+    """So sánh chi phí tạo & serialize mỗi dòng giữa Pydantic model và record dạng tuple."""
+    base_rows = load_base_rows(tsv_path)
+    rows = [dict(row, uid=n * len(base_rows) + row["uid"]) for n in range(scale) for row in base_rows]
+    logger.info(f"⏱️  Benchmark record: {len(rows)} dòng ({scale}x corpus)...")
+
+    result = RecordBenchmarkResult(len(rows), _bench_pydantic(rows), _bench_records(rows))
+
+    for stage in ("construct", "tsv", "sqlite"):
+        old = result.pydantic_seconds[stage]
+        new = result.record_seconds[stage]
+        ratio = old / new if new > 0 else float("inf")
+        logger.info(f"  {stage:<10} pydantic {old * 1000:9.1f} ms | record {new * 1000:9.1f} ms | x{ratio:.1f}")
+
+    total_old = sum(result.pydantic_seconds.values())
+    total_new = sum(result.record_seconds.values())
+    logger.info(f"📊 Tổng: {total_old:.2f}s -> {total_new:.2f}s ({total_old / len(rows) * 1e6:.1f} µs -> {total_new / len(rows) * 1e6:.1f} µs / dòng)")
+    return result
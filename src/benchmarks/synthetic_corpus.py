@@ -0,0 +1,75 @@
+# Path: src/benchmarks/synthetic_corpus.py
+import csv
+import logging
+import os
+import random
+import re
+from typing import Dict, List
+
+from src.data_builder.processors.token_stream import TAG_SPLIT_PATTERN
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["generate_synthetic_corpus"]
+
+# Tỉ lệ từ bị thay bằng từ ngẫu nhiên trong mỗi bản sao (giữ nguyên thẻ, dấu câu, ngoặc và trích dẫn)
+WORD_MUTATION_RATE = 0.3
+# Khoảng cách đánh số rule giữa các bản sao (pj1 -> pj1001 -> pj2001 ...)
+RULE_NUMBER_STRIDE = 1000
+
+WORD_PATTERN = re.compile(r"[^\W\d_]{2,}")
+LABEL_PATTERN = re.compile(r"^([a-z]+)(\d+)(.*)$")
+
+
+def _renumber_label(label: str, copy_index: int) -> str:
+    """Đánh số lại rule trong nhãn để mỗi bản sao có bộ rule riêng (giữ nguyên hậu tố -name, -duyenco...)."""
+    match = LABEL_PATTERN.match(label)
+    if not match or copy_index == 0:
+        return label
+    prefix, number, suffix = match.groups()
+    return f"{prefix}{int(number) + copy_index * RULE_NUMBER_STRIDE}{suffix}"
+
+
+def _mutate_text(segment: str, vocabulary: List[str], rng: random.Random) -> str:
+    """Thay ngẫu nhiên một phần các từ trong phần text (không đụng tới thẻ HTML)."""
+    def replace(match: "re.Match[str]") -> str:
+        if rng.random() >= WORD_MUTATION_RATE:
+            return match.group(0)
+        word = rng.choice(vocabulary)
+        return word.capitalize() if match.group(0)[0].isupper() else word
+
+    parts = TAG_SPLIT_PATTERN.split(segment)
+    return "".join(part if part.startswith('<') else WORD_PATTERN.sub(replace, part) for part in parts)
+
+
+def generate_synthetic_corpus(base_tsv: str, out_path: str, scale: int, seed: int = 0) -> int:
+    """
+    Sinh corpus tổng hợp kích thước `scale` lần corpus gốc, giữ nguyên phân bố html/label/trích dẫn/lựa chọn/duyenco:
+    bản sao đầu tiên là corpus gốc, các bản sao sau đánh số lại rule và thay ngẫu nhiên một phần từ ngữ
+    (văn bản khác nhau nên cache dòng và cache audio không bị trúng giả). Kết quả xác định theo `seed`.
+    Trả về số dòng đã ghi.
+    """
+    with open(base_tsv, 'r', encoding='utf-8') as f:
+        base_rows: List[Dict[str, str]] = list(csv.DictReader(f, delimiter='\t'))
+
+    vocabulary = sorted({
+        word.lower()
+        for row in base_rows
+        for part in TAG_SPLIT_PATTERN.split(row['segment']) if not part.startswith('<')
+        for word in WORD_PATTERN.findall(part)
+    })
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    count = 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        # Ghi giống định dạng file nguồn (không quote trường), các trường không chứa tab/xuống dòng
+        f.write("html\tlabel\tsegment\n")
+        for copy_index in range(scale):
+            rng = random.Random(seed * 1_000_003 + copy_index)
+            for row in base_rows:
+                segment = row['segment'] if copy_index == 0 else _mutate_text(row['segment'], vocabulary, rng)
+                f.write(f"{row['html']}\t{_renumber_label(row['label'], copy_index)}\t{segment}\n")
+                count += 1
+
+    logger.info(f"🧪 Đã sinh corpus tổng hợp {scale}x ({count} dòng) tại: {out_path}")
+    return count
@@ -17,3 +17,6 @@ TITLE_MATCH_REGEX = r'^#\s+(.*)'
 
 # Special Rule Identifiers
 RULE_24_IDENTIFIER = "(Biết rằng): 'Mùa nóng còn lại là một tháng' vị tỳ khưu nên tìm kiếm y choàng tắm mưa."
+
+# Text-to-Speech
+DEFAULT_TTS_VOICE = "vi-VN-Chirp3-HD-Charon"
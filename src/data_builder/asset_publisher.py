@@ -0,0 +1,145 @@
+# Path: src/data_builder/asset_publisher.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Optional, Sequence, Set
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # brotli là tuỳ chọn: thiếu thì chỉ tạo bản gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ASSET_MANIFEST_NAME", "hashed_name", "publish_assets"]
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+# Độ dài phần hash trong tên file (hex của MD5 nội dung)
+HASH_LENGTH = 12
+# Các đuôi file nén được (zip/mp3 đã nén sẵn, nén thêm không có lợi)
+COMPRESSIBLE_EXTENSIONS = {".db", ".json"}
+HASH_READ_SIZE = 1024 * 1024
+
+
+def _file_hash(path: str) -> str:
+    hasher = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def hashed_name(name: str, content_hash: str) -> str:
+    """content.db + hash -> content.<hash12>.db"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{content_hash[:HASH_LENGTH]}{ext}"
+
+
+def _hashed_pattern(name: str) -> "re.Pattern[str]":
+    stem, ext = os.path.splitext(name)
+    return re.compile(rf"^{re.escape(stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(ext)}(\.gz|\.br)?$")
+
+
+def _publish_copy(src: str, dest: str, content_hash: str) -> None:
+    """
+    Tạo bản theo hash bằng copy (không hardlink: builder sửa file gốc tại chỗ thì bản hash cũng đổi theo).
+    Bản đã có chỉ được dùng lại khi hash nội dung vẫn khớp tên, nếu không thì ghi lại và bỏ các bản nén cũ.
+    """
+    if os.path.exists(dest) and _file_hash(dest) == content_hash:
+        return
+    shutil.copyfile(src, dest + ".tmp")
+    os.replace(dest + ".tmp", dest)
+    for suffix in (".gz", ".br"):
+        if os.path.exists(dest + suffix):
+            os.remove(dest + suffix)
+
+
+def _precompress(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Tạo các bản nén sẵn (.gz, .br nếu có brotli), bỏ qua bản nén không nhỏ hơn file gốc.
+    File đã có thì giữ nguyên vì tên gốc đã chứa hash nội dung.
+    """
+    encodings: Dict[str, Dict[str, Any]] = {}
+    variants = [("gzip", ".gz")] + ([("br", ".br")] if brotli is not None else [])
+    for encoding, suffix in variants:
+        out_path = path + suffix
+        if not os.path.exists(out_path):
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime=0 để bản gzip xác định theo nội dung
+            compressed = gzip.compress(data, compresslevel=9, mtime=0) if encoding == "gzip" else brotli.compress(data, quality=11)
+            if len(compressed) >= len(data):
+                continue
+            with open(out_path + ".tmp", "wb") as f:
+                f.write(compressed)
+            os.replace(out_path + ".tmp", out_path)
+        encodings[encoding] = {"file": os.path.basename(out_path), "size": os.path.getsize(out_path)}
+    return encodings
+
+
+def _load_manifest(manifest_path: str) -> Dict[str, Any]:
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def publish_assets(output_dir: str, names: Sequence[str], manifest_name: str = ASSET_MANIFEST_NAME) -> Optional[Dict[str, Any]]:
+    """
+    Xuất bản các artifact dưới tên theo hash nội dung (cache immutable được), kèm bản nén sẵn gzip/brotli cho DB/JSON,
+    và một asset manifest (tên gốc -> file, hash, kích thước, bản nén). File gốc tên cố định vẫn được giữ để tương thích.
+    Bản hash của lần xuất bản trước được giữ lại (client còn giữ manifest cũ vẫn tải được), các bản cũ hơn bị dọn.
+    Trả về manifest, hoặc None nếu không có artifact nào.
+    """
+    manifest_path = os.path.join(output_dir, manifest_name)
+    previous = _load_manifest(manifest_path)
+
+    assets: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        path = os.path.join(output_dir, name)
+        if not os.path.isfile(path):
+            continue
+        content_hash = _file_hash(path)
+        hashed_path = os.path.join(output_dir, hashed_name(name, content_hash))
+        _publish_copy(path, hashed_path, content_hash)
+        entry: Dict[str, Any] = {"file": os.path.basename(hashed_path), "hash": content_hash, "size": os.path.getsize(path)}
+        encodings = _precompress(hashed_path) if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS else {}
+        if encodings:
+            entry["encodings"] = encodings
+        assets[name] = entry
+
+    if not assets:
+        return None
+
+    # Dọn các bản hash không còn được manifest hiện tại hoặc manifest trước tham chiếu
+    keep: Set[str] = set()
+    for entries in (assets, previous.get("assets", {})):
+        for entry in entries.values():
+            keep.add(entry["file"])
+            keep.update(variant["file"] for variant in entry.get("encodings", {}).values())
+    patterns = [_hashed_pattern(name) for name in assets]
+    removed = 0
+    for filename in os.listdir(output_dir):
+        if filename not in keep and any(pattern.match(filename) for pattern in patterns):
+            os.remove(os.path.join(output_dir, filename))
+            removed += 1
+
+    if previous.get("assets") == assets:
+        logger.info("💤 Asset manifest không đổi. Bỏ qua ghi file.")
+        return previous
+
+    manifest = {"generated_at": int(time.time()), "assets": assets}
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+    logger.info(f"🏷️  Đã xuất bản {len(assets)} asset theo hash (dọn {removed} file cũ), manifest tại: {manifest_path}")
+    return manifest
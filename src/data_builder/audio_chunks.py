@@ -0,0 +1,83 @@
+# Path: src/data_builder/audio_chunks.py
+import hashlib
+import json
+import os
+import re
+from typing import List, NamedTuple, Optional, Sequence
+
+__all__ = [
+    "CHUNKS_DIR",
+    "ChunkOptions",
+    "DEFAULT_CHUNKING",
+    "split_chunks",
+    "composite_audio_name",
+    "chunk_manifest_path",
+    "save_chunk_manifest",
+    "load_chunk_manifest",
+]
+
+# Thư mục con trong cache audio-tmp chứa danh sách chunk của từng audio ghép (--clean xoá file của audio không còn dùng)
+CHUNKS_DIR = "chunks"
+
+# Ranh giới câu/mệnh đề: sau dấu câu và khoảng trắng
+CLAUSE_BOUNDARY = re.compile(r"(?<=[.!?;:,])\s+")
+
+
+class ChunkOptions(NamedTuple):
+    """
+    Tham số chia segment dài thành chunk: chỉ chia segment từ min_segment_chars ký tự trở lên,
+    mỗi chunk ít nhất min_chars ký tự (mệnh đề quá ngắn đọc riêng bị ngắt giọng, lại tốn thêm request).
+    """
+    min_segment_chars: int = 120
+    min_chars: int = 40
+
+
+DEFAULT_CHUNKING = ChunkOptions()
+
+
+def split_chunks(text: str, options: ChunkOptions = DEFAULT_CHUNKING) -> List[str]:
+    """
+    Chia văn bản TTS tại ranh giới câu/mệnh đề. Mệnh đề được gom từ cuối lên: phần kết của các điều luật
+    (VD: "... vị ấy phạm tội pācittiya.") lặp lại nhiều nơi nên luôn được gom giống nhau và dùng chung audio.
+    Nối các chunk bằng một khoảng trắng cho lại đúng văn bản ban đầu. Trả về [text] nếu không cần chia.
+    """
+    if len(text) < options.min_segment_chars:
+        return [text]
+    chunks: List[str] = []
+    current: List[str] = []
+    for clause in reversed(CLAUSE_BOUNDARY.split(text)):
+        current.insert(0, clause)
+        if len(" ".join(current)) >= options.min_chars:
+            chunks.insert(0, " ".join(current))
+            current = []
+    if current:
+        if chunks:
+            chunks[0] = " ".join(current + [chunks[0]])
+        else:
+            chunks.insert(0, " ".join(current))
+    return chunks
+
+
+def composite_audio_name(chunk_names: Sequence[str]) -> str:
+    """Tên audio ghép từ các chunk (hash của danh sách chunk, cùng dạng 16 ký tự hex với audio thường)."""
+    return f"{hashlib.sha256('|'.join(chunk_names).encode('utf-8')).hexdigest()[:16]}.mp3"
+
+
+def chunk_manifest_path(tmp_dir: str, audio_name: str) -> str:
+    return os.path.join(tmp_dir, CHUNKS_DIR, os.path.splitext(audio_name)[0] + ".json")
+
+
+def save_chunk_manifest(path: str, chunk_names: Sequence[str]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(chunk_names), f)
+
+
+def load_chunk_manifest(path: str) -> Optional[List[str]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [str(name) for name in json.load(f)] or None
+    except (OSError, ValueError, TypeError):
+        return None
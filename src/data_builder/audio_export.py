@@ -0,0 +1,221 @@
+# Path: src/data_builder/audio_export.py
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.config.logging_config import setup_logging
+from src.data_builder.audio_chunks import DEFAULT_CHUNKING
+from src.data_builder.processors.base import strip_html_tags, clean_brackets
+from src.data_builder.tts_generator import TTSGenerator, TTSJob
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ExportTrack", "ExportResult", "slugify", "default_artist", "plan_export_tracks", "tag_track", "export_audio"]
+
+DEFAULT_ALBUM = "Giới bổn Patimokkha Việt"
+EXPORT_QUERY = """SELECT c.uid, c.html, c.label, c.segment, h.text, r.acronym
+                  FROM contents c
+                  LEFT JOIN headings h ON c.heading_id = h.uid
+                  LEFT JOIN rules r ON c.rule_id = r.id
+                  ORDER BY c.uid ASC"""
+
+
+class ExportTrack(NamedTuple):
+    """Một track xuất ra: tên file, file audio nguồn trong cache dùng chung và các thẻ ID3."""
+    filename: str
+    source: str
+    title: str
+    lyrics: str
+    album: str
+    artist: str
+    track_no: str
+
+    def tags_hash(self) -> str:
+        """Hash của nguồn + thẻ: đổi thẻ hoặc đổi audio đều tạo ra bản gắn thẻ mới."""
+        payload = json.dumps(self[1:], ensure_ascii=False)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()[:12]
+
+    def tagged_name(self) -> str:
+        return f"{os.path.splitext(self.source)[0]}.{self.tags_hash()}.mp3"
+
+
+class ExportResult(NamedTuple):
+    tracks: int
+    tagged: int
+    linked: int
+    unchanged: int
+    missing: int
+    removed: int
+
+
+def slugify(value: str) -> str:
+    """Chuẩn hóa chuỗi, chuyển thành chữ thường, loại bỏ ký tự đặc biệt và thay khoảng trắng bằng gạch dưới."""
+    val_str: str = str(value)
+    val_str = unicodedata.normalize('NFKD', val_str).encode('ascii', 'ignore').decode('ascii')
+    val_str = re.sub(r'[^\w\s-]', '', val_str).strip().lower()
+    return re.sub(r'[-\s]+', '_', val_str)
+
+
+def default_artist(voice: str) -> str:
+    """vi-VN-Chirp3-HD-Charon -> Vi-Charon"""
+    return f"{voice.split('-')[0].capitalize()}-{voice.split('-')[-1]}"
+
+
+def plan_export_tracks(
+    db_path: str, tts_generator: TTSGenerator, voice: str, album: str = DEFAULT_ALBUM, artist: Optional[str] = None
+) -> Tuple[List[ExportTrack], List[TTSJob]]:
+    """
+    Lập danh sách track từ DB đã build. Tên file audio nguồn được tính bằng chính TTSGenerator của builder
+    (cùng quy tắc TTS, cùng hash), nên track dùng chung cache audio với web app và không bao giờ sinh trùng.
+    """
+    artist = artist or default_artist(voice)
+    tracks: List[ExportTrack] = []
+    jobs: List[TTSJob] = []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(EXPORT_QUERY).fetchall()
+    finally:
+        conn.close()
+
+    for _, html, label, segment, heading, rule_acronym in rows:
+        text = strip_html_tags(clean_brackets(segment or ""))
+        job = next((job for job in tts_generator.plan_segment(text, html, label) if job.voice == voice), None)
+        if job is None:
+            continue
+        jobs.append(job)
+        # Đệm số thứ tự để luôn có 3 chữ số (ví dụ: 001, 023, 150)
+        track_no = f"{len(tracks) + 1:03d}"
+        filename_base = f"{track_no}_{slugify(heading or '')}"
+        if rule_acronym:
+            filename_base += f"_{slugify(rule_acronym)}"
+        tracks.append(ExportTrack(f"{filename_base}.mp3", job.filename, filename_base, text.strip(), album, artist, track_no))
+    return tracks, jobs
+
+
+def tag_track(track: ExportTrack, audio_tmp_dir: str, tagged_dir: str) -> str:
+    """
+    Tạo bản gắn thẻ ID3 (Lyrics, Title, Album, Artist, Track) từ audio trong cache.
+    Luôn ghi trên bản sao: file trong cache dùng chung không bị sửa. Chạy trong process pool.
+    """
+    from mutagen.id3 import ID3, ID3NoHeaderError, USLT, TIT2, TALB, TPE1, TRCK
+
+    tagged_path = os.path.join(tagged_dir, track.tagged_name())
+    temp_path = tagged_path + ".tmp"
+    shutil.copyfile(os.path.join(audio_tmp_dir, track.source), temp_path)
+    try:
+        try:
+            tags = ID3(temp_path)
+        except ID3NoHeaderError:
+            tags = ID3()
+        tags.setall("USLT", [USLT(encoding=3, lang='vie', desc='', text=track.lyrics)])
+        tags.setall("TIT2", [TIT2(encoding=3, text=track.title)])
+        tags.setall("TALB", [TALB(encoding=3, text=track.album)])
+        tags.setall("TPE1", [TPE1(encoding=3, text=track.artist)])
+        tags.setall("TRCK", [TRCK(encoding=3, text=track.track_no)])
+        tags.save(temp_path)
+        os.replace(temp_path, tagged_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return tagged_path
+
+
+def _tag_track_job(args: Tuple[ExportTrack, str, str]) -> str:
+    return tag_track(*args)
+
+
+def _link_or_copy(src: str, dest: str) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def export_audio(
+    db_path: str,
+    audio_tmp_dir: str,
+    out_dir: str,
+    tagged_dir: str,
+    voice: str,
+    album: str = DEFAULT_ALBUM,
+    artist: Optional[str] = None,
+    workers: int = 1,
+    chunk_audio: bool = False,
+) -> ExportResult:
+    """
+    Xuất audio từng câu thành các track có tên và thẻ ID3:
+    1. Tính tên audio nguồn qua cache dùng chung; sinh audio còn thiếu (nếu có API key) qua hàng đợi TTS của builder.
+    2. Chỉ gắn thẻ (song song trong process pool) các track có nguồn/thẻ mới; bản gắn thẻ được cache theo hash thẻ.
+    3. Thư mục xuất chứa hardlink tới bản gắn thẻ, track không đổi được giữ nguyên, track thừa bị xoá.
+    Xuất lại một corpus không đổi gần như không tốn gì. chunk_audio phải khớp cấu hình corpus để tên audio trùng với cache của builder.
+    """
+    offline = not os.getenv("GOOGLE_TTS_API_KEY")
+    tts_generator = TTSGenerator(
+        os.path.join(out_dir, ".unused"), audio_tmp_dir, offline=offline, voices=[voice],
+        chunking=DEFAULT_CHUNKING if chunk_audio else None
+    )
+    tracks, jobs = plan_export_tracks(db_path, tts_generator, voice, album, artist)
+    if not offline:
+        tts_generator.synthesize_jobs(jobs)
+
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(tagged_dir, exist_ok=True)
+    available = [track for track in tracks if tts_generator.is_cached(track.source)]
+    missing = len(tracks) - len(available)
+    if missing:
+        logger.warning(f"⚠️ Thiếu {missing} audio trong cache (chạy `gioibon data` với GOOGLE_TTS_API_KEY để sinh).")
+
+    # 1. Gắn thẻ các track chưa có bản gắn thẻ tương ứng
+    to_tag: Dict[str, ExportTrack] = {}
+    for track in available:
+        if not os.path.exists(os.path.join(tagged_dir, track.tagged_name())):
+            to_tag.setdefault(track.tagged_name(), track)
+    if to_tag:
+        logger.info(f"🏷️  Đang gắn thẻ ID3 cho {len(to_tag)} track ({max(workers, 1)} process)...")
+        job_args = [(track, audio_tmp_dir, tagged_dir) for track in to_tag.values()]
+        if workers <= 1 or len(job_args) <= 1:
+            for args in job_args:
+                _tag_track_job(args)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=setup_logging) as executor:
+                list(executor.map(_tag_track_job, job_args, chunksize=16))
+
+    # 2. Đồng bộ thư mục xuất bằng hardlink
+    linked = unchanged = 0
+    for track in available:
+        tagged_path = os.path.join(tagged_dir, track.tagged_name())
+        out_path = os.path.join(out_dir, track.filename)
+        if os.path.exists(out_path):
+            if os.path.samefile(out_path, tagged_path):
+                unchanged += 1
+                continue
+            os.remove(out_path)
+        _link_or_copy(tagged_path, out_path)
+        linked += 1
+
+    # 3. Dọn track thừa trong thư mục xuất và bản gắn thẻ không còn dùng
+    wanted: Set[str] = {track.filename for track in available}
+    removed = 0
+    for filename in os.listdir(out_dir):
+        if filename.endswith(".mp3") and filename not in wanted:
+            os.remove(os.path.join(out_dir, filename))
+            removed += 1
+    used_tagged: Set[str] = {track.tagged_name() for track in available}
+    for filename in os.listdir(tagged_dir):
+        if filename not in used_tagged:
+            os.remove(os.path.join(tagged_dir, filename))
+
+    result = ExportResult(len(tracks), len(to_tag), linked, unchanged, missing, removed)
+    logger.info(
+        f"✅ Đã xuất {len(available)} track ra {out_dir}: gắn thẻ {result.tagged}, cập nhật {linked}, "
+        f"giữ nguyên {unchanged}, xoá {removed}, thiếu {missing}."
+    )
+    return result
@@ -0,0 +1,153 @@
+# Path: src/data_builder/audio_manifest.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["AUDIO_MANIFEST_VERSION", "build_audio_manifest", "write_audio_manifest", "diff_audio_manifest"]
+
+AUDIO_MANIFEST_VERSION = 1
+# Độ dài hash (hex sha256) của file và của từng nút, cùng dạng tên audio
+NODE_HASH_LENGTH = 16
+
+# Audio của một giọng, gom theo nhóm điều luật -> điều luật. Rule tiêu đề nhóm (group rỗng) là nhóm của chính nó,
+# segment không thuộc điều luật nào nằm trong nhóm "" / rule ""
+AUDIO_TREE_QUERY = """SELECT DISTINCT COALESCE(NULLIF(r."group", ''), c.rule_id, '') AS group_id,
+                      COALESCE(c.rule_id, '') AS rule_id, ca.audio_name
+                      FROM content_audio ca
+                      JOIN contents c ON c.uid = ca.uid
+                      LEFT JOIN rules r ON r.id = c.rule_id
+                      WHERE ca.voice = ?"""
+
+
+def _node_hash(children: Dict[str, Any]) -> str:
+    """Hash của một nút: từ các cặp (khoá con, hash con) đã sắp xếp, đổi một file chỉ đổi hash trên đường từ file lên gốc."""
+    payload = "\n".join(f"{key}:{child if isinstance(child, str) else child['hash']}" for key, child in sorted(children.items()))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:NODE_HASH_LENGTH]
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:NODE_HASH_LENGTH]
+
+
+def _manifest_file_hashes(manifest: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        name: file_hash
+        for group in manifest.get("groups", {}).values()
+        for rule in group["rules"].values()
+        for name, file_hash in rule["files"].items()
+    }
+
+
+def build_audio_manifest(
+    db_path: str, audio_dir: str, voice: str, known_hashes: Optional[Dict[str, str]] = None, known_mtime_ns: int = 0
+) -> Dict[str, Any]:
+    """
+    Cây hash kiểu Merkle của audio đã xuất bản: gốc -> nhóm điều luật -> điều luật -> {tên file: hash nội dung}.
+    File thiếu trong audio_dir bị bỏ qua (client không tải được). Một file dùng ở nhiều điều luật có mặt ở mỗi điều luật đó.
+    Hash trong known_hashes (manifest cũ) được dùng lại cho file không sửa sau known_mtime_ns, chỉ file mới/đổi phải đọc lại.
+    """
+    known_hashes = known_hashes or {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(AUDIO_TREE_QUERY, (voice,)).fetchall()
+    finally:
+        conn.close()
+
+    file_hashes: Dict[str, str] = {}
+    groups: Dict[str, Dict[str, Any]] = {}
+    for group_id, rule_id, audio_name in rows:
+        if audio_name not in file_hashes:
+            path = os.path.join(audio_dir, audio_name)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            known = known_hashes.get(audio_name)
+            file_hashes[audio_name] = known if known and mtime_ns < known_mtime_ns else _file_hash(path)
+        rules = groups.setdefault(group_id, {"rules": {}})["rules"]
+        rules.setdefault(rule_id, {"files": {}})["files"][audio_name] = file_hashes[audio_name]
+
+    for group in groups.values():
+        for rule in group["rules"].values():
+            rule["hash"] = _node_hash(rule["files"])
+        group["hash"] = _node_hash(group["rules"])
+    return {"version": AUDIO_MANIFEST_VERSION, "voice": voice, "hash": _node_hash(groups), "files": len(file_hashes), "groups": groups}
+
+
+def write_audio_manifest(db_path: str, audio_dir: str, voice: str, manifest_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Ghi manifest audio (JSON gọn), dùng lại hash file của manifest cũ cho audio không đổi.
+    Giữ nguyên file cũ (và timestamp) nếu hash gốc không đổi. Trả về manifest nếu file được ghi mới.
+    """
+    old: Optional[Dict[str, Any]] = None
+    old_mtime_ns = 0
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        old_mtime_ns = os.stat(manifest_path).st_mtime_ns
+        if old.get("voice") != voice or old.get("version") != AUDIO_MANIFEST_VERSION:
+            old = None
+    except (OSError, ValueError):
+        old = None
+
+    manifest = build_audio_manifest(db_path, audio_dir, voice, _manifest_file_hashes(old) if old else None, old_mtime_ns)
+    if old is not None and old.get("hash") == manifest["hash"]:
+        logger.info(f"💤 Audio manifest không đổi ({manifest['hash']}). Bỏ qua ghi file.")
+        return None
+
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(temp_path, manifest_path)
+    logger.info(f"🌳 Đã lưu audio manifest tại: {manifest_path} ({manifest['files']} file, {len(manifest['groups'])} nhóm, gốc {manifest['hash']})")
+    return manifest
+
+
+def _children(node: Optional[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    return (node or {}).get(key) or {}
+
+
+def diff_audio_manifest(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Tuple[List[str], List[str], int]:
+    """
+    So sánh hai manifest từ gốc xuống, chỉ đi vào nhánh có hash khác (giống AudioZipLoader.reconcile bên web).
+    Trả về (file cần tải, file bỏ khỏi cache, số nút đã so sánh).
+    """
+    if old is None or old.get("version") != new.get("version") or old.get("voice") != new.get("voice"):
+        old = None
+    visited = 1
+    if old is not None and old.get("hash") == new["hash"]:
+        return [], [], visited
+
+    fetch: Dict[str, str] = {}
+    dropped: Set[str] = set()
+    old_groups, new_groups = _children(old, "groups"), _children(new, "groups")
+    for group_id in old_groups.keys() | new_groups.keys():
+        old_group, new_group = old_groups.get(group_id), new_groups.get(group_id)
+        visited += 1
+        if old_group and new_group and old_group["hash"] == new_group["hash"]:
+            continue
+        old_rules, new_rules = _children(old_group, "rules"), _children(new_group, "rules")
+        for rule_id in old_rules.keys() | new_rules.keys():
+            old_rule, new_rule = old_rules.get(rule_id), new_rules.get(rule_id)
+            visited += 1
+            if old_rule and new_rule and old_rule["hash"] == new_rule["hash"]:
+                continue
+            old_files, new_files = _children(old_rule, "files"), _children(new_rule, "files")
+            visited += len(old_files.keys() | new_files.keys())
+            fetch.update((name, file_hash) for name, file_hash in new_files.items() if old_files.get(name) != file_hash)
+            dropped.update(name for name in old_files if name not in new_files)
+
+    # File chỉ chuyển sang điều luật khác (hoặc còn dùng ở nhánh không đổi) thì không tải lại, không xoá khỏi cache
+    if fetch:
+        cached = {name: file_hash for group in old_groups.values() for rule in group["rules"].values() for name, file_hash in rule["files"].items()}
+        fetch = {name: file_hash for name, file_hash in fetch.items() if cached.get(name) != file_hash}
+    if dropped:
+        kept = {name for group in new_groups.values() for rule in group["rules"].values() for name in rule["files"]}
+        dropped -= kept
+    return sorted(fetch), sorted(dropped), visited
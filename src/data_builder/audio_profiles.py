@@ -0,0 +1,88 @@
+# Path: src/data_builder/audio_profiles.py
+import hashlib
+import os
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+__all__ = [
+    "AudioProfile",
+    "DEFAULT_AUDIO_PROFILE",
+    "AUDIO_PROFILES",
+    "resolve_audio_profiles",
+    "profile_audio_name",
+    "profile_bundle_name",
+]
+
+
+class AudioProfile(NamedTuple):
+    """Cấu hình mã hoá audio khi gọi Google TTS: định dạng, tần số lấy mẫu (0 = mặc định của giọng) và tốc độ đọc."""
+    name: str
+    encoding: str = "MP3"
+    sample_rate_hz: int = 0
+    speaking_rate: float = 1.0
+
+    @property
+    def extension(self) -> str:
+        return {"MP3": "mp3", "OGG_OPUS": "ogg", "LINEAR16": "wav"}[self.encoding]
+
+    def is_default(self) -> bool:
+        """Profile mặc định giữ nguyên request và tên file cũ (cache audio hiện có vẫn dùng được)."""
+        return (self.encoding, self.sample_rate_hz, self.speaking_rate) == ("MP3", 0, 1.0)
+
+    def cache_key(self) -> str:
+        return f"{self.encoding}|{self.sample_rate_hz}|{self.speaking_rate:g}"
+
+    def audio_config(self) -> Dict[str, Any]:
+        """Phần audioConfig của request Google TTS."""
+        config: Dict[str, Any] = {"audioEncoding": self.encoding}
+        if self.sample_rate_hz:
+            config["sampleRateHertz"] = self.sample_rate_hz
+        if self.speaking_rate != 1.0:
+            config["speakingRate"] = self.speaking_rate
+        return config
+
+
+DEFAULT_AUDIO_PROFILE = AudioProfile("default")
+
+# Các profile dựng sẵn (chọn trong corpora.json hoặc `gioibon data --audio-profile`)
+AUDIO_PROFILES: Dict[str, AudioProfile] = {
+    "default": DEFAULT_AUDIO_PROFILE,
+    # Gói nhỏ cho điện thoại: Opus 16 kHz vẫn nghe rõ tiếng Việt với dung lượng thấp hơn nhiều
+    "mobile": AudioProfile("mobile", "OGG_OPUS", 16000),
+    # Gói chất lượng cao: PCM không nén ở tần số gốc của giọng Chirp3-HD
+    "hq": AudioProfile("hq", "LINEAR16", 24000),
+}
+
+
+def resolve_audio_profiles(names: Sequence[str]) -> List[AudioProfile]:
+    """
+    Đổi tên profile thành cấu hình. Profile đầu tiên là profile chính (audio của web app, audio.zip),
+    các profile sau được xuất bản thành gói riêng.
+    """
+    unknown = [name for name in names if name not in AUDIO_PROFILES]
+    if unknown:
+        raise ValueError(f"Không có audio profile: {', '.join(unknown)} (có sẵn: {', '.join(AUDIO_PROFILES)})")
+    if "default" in names[1:]:
+        raise ValueError("Audio profile 'default' chỉ được đứng đầu danh sách.")
+    profiles = [AUDIO_PROFILES[name] for name in dict.fromkeys(names)]
+    return profiles or [DEFAULT_AUDIO_PROFILE]
+
+
+def profile_audio_name(audio_name: str, profile: AudioProfile) -> str:
+    """
+    Tên file cache của một audio khi mã hoá theo profile, suy ra từ tên file gốc (hash của văn bản + giọng, hoặc tên
+    theo profile chính) nên khoá cache gồm cả văn bản, giọng đọc và cấu hình mã hoá. Writer dùng cùng hàm này để
+    tìm audio của các gói phụ từ danh sách audio trong DB mà không cần văn bản.
+    """
+    if profile.is_default() or audio_name == "skip":
+        return audio_name
+    stem = os.path.splitext(audio_name)[0]
+    digest = hashlib.sha256(f"{stem}|{profile.cache_key()}".encode("utf-8")).hexdigest()[:16]
+    return f"{digest}.{profile.extension}"
+
+
+def profile_bundle_name(bundle_name: str, profile: AudioProfile, is_primary: bool) -> str:
+    """audio.zip -> audio-mobile.zip, audio-<voice>.zip -> audio-<voice>-mobile.zip (profile chính giữ tên cũ)."""
+    if is_primary:
+        return bundle_name
+    stem, ext = os.path.splitext(bundle_name)
+    return f"{stem}-{profile.name}{ext}"
@@ -0,0 +1,166 @@
+# Path: src/data_builder/build_graph.py
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["StageDecision", "BuildGraph", "fingerprint_files", "fingerprint_stat", "fingerprint_code", "fingerprint_values"]
+
+# Mã nguồn ảnh hưởng tới đầu ra của builder (đổi code -> build lại)
+SOURCE_ROOT = Path(__file__).parent.parent
+CODE_DIRS = [SOURCE_ROOT / "data_builder", SOURCE_ROOT / "config"]
+HASH_READ_SIZE = 1024 * 1024
+
+
+class StageDecision(NamedTuple):
+    name: str
+    run: bool
+    reason: str
+    fingerprint: str
+
+
+def fingerprint_values(*values: object) -> str:
+    """Băm một danh sách giá trị (chuỗi, số, list) thành fingerprint ổn định."""
+    hasher = hashlib.sha256()
+    for value in values:
+        hasher.update(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        hasher.update(b"\x1f")
+    return hasher.hexdigest()
+
+
+def fingerprint_files(paths: Iterable[str]) -> str:
+    """Băm nội dung các file đầu vào (file không tồn tại được ghi nhận là 'missing')."""
+    hasher = hashlib.sha256()
+    for path in paths:
+        hasher.update(path.encode("utf-8"))
+        if not os.path.isfile(path):
+            hasher.update(b"missing")
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                hasher.update(block)
+    return hasher.hexdigest()
+
+
+def fingerprint_stat(paths: Iterable[str]) -> str:
+    """Fingerprint rẻ theo (kích thước, mtime) cho các file đầu ra lớn do chính builder ghi ra."""
+    parts: List[object] = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append([path, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            parts.append([path, "missing"])
+    return fingerprint_values(parts)
+
+
+_code_fingerprint: Optional[str] = None
+
+
+def fingerprint_code() -> str:
+    """Băm toàn bộ mã nguồn của builder (được tính một lần cho mỗi process)."""
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        paths = sorted(str(p) for d in CODE_DIRS for p in d.rglob("*.py"))
+        _code_fingerprint = fingerprint_files(paths)
+    return _code_fingerprint
+
+
+class BuildGraph:
+    """
+    Đồ thị các bước build với fingerprint đầu vào lưu trong build state file.
+    Mỗi bước chỉ chạy khi đầu vào thay đổi, đầu ra bị thiếu hoặc khi bị ép chạy (--force).
+    """
+
+    def __init__(self, state_path: str, force: bool = False, explain: bool = False) -> None:
+        self.state_path = state_path
+        self.force = force
+        self.explain = explain
+        self.state: Dict[str, Any] = self._load_state()
+        self.decisions: List[StageDecision] = []
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {"stages": {}}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            state.setdefault("stages", {})
+            return state
+        except (OSError, ValueError):
+            logger.warning(f"⚠️ Build state hỏng, sẽ build lại toàn bộ: {self.state_path}")
+            return {"stages": {}}
+
+    def decide(self, name: str, fingerprint: str, outputs: Iterable[str] = (), force_reason: Optional[str] = None) -> StageDecision:
+        """Quyết định một bước có cần chạy hay không, kèm lý do (force_reason: ép chạy với lý do riêng)."""
+        previous = self.state["stages"].get(name)
+        missing_outputs = [p for p in outputs if not os.path.exists(p)]
+
+        if self.force:
+            decision = StageDecision(name, True, "--force", fingerprint)
+        elif force_reason:
+            decision = StageDecision(name, True, force_reason, fingerprint)
+        elif previous is None:
+            decision = StageDecision(name, True, "chưa từng chạy", fingerprint)
+        elif missing_outputs:
+            decision = StageDecision(name, True, f"thiếu đầu ra {missing_outputs[0]}", fingerprint)
+        elif previous.get("fingerprint") != fingerprint:
+            decision = StageDecision(name, True, "đầu vào thay đổi", fingerprint)
+        else:
+            decision = StageDecision(name, False, "không đổi", fingerprint)
+        return self._record(decision)
+
+    def derive(self, name: str, dependents: Iterable[StageDecision]) -> StageDecision:
+        """Bước trung gian: chạy khi có ít nhất một bước phụ thuộc cần chạy."""
+        needed = [d.name for d in dependents if d.run]
+        if needed:
+            decision = StageDecision(name, True, f"cần cho {', '.join(needed)}", "")
+        else:
+            decision = StageDecision(name, False, "không bước nào cần", "")
+        return self._record(decision)
+
+    def _record(self, decision: StageDecision) -> StageDecision:
+        self.decisions.append(decision)
+        icon = "▶️ " if decision.run else "⏭️ "
+        message = f"{icon} {decision.name}: {decision.reason}"
+        if self.explain:
+            logger.info(message)
+        else:
+            logger.debug(message)
+        return decision
+
+    def mark_done(self, decision: StageDecision) -> None:
+        if decision.fingerprint:
+            self.record(decision.name, decision.fingerprint)
+
+    def record(self, name: str, fingerprint: str) -> None:
+        """Ghi nhận một bước đã cập nhật với fingerprint cho trước (dùng khi bước được chạy bên ngoài graph)."""
+        self.state["stages"][name] = {"fingerprint": fingerprint, "ran_at": int(time.time())}
+
+    def is_current(self, name: str, fingerprint: str, outputs: Iterable[str] = ()) -> bool:
+        """Kiểm tra nhanh (không ghi nhận quyết định) xem một bước đã cập nhật hay chưa."""
+        previous = self.state["stages"].get(name)
+        return (
+            not self.force
+            and previous is not None
+            and previous.get("fingerprint") == fingerprint
+            and all(os.path.exists(p) for p in outputs)
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.state[key] = value
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.state_path)
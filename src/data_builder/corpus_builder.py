@@ -0,0 +1,276 @@
+# Path: src/data_builder/corpus_builder.py
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, TypeVar
+
+from src.config.logging_config import setup_logging
+from src.data_builder.audio_chunks import DEFAULT_CHUNKING
+from src.data_builder.build_graph import BuildGraph, fingerprint_code, fingerprint_files, fingerprint_stat, fingerprint_values
+from src.data_builder.models import CorpusConfig, CorpusManifest
+from src.data_builder.mp3_frames import DEFAULT_TRIM
+from src.data_builder.row_cache import RowCache
+from src.data_builder.telemetry import Telemetry
+from src.data_builder.records import iter_validated
+from src.data_builder.tts_generator import TTSGenerator, TTSJob, TTS_RULES_PATH
+from src.data_builder.writer import DataWriter
+from src.data_builder.processors import TsvContentProcessor
+from src.data_builder.processors.base import strip_html_tags, clean_brackets
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CorpusBuildResult", "load_corpus_manifest", "corpus_db_path", "corpus_audio_dir", "corpus_state_path",
+    "content_fingerprint", "published_fingerprint", "assets_fingerprint", "corpus_needs_planning", "plan_corpus_audio", "build_corpus", "build_corpora",
+]
+
+R = TypeVar("R")
+
+
+class CorpusBuildResult(NamedTuple):
+    corpus_id: str
+    segment_count: int
+    audio_names: List[str]
+    # Số liệu telemetry của lần build (Telemetry.to_dict), dùng cho build_report.json
+    report: Optional[Dict[str, Any]] = None
+
+
+def load_corpus_manifest(manifest_path: str) -> CorpusManifest:
+    """Đọc manifest mô tả các corpus cần build."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return CorpusManifest.model_validate(json.load(f))
+
+
+def corpus_db_path(corpus: CorpusConfig) -> str:
+    return os.path.join(corpus.output_dir, "content.db")
+
+
+def corpus_audio_dir(corpus: CorpusConfig) -> str:
+    return os.path.join(corpus.output_dir, "audio")
+
+
+def corpus_state_path(corpus: CorpusConfig, state_dir: str) -> str:
+    return os.path.join(state_dir, f"build_state_{corpus.id}.json")
+
+
+def content_fingerprint(corpus: CorpusConfig) -> str:
+    """Fingerprint đầu vào của bước xử lý nội dung: file nguồn, rule groups, tts_rules, mã nguồn builder, giọng đọc, audio profile, cắt khoảng lặng, mốc thời gian và bố cục DB."""
+    return fingerprint_values(
+        fingerprint_files([corpus.source, corpus.rule_groups, TTS_RULES_PATH]),
+        fingerprint_code(),
+        corpus.voices,
+        corpus.audio_profiles,
+        corpus.trim_silence,
+        corpus.timepoints,
+        corpus.chunk_audio,
+        corpus.db_layout,
+    )
+
+
+def published_fingerprint(corpus: CorpusConfig) -> str:
+    """Fingerprint đầu vào của các bước xuất bản: DB đã ghi (kích thước/mtime, DB không đổi thì giữ nguyên mtime), giọng đọc và audio profile."""
+    return fingerprint_values(fingerprint_stat([corpus_db_path(corpus)]), corpus.voices, corpus.audio_profiles)
+
+
+def assets_fingerprint(corpus: CorpusConfig, writer: DataWriter) -> str:
+    """Fingerprint đầu vào của asset manifest: mọi artifact được xuất bản theo hash (kích thước/mtime), giọng đọc và audio profile."""
+    return fingerprint_values(fingerprint_stat(writer.asset_paths()), corpus.voices, corpus.audio_profiles)
+
+
+def _recovered_audio(graph: BuildGraph, audio_tmp_dir: str) -> bool:
+    """Có audio nào bị thiếu ở lần build trước nay đã xuất hiện trong cache hay không."""
+    return any(os.path.exists(os.path.join(audio_tmp_dir, name)) for name in graph.get("missing_audio", []))
+
+
+def corpus_needs_planning(corpus: CorpusConfig, audio_tmp_dir: str, state_dir: Optional[str], force: bool = False) -> bool:
+    """
+    Corpus cần quét lập kế hoạch TTS khi nội dung thay đổi, hoặc còn audio thiếu mà có thể sinh được (có API key).
+    """
+    if force or not state_dir:
+        return True
+    graph = BuildGraph(corpus_state_path(corpus, state_dir))
+    fingerprint = content_fingerprint(corpus)
+    if not (graph.is_current("tsv", fingerprint, [corpus.tsv_out]) and graph.is_current("sqlite", fingerprint, [corpus_db_path(corpus)])):
+        return True
+    return bool(graph.get("missing_audio")) and bool(os.getenv("GOOGLE_TTS_API_KEY"))
+
+
+def plan_corpus_audio(corpus: CorpusConfig, audio_tmp_dir: str) -> List[TTSJob]:
+    """
+    Quét nhanh TSV nguồn (không render HTML) để lấy danh sách audio còn thiếu trong cache dùng chung
+    (kể cả audio chưa có mốc thời gian khi bật timepoints). Chạy trong process riêng cho từng corpus.
+    """
+    tts_generator = TTSGenerator(
+        corpus_audio_dir(corpus), audio_tmp_dir, offline=True, voices=corpus.voices, profiles=corpus.resolved_audio_profiles(),
+        timepoints=corpus.timepoints, chunking=DEFAULT_CHUNKING if corpus.chunk_audio else None
+    )
+    missing: Dict[str, TTSJob] = {}
+
+    with open(corpus.source, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter='\t'):
+            clean_segment = strip_html_tags(clean_brackets(row['segment']))
+            for job in tts_generator.plan_segment_profiles(clean_segment, row['html'], row['label']):
+                if job.filename not in missing and tts_generator.is_pending(job):
+                    missing[job.filename] = job
+
+    logger.info(f"🔎 [{corpus.id}] Cần sinh {len(missing)} audio mới.")
+    return list(missing.values())
+
+
+def build_corpus(
+    corpus: CorpusConfig,
+    audio_tmp_dir: str,
+    cache_dir: Optional[str] = None,
+    validate: bool = False,
+    state_dir: Optional[str] = None,
+    force: bool = False,
+    explain: bool = False,
+) -> CorpusBuildResult:
+    """
+    Build một corpus: TSV nguồn -> TSV/DB/audio. Audio chỉ lấy từ cache (đã được sinh ở bước trước).
+    Các bước (process, tsv, sqlite, version, snapshot, audio-sync, zip, assets) chỉ chạy lại khi fingerprint đầu vào của chúng
+    thay đổi so với build state lưu trong state_dir (không có state_dir: luôn chạy tất cả).
+    """
+    telemetry = Telemetry()
+    state_path = corpus_state_path(corpus, state_dir) if state_dir else ""
+    graph = BuildGraph(state_path, force=force or not state_dir, explain=explain)
+    db_path = corpus_db_path(corpus)
+    profiles = corpus.resolved_audio_profiles()
+    writer = DataWriter(
+        corpus.tsv_out, db_path, audio_tmp_dir, corpus_audio_dir(corpus),
+        voices=corpus.voices, telemetry=telemetry, db_layout=corpus.db_layout, audio_profiles=profiles, timepoints=corpus.timepoints
+    )
+
+    # 1. Nội dung: TSV & SQLite cùng phụ thuộc vào fingerprint đầu vào, bước process chạy khi một trong hai cần
+    input_fingerprint = content_fingerprint(corpus)
+    force_reason = "--validate" if validate else ("audio mới có trong cache" if _recovered_audio(graph, audio_tmp_dir) else None)
+    tsv_stage = graph.decide("tsv", input_fingerprint, [corpus.tsv_out], force_reason)
+    sqlite_outputs = [db_path, writer.spell_index_path()] + ([writer.page_manifest_path()] if corpus.db_layout == "range" else [])
+    sqlite_stage = graph.decide("sqlite", input_fingerprint, sqlite_outputs, force_reason)
+    process_stage = graph.derive("process", [tsv_stage, sqlite_stage])
+
+    if process_stage.run:
+        logger.info(f"🚀 [{corpus.id}] Đang build từ {corpus.source}...")
+        with telemetry.stage("process"):
+            tts_generator = TTSGenerator(
+                corpus_audio_dir(corpus), audio_tmp_dir, offline=True, voices=corpus.voices, telemetry=telemetry, profiles=profiles,
+                trim=DEFAULT_TRIM if corpus.trim_silence else None, chunking=DEFAULT_CHUNKING if corpus.chunk_audio else None
+            )
+            row_cache = RowCache(os.path.join(cache_dir, f"row_cache_{corpus.id}.db"), rule_groups_path=corpus.rule_groups) if cache_dir else None
+            processor = TsvContentProcessor(tts_generator, corpus.rule_groups, row_cache=row_cache, telemetry=telemetry)
+
+            # Xử lý nội dung từ TSV và ghi dữ liệu theo dạng stream:
+            # mỗi dòng đi thẳng từ TSV nguồn qua các bộ xử lý vào TSV/DB đích, bộ nhớ không phụ thuộc kích thước corpus
+            segments, rules, headings = processor.iter_segments(corpus.source), processor.iter_rules(), processor.iter_headings()
+            if validate:
+                # Kiểm tra từng record bằng Pydantic (chậm hơn, chỉ bật khi cần)
+                segments, rules, headings = iter_validated(segments), iter_validated(rules), iter_validated(headings)
+            writer.write_content(segments, rules, headings, write_tsv=tsv_stage.run, write_sqlite=sqlite_stage.run)
+            if row_cache:
+                telemetry.count("row_cache.hit", row_cache.hits)
+                telemetry.count("row_cache.miss", row_cache.misses)
+                row_cache.close()
+
+        graph.set("missing_audio", sorted(tts_generator.missing))
+        graph.set("segment_count", writer.segment_count)
+        graph.mark_done(tsv_stage)
+        graph.mark_done(sqlite_stage)
+    else:
+        logger.info(f"💤 [{corpus.id}] Nội dung không thay đổi, bỏ qua bước xử lý.")
+        writer.load_audio_names()
+
+    # 2. Các bước xuất bản phụ thuộc vào DB đã ghi
+    publish_fingerprint = published_fingerprint(corpus)
+    version_stage = graph.decide("version", publish_fingerprint, [writer.version_path()])
+    if version_stage.run:
+        with telemetry.stage("version"):
+            writer.save_version_file()
+        graph.mark_done(version_stage)
+
+    snapshot_stage = graph.decide("snapshot", publish_fingerprint, [writer.snapshot_path()])
+    if snapshot_stage.run:
+        with telemetry.stage("snapshot"):
+            writer.save_snapshot()
+        graph.mark_done(snapshot_stage)
+
+    audio_sync_stage = graph.decide("audio-sync", publish_fingerprint, [corpus_audio_dir(corpus)])
+    if audio_sync_stage.run:
+        with telemetry.stage("audio-sync"):
+            writer.sync_audio_files()
+        graph.mark_done(audio_sync_stage)
+
+    audio_manifest_stage = graph.decide("audio-manifest", publish_fingerprint, [writer.audio_manifest_path()])
+    if audio_manifest_stage.run:
+        with telemetry.stage("audio-manifest"):
+            writer.save_audio_manifest()
+        graph.mark_done(audio_manifest_stage)
+
+    zip_stage = graph.decide("zip", publish_fingerprint, writer.bundle_paths(skip_empty=True))
+    if zip_stage.run:
+        with telemetry.stage("zip"):
+            writer.zip_audio_bundles()
+        graph.mark_done(zip_stage)
+
+    # 3. Asset manifest: bản theo hash nội dung + bản nén sẵn của mọi artifact đã xuất bản
+    assets_stage = graph.decide("assets", assets_fingerprint(corpus, writer), [writer.asset_manifest_path()])
+    if assets_stage.run:
+        with telemetry.stage("assets"):
+            writer.publish_assets()
+        graph.mark_done(assets_stage)
+
+    telemetry.count("stages.run", sum(1 for d in graph.decisions if d.run))
+    telemetry.count("stages.skipped", sum(1 for d in graph.decisions if not d.run))
+    telemetry.record_size("db", db_path)
+    if state_dir:
+        graph.save()
+    return CorpusBuildResult(corpus.id, writer.segment_count, sorted(writer.cache_audio_names()), telemetry.to_dict())
+
+
+def _run_parallel(func: Callable[..., R], corpora: Sequence[CorpusConfig], workers: int, *args: object) -> List[R]:
+    """Chạy func cho từng corpus, dùng process pool khi có nhiều corpus."""
+    if workers <= 1 or len(corpora) <= 1:
+        return [func(corpus, *args) for corpus in corpora]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(corpora)), initializer=setup_logging) as executor:
+        futures = [executor.submit(func, corpus, *args) for corpus in corpora]
+        return [future.result() for future in futures]
+
+
+def build_corpora(
+    corpora: Sequence[CorpusConfig],
+    audio_tmp_dir: str,
+    cache_dir: Optional[str] = None,
+    validate: bool = False,
+    workers: int = 1,
+    state_dir: Optional[str] = None,
+    force: bool = False,
+    explain: bool = False,
+    telemetry: Optional[Telemetry] = None,
+) -> List[CorpusBuildResult]:
+    """
+    Build nhiều corpus song song, dùng chung một cache audio:
+    1. Mỗi corpus có nội dung thay đổi lập danh sách audio còn thiếu (song song).
+    2. Gộp và loại trùng thành một hàng đợi TTS duy nhất (mọi giọng đọc sinh song song):
+       văn bản chung giữa các corpus chỉ sinh một lần.
+    3. Build từng corpus (song song) với audio đã sẵn sàng trong cache.
+    Thời gian của từng giai đoạn và số liệu hàng đợi TTS được ghi vào telemetry (nếu có).
+    """
+    telemetry = telemetry or Telemetry()
+    with telemetry.stage("plan"):
+        to_plan = [c for c in corpora if corpus_needs_planning(c, audio_tmp_dir, state_dir, force)]
+        missing_jobs = _run_parallel(plan_corpus_audio, to_plan, workers, audio_tmp_dir)
+
+    all_jobs = [job for jobs in missing_jobs for job in jobs]
+    telemetry.count("tts.jobs", len(all_jobs))
+    if all_jobs:
+        with telemetry.stage("tts"):
+            shared_tts = TTSGenerator("", audio_tmp_dir, telemetry=telemetry, timepoints=any(c.timepoints for c in corpora))
+            shared_tts.synthesize_jobs(all_jobs)
+
+    with telemetry.stage("build"):
+        results = _run_parallel(build_corpus, corpora, workers, audio_tmp_dir, cache_dir, validate, state_dir, force, explain)
+    for result in results:
+        logger.info(f"✅ [{result.corpus_id}] {result.segment_count} segments, {len(result.audio_names)} audio.")
+    return results
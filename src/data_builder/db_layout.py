@@ -0,0 +1,153 @@
+# Path: src/data_builder/db_layout.py
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["DB_LAYOUTS", "RANGE_PAGE_SIZE", "FIRST_SCREEN_ROWS", "relayout_for_range_requests", "build_page_manifest", "write_page_manifest"]
+
+DB_LAYOUTS = ("default", "range")
+# Trang nhỏ để mỗi HTTP range request chỉ kéo về đúng phần cần đọc (giống khuyến nghị của sql.js-httpvfs)
+RANGE_PAGE_SIZE = 1024
+# Số dòng của màn hình đầu tiên (khớp BATCH_SIZE của web/modules/ui/content/lazy_renderer.js)
+FIRST_SCREEN_ROWS = 100
+# Thứ tự đặt bảng trong file: cây heading rồi tới nội dung (theo uid) nằm ngay sau trang schema
+LAYOUT_TABLE_ORDER = ("headings", "contents", "rules", "voices", "content_audio")
+
+PageRange = Tuple[int, int]
+
+
+def _ordered_schema(conn: sqlite3.Connection) -> Tuple[List[Tuple[str, str]], List[str], List[str]]:
+    """Tách schema nguồn thành (bảng theo thứ tự layout, câu tạo index, câu tạo view & trigger), bỏ qua bảng ẩn của FTS."""
+    rows = conn.execute("SELECT type, name, sql FROM src.sqlite_schema WHERE sql IS NOT NULL ORDER BY rowid").fetchall()
+    virtual_tables = [name for kind, name, sql in rows if kind == "table" and sql.upper().startswith("CREATE VIRTUAL TABLE")]
+    tables = [
+        (name, sql) for kind, name, sql in rows
+        if kind == "table" and not any(name.startswith(f"{vtab}_") for vtab in virtual_tables)
+    ]
+    rank = {name: i for i, name in enumerate(LAYOUT_TABLE_ORDER)}
+    tables.sort(key=lambda table: rank.get(table[0], len(rank)))
+    indexes = [sql for kind, _, sql in rows if kind == "index"]
+    triggers = [sql for kind, _, sql in rows if kind in ("view", "trigger")]
+    return tables, indexes, triggers
+
+
+def relayout_for_range_requests(db_path: str, page_size: int = RANGE_PAGE_SIZE) -> None:
+    """
+    Sắp xếp lại file DB cho việc đọc lười qua HTTP range request: page_size nhỏ cố định,
+    bảng được tạo và chép theo LAYOUT_TABLE_ORDER (heading + các dòng đầu của contents nằm ở những trang đầu),
+    chỉ mục FTS được dựng lại và tối ưu, view/trigger tạo lại sau cùng, cuối cùng VACUUM để không còn trang trống. Ghi đè db_path (thay thế nguyên tử).
+    """
+    layout_path = db_path + ".layout"
+    if os.path.exists(layout_path):
+        os.remove(layout_path)
+
+    conn = sqlite3.connect(layout_path, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("ATTACH DATABASE ? AS src", (db_path,))
+        tables, indexes, triggers = _ordered_schema(conn)
+
+        conn.execute("BEGIN")
+        # Tạo mọi bảng trước để các trang gốc (root page) nằm liền nhau ở đầu file
+        for _, sql in tables:
+            conn.execute(sql)
+        for sql in indexes:
+            conn.execute(sql)
+        for name, sql in tables:
+            if sql.upper().startswith("CREATE VIRTUAL TABLE"):
+                continue
+            conn.execute(f'INSERT INTO main."{name}" SELECT * FROM src."{name}"')
+        for name, sql in tables:
+            if sql.upper().startswith("CREATE VIRTUAL TABLE"):
+                conn.execute(f'INSERT INTO "{name}"("{name}") VALUES (\'rebuild\')')
+                conn.execute(f'INSERT INTO "{name}"("{name}") VALUES (\'optimize\')')
+        # View & trigger tạo sau cùng (dữ liệu đã chép xong, FTS đã dựng lại)
+        for sql in triggers:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE src")
+        conn.execute("VACUUM")
+    except Exception:
+        conn.close()
+        os.remove(layout_path)
+        raise
+    conn.close()
+    os.replace(layout_path, db_path)
+
+
+def _to_ranges(pages: Iterable[int]) -> List[PageRange]:
+    """Gom danh sách số trang thành các đoạn liên tục [đầu, cuối]."""
+    ranges: List[List[int]] = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return [(start, end) for start, end in ranges]
+
+
+def build_page_manifest(db_path: str, first_screen_rows: int = FIRST_SCREEN_ROWS) -> Dict[str, Any]:
+    """
+    Bản đồ truy cập trang cho trình đọc kiểu sql.js-httpvfs: các đoạn trang của từng bảng/index và tập trang
+    cần cho màn hình đầu tiên (trang schema, trang gốc của mọi b-tree, toàn bộ cây heading,
+    các trang trong của contents và trang lá/tràn chứa `first_screen_rows` dòng đầu).
+    Dùng bảng ảo dbstat của SQLite.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        stats = conn.execute("SELECT name, path, pageno, pagetype, ncell FROM dbstat ORDER BY name, path").fetchall()
+    finally:
+        conn.close()
+
+    objects: Dict[str, List[int]] = {}
+    first_screen: Set[int] = {1}
+    rows_covered = 0
+    covered_leaves: List[str] = []
+    for name, path, pageno, pagetype, ncell in stats:
+        objects.setdefault(name, []).append(pageno)
+        if path == "/" or name == "headings":
+            first_screen.add(pageno)
+        if name != "contents":
+            continue
+        if pagetype == "internal":
+            first_screen.add(pageno)
+        elif pagetype == "leaf" and rows_covered < first_screen_rows:
+            rows_covered += ncell
+            covered_leaves.append(path)
+            first_screen.add(pageno)
+        elif pagetype == "overflow" and any(path.startswith(leaf) for leaf in covered_leaves):
+            first_screen.add(pageno)
+
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "file_size": page_size * page_count,
+        "objects": {name: _to_ranges(pages) for name, pages in sorted(objects.items())},
+        "first_screen": {
+            "rows": min(rows_covered, first_screen_rows),
+            "pages": _to_ranges(first_screen),
+            "bytes": len(first_screen) * page_size,
+        },
+    }
+
+
+def write_page_manifest(db_path: str, manifest_path: str, first_screen_rows: int = FIRST_SCREEN_ROWS) -> Dict[str, Any]:
+    """Ghi manifest truy cập trang cạnh DB (ghi file tạm rồi thay thế)."""
+    manifest = build_page_manifest(db_path, first_screen_rows)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+    first_screen = manifest["first_screen"]
+    logger.info(
+        f"🗺️  Đã ghi page manifest tại: {manifest_path} "
+        f"(màn hình đầu: {first_screen['bytes'] // 1024} KB / {manifest['file_size'] // 1024} KB)"
+    )
+    return manifest
@@ -1,8 +1,11 @@
 # Path: src/data_builder/models.py
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
 
-__all__ = ["SourceSegmentData", "SegmentData", "RuleData", "HeadingData"]
+from src.config.constants import DEFAULT_TTS_VOICE
+from src.data_builder.audio_profiles import AudioProfile, resolve_audio_profiles
+
+__all__ = ["SourceSegmentData", "SegmentData", "RuleData", "HeadingData", "CorpusConfig", "CorpusManifest"]
 
 class SourceSegmentData(BaseModel):
     html: str = Field(description="Template HTML với placeholder {}")
@@ -32,3 +35,32 @@ class SegmentData(SourceSegmentData):
     hint_text: Optional[str] = Field(None, description="Nội dung 4 từ đầu + ...")
     heading_id: Optional[int] = Field(None, description="ID tiêu đề trực thuộc")
     rule_id: Optional[str] = Field(None, description="ID luật trực thuộc")
+
+class CorpusConfig(BaseModel):
+    id: str = Field(description="Mã định danh corpus (VD: bhikkhu, bhikkhuni)")
+    source: str = Field(description="Đường dẫn file TSV nguồn")
+    rule_groups: str = Field(description="Đường dẫn file TSV nhóm luật")
+    tsv_out: str = Field(description="Đường dẫn file TSV đầu ra")
+    output_dir: str = Field(description="Thư mục xuất bản (content.db, audio/, audio.zip)")
+    voices: List[str] = Field(default_factory=lambda: [DEFAULT_TTS_VOICE], description="Các giọng đọc, giọng đầu tiên là giọng chính")
+    db_layout: Literal["default", "range"] = Field("default", description="Bố cục content.db (range: trang nhỏ, sắp xếp cho HTTP range request + page manifest)")
+    audio_profiles: List[str] = Field(
+        default_factory=lambda: ["default"],
+        description="Các audio profile (default, mobile, hq), profile đầu tiên là audio của web app, các profile sau xuất thành gói riêng"
+    )
+
+    trim_silence: bool = Field(False, description="Cắt khoảng lặng đầu/cuối của audio MP3 theo ranh giới frame (bản cắt được cache cạnh bản gốc)")
+    timepoints: bool = Field(False, description="Ghi mốc thời gian từng từ vào content.db (SSML <mark> nếu giọng hỗ trợ, nếu không thì ước lượng tất định)")
+    chunk_audio: bool = Field(False, description="Chia segment dài thành chunk theo câu/mệnh đề: sinh và cache từng chunk, audio segment được ghép theo frame MP3")
+
+    @field_validator("audio_profiles")
+    @classmethod
+    def _check_audio_profiles(cls, names: List[str]) -> List[str]:
+        resolve_audio_profiles(names)
+        return names
+
+    def resolved_audio_profiles(self) -> List[AudioProfile]:
+        return resolve_audio_profiles(self.audio_profiles)
+
+class CorpusManifest(BaseModel):
+    corpora: List[CorpusConfig] = Field(description="Danh sách các corpus cần build")
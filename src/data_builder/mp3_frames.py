@@ -0,0 +1,229 @@
+# Path: src/data_builder/mp3_frames.py
+import hashlib
+import math
+import os
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+__all__ = [
+    "Mp3Frame",
+    "TrimOptions",
+    "DEFAULT_TRIM",
+    "parse_mp3_frames",
+    "mp3_duration_ms",
+    "trim_silence",
+    "concat_mp3",
+    "trimmed_audio_name",
+    "trim_source_name",
+    "trim_audio_file",
+]
+
+# Bảng bitrate (kbps) và tần số lấy mẫu của MPEG Audio Layer III
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+# Bit 19-20 của header -> phiên bản MPEG (1: MPEG-1, 2: MPEG-2, 25: MPEG-2.5)
+_VERSIONS = {0b11: 1, 0b10: 2, 0b00: 25}
+_INFO_TAGS = (b"Xing", b"Info", b"VBRI")
+_TRIMMED_NAME = re.compile(r"^([0-9a-f]{16})\.t[0-9a-f]{8}\.mp3$")
+
+
+class Mp3Frame(NamedTuple):
+    """Một frame MPEG Layer III: vị trí, độ dài, số mẫu và các trường side info dùng để đánh giá khoảng lặng."""
+    offset: int
+    length: int
+    samples: int
+    sample_rate: int
+    side_info_end: int
+    main_data_begin: int
+    max_granule_bits: int
+    is_info: bool
+
+
+class TrimOptions(NamedTuple):
+    """
+    Tham số cắt khoảng lặng. Không giải mã audio: số bit Huffman (part2_3_length) mà encoder dùng cho mỗi granule
+    tỉ lệ với năng lượng tín hiệu, granule lặng gần như không tốn bit nào.
+    """
+    silence_bits: int = 40
+    keep_ms: int = 40
+
+    def cache_key(self) -> str:
+        return f"{self.silence_bits}|{self.keep_ms}"
+
+
+DEFAULT_TRIM = TrimOptions()
+
+
+class _BitReader:
+    def __init__(self, data: bytes, offset: int) -> None:
+        self.data = data
+        self.pos = offset * 8
+
+    def read(self, bits: int) -> int:
+        value = 0
+        for _ in range(bits):
+            byte = self.data[self.pos >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+    def skip(self, bits: int) -> None:
+        self.pos += bits
+
+
+def _id3v2_size(data: bytes) -> int:
+    """Độ dài thẻ ID3v2 ở đầu file (0 nếu không có)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_frame(data: bytes, offset: int, first: bool = False) -> Optional[Mp3Frame]:
+    if offset + 4 > len(data):
+        return None
+    header = int.from_bytes(data[offset:offset + 4], "big")
+    if header >> 21 != 0x7FF:
+        return None
+    version = _VERSIONS.get((header >> 19) & 0b11)
+    layer = (header >> 17) & 0b11
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0b11
+    # Chỉ hỗ trợ Layer III, bitrate cố định trong bảng (không hỗ trợ "free format")
+    if version is None or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = _BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    channels = 1 if (header >> 6) & 0b11 == 0b11 else 2
+    if version == 1:
+        samples, length = 1152, 144 * bitrate // sample_rate + padding
+    else:
+        samples, length = 576, 72 * bitrate // sample_rate + padding
+    if offset + length > len(data):
+        return None
+
+    side_start = offset + 4 + (0 if (header >> 16) & 1 else 2)
+    side_size = (17 if channels == 1 else 32) if version == 1 else (9 if channels == 1 else 17)
+    reader = _BitReader(data, side_start)
+    if version == 1:
+        main_data_begin = reader.read(9)
+        reader.skip((5 if channels == 1 else 3) + 4 * channels)
+        granules, granule_bits = 2, 59
+    else:
+        main_data_begin = reader.read(8)
+        reader.skip(1 if channels == 1 else 2)
+        granules, granule_bits = 1, 63
+
+    max_bits = 0
+    for _ in range(granules * channels):
+        part2_3_length = reader.read(12)
+        max_bits = max(max_bits, part2_3_length)
+        reader.skip(granule_bits - 12)
+
+    # Frame Xing/Info/VBRI (chỉ có thể là frame đầu tiên) chứa số liệu VBR, không chứa audio
+    is_info = first and any(tag in data[offset:offset + min(length, 40)] for tag in _INFO_TAGS)
+    return Mp3Frame(offset, length, samples, sample_rate, side_start + side_size, main_data_begin, max_bits, is_info)
+
+
+def parse_mp3_frames(data: bytes) -> Tuple[int, List[Mp3Frame]]:
+    """
+    Duyệt các frame MP3 (bỏ qua thẻ ID3v2 ở đầu). Dừng ở chỗ mất đồng bộ đầu tiên (VD: thẻ ID3v1 ở cuối).
+    Trả về (vị trí frame đầu tiên, danh sách frame); danh sách rỗng nếu dữ liệu không phải MP3 Layer III.
+    """
+    start = offset = _id3v2_size(data)
+    frames: List[Mp3Frame] = []
+    while True:
+        frame = _parse_frame(data, offset, first=not frames)
+        if frame is None:
+            break
+        frames.append(frame)
+        offset += frame.length
+    return start, frames
+
+
+def mp3_duration_ms(data: bytes) -> Optional[int]:
+    """Thời lượng (ms) tính từ số mẫu của các frame audio, None nếu không đọc được."""
+    _, frames = parse_mp3_frames(data)
+    audio_frames = [frame for frame in frames if not frame.is_info]
+    if not audio_frames:
+        return None
+    return round(sum(frame.samples / frame.sample_rate for frame in audio_frames) * 1000)
+
+
+def trim_silence(data: bytes, options: TrimOptions = DEFAULT_TRIM) -> Optional[bytes]:
+    """
+    Cắt các frame lặng ở đầu/cuối theo ranh giới frame, giữ lại keep_ms ở mỗi đầu.
+    Frame Xing/Info (số liệu không còn đúng sau khi cắt) bị bỏ. Phía trước frame đầu tiên được giữ lại đủ frame
+    để bù main_data_begin (bit reservoir của Layer III). Trả về None nếu dữ liệu không phải MP3 Layer III.
+    """
+    start, frames = parse_mp3_frames(data)
+    audio_frames = [frame for frame in frames if not frame.is_info]
+    if not audio_frames:
+        return None
+
+    loud = [i for i, frame in enumerate(audio_frames) if frame.max_granule_bits > options.silence_bits]
+    if not loud:
+        return data
+    frame_ms = audio_frames[0].samples / audio_frames[0].sample_rate * 1000
+    keep = math.ceil(options.keep_ms / frame_ms)
+    first = max(loud[0] - keep, 0)
+    last = min(loud[-1] + keep, len(audio_frames) - 1)
+
+    # Bit reservoir: dữ liệu chính của frame đầu có thể nằm trong các frame trước nó
+    needed, reservoir = audio_frames[first].main_data_begin, 0
+    while first > 0 and reservoir < needed:
+        first -= 1
+        frame = audio_frames[first]
+        reservoir += frame.offset + frame.length - frame.side_info_end
+
+    audio_end = frames[-1].offset + frames[-1].length
+    kept = b"".join(data[frame.offset:frame.offset + frame.length] for frame in audio_frames[first:last + 1])
+    return data[:start] + kept + data[audio_end:]
+
+
+def concat_mp3(parts: Sequence[bytes]) -> Optional[bytes]:
+    """
+    Ghép nhiều file MP3 theo ranh giới frame (không giải mã): bỏ thẻ ID3 và frame Xing/Info của từng phần, nối các frame audio.
+    Mỗi phần là một lần mã hoá độc lập nên frame đầu có main_data_begin = 0 (bit reservoir không vắt qua ranh giới ghép).
+    Trả về None nếu có phần không phải MP3 Layer III.
+    """
+    kept: List[bytes] = []
+    for data in parts:
+        _, frames = parse_mp3_frames(data)
+        audio_frames = [frame for frame in frames if not frame.is_info]
+        if not audio_frames:
+            return None
+        kept.extend(data[frame.offset:frame.offset + frame.length] for frame in audio_frames)
+    return b"".join(kept)
+
+
+def trimmed_audio_name(audio_name: str, options: TrimOptions = DEFAULT_TRIM) -> str:
+    """Tên bản đã cắt: hash nguồn (tên file cache) + hash tham số cắt, VD: 0123456789abcdef.t1a2b3c4d.mp3"""
+    stem = os.path.splitext(audio_name)[0]
+    return f"{stem}.t{hashlib.sha256(options.cache_key().encode('utf-8')).hexdigest()[:8]}.mp3"
+
+
+def trim_source_name(audio_name: str) -> Optional[str]:
+    """Tên file nguồn trong cache của một bản đã cắt (None nếu không phải bản đã cắt)."""
+    match = _TRIMMED_NAME.match(audio_name)
+    return f"{match.group(1)}.mp3" if match else None
+
+
+def trim_audio_file(source_path: str, dest_path: str, options: TrimOptions = DEFAULT_TRIM) -> Optional[int]:
+    """Ghi bản đã cắt của source_path ra dest_path (ghi file tạm rồi thay thế). Trả về số byte tiết kiệm được, None nếu không phải MP3."""
+    with open(source_path, "rb") as f:
+        data = f.read()
+    trimmed = trim_silence(data, options)
+    if trimmed is None:
+        return None
+    temp_path = dest_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(trimmed)
+    os.replace(temp_path, dest_path)
+    return len(data) - len(trimmed)
@@ -1,5 +1,5 @@
 # Path: src/data_builder/processors/__init__.py
-from src.data_builder.processors.content_processor import TsvContentProcessor
+from src.data_builder.processors.content_processor import ProcessorCheckpoint, TsvContentProcessor
 from src.data_builder.processors.structure_processor import StructureProcessor
 
-__all__ = ["TsvContentProcessor", "StructureProcessor"]
+__all__ = ["ProcessorCheckpoint", "TsvContentProcessor", "StructureProcessor"]
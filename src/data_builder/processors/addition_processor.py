@@ -1,19 +1,41 @@
 # Path: src/data_builder/processors/addition_processor.py
-import re
+from src.data_builder.processors.token_stream import TokenStream
 
 __all__ = ["AdditionProcessor"]
 
+PALI_NAME_OPEN_TAG = "<span class='pali-name'>"
+TRANS_ADDITION_OPEN_TAG = "<span class='trans-addition'>"
+SPAN_CLOSE_TAG = "</span>"
+
+
 class AdditionProcessor:
     """Xử lý phần bổ sung của dịch giả (ngoặc đơn) và tên Pali (heading)."""
 
-    def process(self, text: str, is_heading: bool, label: str, html_template: str) -> str:
+    def process(self, tokens: TokenStream, is_heading: bool, label: str, html_template: str) -> TokenStream:
         if is_heading:
             # Chỉ bọc Pali trong ngoặc đơn cho heading (Giữ nguyên dấu ngoặc)
             if (html_template.startswith("<h") or label.endswith("-chapter")) and (label.endswith("-name") or label.endswith("-chapter")):
-                pali_pattern = r"\(.*?\)"
-                return re.sub(pali_pattern, r"<span class='pali-name'>\g<0></span>", text)
-            return text
+                return self._wrap_pairs(tokens, PALI_NAME_OPEN_TAG, keep_brackets=True)
+            return tokens
         else:
             # Xử lý phần bổ sung của dịch giả cho văn bản thường (Bỏ dấu ngoặc đơn, bọc thẻ trans-addition)
-            trans_pattern = r"\((.*?)\)"
-            return re.sub(trans_pattern, r"<span class='trans-addition'>\1</span>", text)
+            return self._wrap_pairs(tokens, TRANS_ADDITION_OPEN_TAG, keep_brackets=False)
+
+    def _wrap_pairs(self, tokens: TokenStream, open_tag: str, keep_brackets: bool) -> TokenStream:
+        pairs = tokens.find_pairs('(', ')')
+        if not pairs:
+            return tokens
+
+        output = TokenStream()
+        cursor = (0, 0)
+        for (open_idx, open_off), (close_idx, close_off) in pairs:
+            output.copy_range(tokens, cursor, (open_idx, open_off))
+            output.append_tag(open_tag)
+            if keep_brackets:
+                output.copy_range(tokens, (open_idx, open_off), (close_idx, close_off + 1))
+            else:
+                output.copy_range(tokens, (open_idx, open_off + 1), (close_idx, close_off))
+            output.append_tag(SPAN_CLOSE_TAG)
+            cursor = (close_idx, close_off + 1)
+        output.copy_range(tokens, cursor, tokens.end_pos())
+        return output
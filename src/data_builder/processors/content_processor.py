@@ -1,11 +1,14 @@
 # Path: src/data_builder/processors/content_processor.py
 import csv
 import logging
-from typing import List
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-from src.data_builder.models import SegmentData
+from src.data_builder.records import SegmentRecord, RuleRecord, HeadingRecord
 from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.row_cache import RowCache, RenderedRow
+from src.data_builder.telemetry import Telemetry
 from src.data_builder.processors.base import strip_html_tags, clean_brackets
+from src.data_builder.processors.token_stream import TokenStream
 from src.data_builder.processors.quote_processor import QuoteStateProcessor
 from src.data_builder.processors.addition_processor import AdditionProcessor
 from src.data_builder.processors.selection_processor import SelectionProcessor
@@ -16,13 +19,34 @@ from src.data_builder.processors.structure_processor import StructureProcessor
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["TsvContentProcessor"]
+__all__ = ["ProcessorCheckpoint", "TsvContentProcessor"]
+
+
+class ProcessorCheckpoint(NamedTuple):
+    """Trạng thái lan truyền giữa các dòng ngay trước một dòng nguồn (để xử lý tiếp từ dòng đó thay vì từ đầu file)."""
+    in_quote: bool
+    heading_path: Tuple[HeadingRecord, ...]
+    heading_id: Optional[int]
+    rule_id: Optional[str]
+    rule_count: int
+    heading_count: int
+
 
 class TsvContentProcessor:
     """Bộ điều phối chính để xử lý file TSV thành dữ liệu phong phú."""
     
-    def __init__(self, tts_generator: TTSGenerator, rule_groups_path: str = "data/content/rule_groups.tsv"):
+    def __init__(
+        self,
+        tts_generator: TTSGenerator,
+        rule_groups_path: str = "data/content/rule_groups.tsv",
+        row_cache: Optional[RowCache] = None,
+        telemetry: Optional[Telemetry] = None,
+    ):
         self.tts_generator = tts_generator
+        self.row_cache = row_cache
+        # Thời gian của từng bộ xử lý con được cộng dồn vào telemetry (báo cáo build)
+        self.telemetry = telemetry or Telemetry()
+        self.rule_groups_path = rule_groups_path
         # Khởi tạo các sub-processors
         self.quote_proc = QuoteStateProcessor()
         self.addition_proc = AdditionProcessor()
@@ -31,6 +55,31 @@ class TsvContentProcessor:
         self.hint_proc = HintProcessor()
         self.structure_proc = StructureProcessor(rule_groups_path)
 
+    def reset(self) -> None:
+        """Đưa bộ xử lý về trạng thái ban đầu để xử lý lại file nguồn (dùng cho chế độ watch, giữ nguyên cache)."""
+        self.quote_proc.in_quote = False
+        self.structure_proc = StructureProcessor(self.rule_groups_path)
+
+    def checkpoint(self) -> ProcessorCheckpoint:
+        structure = self.structure_proc
+        return ProcessorCheckpoint(
+            self.quote_proc.in_quote, tuple(structure.current_heading_path), structure.current_heading_id,
+            structure.current_rule_id, len(structure.rules), len(structure.headings)
+        )
+
+    def restore(self, checkpoint: ProcessorCheckpoint) -> None:
+        """
+        Đưa bộ xử lý về trạng thái của checkpoint (lấy trong cùng lượt xử lý gần nhất): rules/headings
+        sinh ra sau checkpoint bị bỏ đi để các dòng phía sau được xử lý lại.
+        """
+        structure = self.structure_proc
+        self.quote_proc.in_quote = checkpoint.in_quote
+        structure.current_heading_path = list(checkpoint.heading_path)
+        structure.current_heading_id = checkpoint.heading_id
+        structure.current_rule_id = checkpoint.rule_id
+        del structure.rules[checkpoint.rule_count:]
+        del structure.headings[checkpoint.heading_count:]
+
     def _generate_hint_text(self, text: str) -> str:
         """Tạo hint text: bọc 'Vị tỳ khưu [nào]' vào class mờ, 7 từ nếu là 'nào', 6 từ nếu là 'vị tỳ khưu'."""
         lower_text = text.lower()
@@ -61,94 +110,139 @@ class TsvContentProcessor:
             return hint_base + " <span class='hint-ellipsis'>...</span>"
         return hint_base
 
-    def process_tsv(self, tsv_path: str):
-        """Đọc file TSV nguồn và bổ sung cột Audio, segment_html bằng cách điều phối các bộ xử lý nhỏ."""
-        segments_output: List[SegmentData] = []
-        
+    def _render_row(self, html_template: str, label: str, raw_source_text: str, clean_segment: str, is_heading: bool, is_end_segment: bool) -> RenderedRow:
+        """Chạy chuỗi bộ xử lý văn bản cho một dòng, trả về nội dung hiển thị đã làm giàu."""
+        # Parse segment thành token một lần duy nhất, các bộ xử lý nối tiếp nhau trên token stream
+        timed = self.telemetry.timed
+        tokens = timed("processor.parse", TokenStream.parse, raw_source_text)
+
+        # 1. Xử lý Trích dẫn (Quote) - Cần duy trì state nên chạy đầu tiên
+        tokens = timed("processor.quote", self.quote_proc.process, tokens)
+
+        # 2. Làm giàu nội dung hiển thị (Rich Text)
+        has_hint_val = 0
+
+        if is_heading:
+            tokens = timed("processor.addition", self.addition_proc.process, tokens, True, label, html_template)
+            # Headings có has_hint = 1 để hỗ trợ Masking (che các đoạn con), 
+            # nhưng không có hint_text (sẽ được xử lý che đen ở CSS)
+            # Ngoại trừ title/subtitle không cho phép mask
+            if label not in ["title", "subtitle"]:
+                has_hint_val = 1
+        else:
+            # Thứ tự: Bổ sung của dịch giả -> Lựa chọn [hoặc] -> Danh sách duyenco -> Hint
+            tokens = timed("processor.addition", self.addition_proc.process, tokens, False, label, html_template)
+            tokens = timed("processor.selection", self.selection_proc.process, tokens)
+            
+            if label.endswith('-duyenco'):
+                tokens = timed("processor.list", self.list_proc.process_duyenco, tokens)
+            
+            # Chuẩn hoá HTML template nếu cần (p -> div)
+            html_template = self.list_proc.ensure_valid_html(html_template, tokens)
+            
+            # Chỉ tạo Hint nếu không phải là segment kết thúc
+            if not is_end_segment:
+                # Tạo Hint (Chạy cuối cùng để bọc cả các thẻ span đã tạo trước đó nếu cần)
+                tokens = timed("processor.hint", self.hint_proc.process, tokens)
+                has_hint_val = 1
+
+        # 3. Tạo Hint Text (chỉ cho các segment có has_hint)
+        hint_text = None
+        if has_hint_val == 1:
+            hint_text = timed("processor.hint-text", self._generate_hint_text, clean_segment)
+
+        self.telemetry.count("rows.rendered")
+        return RenderedRow(html_template, tokens.serialize(), has_hint_val, hint_text, self.quote_proc.in_quote)
+
+    def _render_row_cached(self, html_template: str, label: str, raw_source_text: str, clean_segment: str) -> RenderedRow:
+        """Render một dòng, dùng lại kết quả từ Row Cache nếu dòng không thay đổi."""
+        # Xác định các flag hiển thị (ngữ cảnh cấu trúc của dòng)
+        is_heading = html_template.startswith("<h") or label in ["title", "subtitle"] or label.endswith("-name") or label.endswith("-chapter")
+        is_end_segment = any(cls in html_template for cls in ["endvagga", "endsection", "endsutta", "sadhu"])
+
+        if self.row_cache is None:
+            return self._render_row(html_template, label, raw_source_text, clean_segment, is_heading, is_end_segment)
+
+        key = self.row_cache.make_key(html_template, label, raw_source_text, self.quote_proc.in_quote)
+        cached = self.row_cache.get(key)
+        if cached is not None:
+            # Khôi phục trạng thái quote như thể dòng vừa được xử lý
+            self.quote_proc.in_quote = cached.quote_state_out
+            return cached
+
+        rendered = self._render_row(html_template, label, raw_source_text, clean_segment, is_heading, is_end_segment)
+        self.row_cache.put(key, rendered)
+        return rendered
+
+    def iter_segments(self, tsv_path: str) -> Iterator[SegmentRecord]:
+        """
+        Đọc file TSV nguồn theo dạng stream và sinh từng SegmentRecord (record nhẹ, không qua Pydantic) đã bổ sung Audio, segment_html.
+        Không giữ toàn bộ file trong bộ nhớ: mỗi dòng được xử lý và trả ra ngay.
+        """
+        logger.info(f"Đang xử lý segments từ {tsv_path}...")
+        count = 0
+
         try:
             with open(tsv_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f, delimiter='\t')
-                rows = list(reader)
-                total = len(rows)
-                logger.info(f"Đang xử lý {total} segments từ {tsv_path}...")
-
-                for i, row in enumerate(rows):
-                    uid = i + 1
-                    html_template = row['html']
-                    label = row['label']
-                    raw_source_text = row['segment']
-
-                    # Trích xuất cấu trúc phân cấp (Heading/Rule)
-                    heading_id, rule_id = self.structure_proc.process_segment(uid, html_template, label, raw_source_text)
-
-                    # 1. Xử lý Trích dẫn (Quote) - Cần duy trì state nên chạy đầu tiên
-                    current_display_text = self.quote_proc.process(raw_source_text)
-
-                    # 2. Xác định các flag hiển thị
-                    is_heading = html_template.startswith("<h") or label in ["title", "subtitle"] or label.endswith("-name") or label.endswith("-chapter")
-                    
-                    # 3. Làm giàu nội dung hiển thị (Rich Text)
-                    has_hint_val = 0
-                    is_end_segment = any(cls in html_template for cls in ["endvagga", "endsection", "endsutta", "sadhu"])
-                    
-                    if is_heading:
-                        current_display_text = self.addition_proc.process(current_display_text, True, label, html_template)
-                        # Headings có has_hint = 1 để hỗ trợ Masking (che các đoạn con), 
-                        # nhưng không có hint_text (sẽ được xử lý che đen ở CSS)
-                        # Ngoại trừ title/subtitle không cho phép mask
-                        if label not in ["title", "subtitle"]:
-                            has_hint_val = 1
-                    else:
-                        # Thứ tự: Bổ sung của dịch giả -> Lựa chọn [hoặc] -> Danh sách duyenco -> Hint
-                        current_display_text = self.addition_proc.process(current_display_text, False, label, html_template)
-                        current_display_text = self.selection_proc.process(current_display_text)
-                        
-                        if label.endswith('-duyenco'):
-                            current_display_text = self.list_proc.process_duyenco(current_display_text)
-                        
-                        # Chuẩn hoá HTML template nếu cần (p -> div)
-                        html_template = self.list_proc.ensure_valid_html(html_template, current_display_text)
-                        
-                        # Chỉ tạo Hint nếu không phải là segment kết thúc
-                        if not is_end_segment:
-                            # Tạo Hint (Chạy cuối cùng để bọc cả các thẻ span đã tạo trước đó nếu cần)
-                            current_display_text = self.hint_proc.process(current_display_text)
-                            has_hint_val = 1
-
-                    # 4. Tạo bản sạch (Raw Text) để Tìm kiếm & TTS
-                    clean_segment = clean_brackets(raw_source_text)
-                    clean_segment = strip_html_tags(clean_segment)
-
-                    # 5. Tạo Audio
-                    audio_filename = self.tts_generator.process_segment(
-                        segment_text=clean_segment,
-                        html=html_template,
-                        label=label
-                    )
-                    
-                    # 6. Tạo Hint Text (chỉ cho các segment có has_hint)
-                    hint_text = None
-                    if has_hint_val == 1:
-                        hint_text = self._generate_hint_text(clean_segment)
-
-                    segments_output.append(SegmentData(
-                        uid=uid,
-                        html=html_template,
-                        label=label,
-                        segment=clean_segment,
-                        audio=audio_filename,
-                        segment_html=current_display_text,
-                        has_hint=has_hint_val,
-                        hint_text=hint_text,
-                        heading_id=heading_id,
-                        rule_id=rule_id
-                    ))
-                    
-                    if (i + 1) % 200 == 0:
-                        logger.info(f"Đã xử lý {i + 1}/{total} segments...")
+                for record in self.iter_rows((row['html'], row['label'], row['segment']) for row in reader):
+                    yield record
+                    count = record.uid
+
+                    if count % 200 == 0:
+                        logger.info(f"Đã xử lý {count} segments...")
 
         except Exception as e:
             logger.error(f"Lỗi khi xử lý file TSV: {e}")
             raise e
 
+        self.telemetry.count("rows.processed", count)
+        logger.info(f"Đã xử lý xong {count} segments.")
+
+    def iter_rows(self, rows: Iterable[Tuple[str, str, str]], first_uid: int = 1) -> Iterator[SegmentRecord]:
+        """Xử lý các dòng nguồn (html, label, segment) bắt đầu từ uid first_uid, tiếp nối trạng thái hiện tại của bộ xử lý."""
+        for uid, (html_template, label, raw_source_text) in enumerate(rows, first_uid):
+            # Trích xuất cấu trúc phân cấp (Heading/Rule)
+            heading_id, rule_id = self.telemetry.timed(
+                "processor.structure", self.structure_proc.process_segment, uid, html_template, label, raw_source_text
+            )
+
+            # 1. Tạo bản sạch (Raw Text) để Tìm kiếm & TTS
+            clean_segment = clean_brackets(raw_source_text)
+            clean_segment = strip_html_tags(clean_segment)
+
+            # 2. Render nội dung hiển thị (ưu tiên lấy từ Row Cache)
+            rendered = self._render_row_cached(html_template, label, raw_source_text, clean_segment)
+            html_template = rendered.html
+
+            # 3. Tạo Audio (giọng chính + các giọng phụ, dùng chung bước chuẩn hoá văn bản)
+            audio_filenames = self.telemetry.timed(
+                "tts.lookup", self.tts_generator.process_segment_voices, clean_segment, html_template, label
+            )
+
+            yield SegmentRecord(
+                uid=uid,
+                html=html_template,
+                label=label,
+                segment=clean_segment,
+                audio=audio_filenames[0],
+                segment_html=rendered.segment_html,
+                has_hint=rendered.has_hint,
+                hint_text=rendered.hint_text,
+                heading_id=heading_id,
+                rule_id=rule_id,
+                voice_audio=tuple(audio_filenames[1:])
+            )
+
+    def iter_rules(self) -> Iterator[RuleRecord]:
+        """Danh sách Rule (chỉ đầy đủ sau khi iter_segments đã chạy hết, nên được duyệt lười)."""
+        yield from self.structure_proc.get_rules()
+
+    def iter_headings(self) -> Iterator[HeadingRecord]:
+        """Danh sách Heading (chỉ đầy đủ sau khi iter_segments đã chạy hết, nên được duyệt lười)."""
+        yield from self.structure_proc.get_headings()
+
+    def process_tsv(self, tsv_path: str) -> Tuple[List[SegmentRecord], List[RuleRecord], List[HeadingRecord]]:
+        """Xử lý toàn bộ file TSV và trả về danh sách (dùng khi cần dữ liệu trong bộ nhớ)."""
+        segments_output = list(self.iter_segments(tsv_path))
         return segments_output, self.structure_proc.get_rules(), self.structure_proc.get_headings()
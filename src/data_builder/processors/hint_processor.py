@@ -1,26 +1,40 @@
 # Path: src/data_builder/processors/hint_processor.py
 import re
 
+from src.data_builder.processors.token_stream import TokenStream
+
 __all__ = ["HintProcessor"]
 
+HINT_OPEN_TAG = "<span class='hint-tail'>"
+HINT_CLOSE_TAG = "</span>"
+
+
 class HintProcessor:
     """Xử lý tạo nội dung Hint Mode (bọc hint-tail cho từ)."""
 
-    def process(self, text: str) -> str:
+    def __init__(self):
+        # Regex này khớp với: (Phụ âm đầu hoặc Chữ cái đầu) (Các chữ cái tiếp theo)
+        self._word_pattern = re.compile(
+            r"\b(ngh|ch|gh|gi|kh|ng|nh|ph|qu|th|tr|[^\W\d_])([^\W\d_]+)",
+            flags=re.IGNORECASE | re.UNICODE
+        )
+
+    def process(self, tokens: TokenStream) -> TokenStream:
         """Bọc phần đuôi của các từ vào thẻ span.hint-tail để dùng cho Hint Mode."""
-        if not text:
-            return ""
+        output = TokenStream()
+        for token in tokens:
+            if token.is_tag:
+                output.append_tag(token.value)
+                continue
 
-        # Regex này khớp với: (Phụ âm đầu hoặc Chữ cái đầu) (Các chữ cái tiếp theo)
-        pattern = r"\b(ngh|ch|gh|gi|kh|ng|nh|ph|qu|th|tr|[^\W\d_])([^\W\d_]+)"
-
-        # Split text by HTML tags to preserve them
-        parts = re.split(r'(<[^>]+>)', text)
-        result = []
-        for part in parts:
-            if part.startswith('<') and part.endswith('>'):
-                result.append(part)
-            else:
-                result.append(re.sub(pattern, r"\1<span class='hint-tail'>\2</span>", part, flags=re.IGNORECASE | re.UNICODE))
-
-        return "".join(result)
+            text = token.value
+            start = 0
+            for match in self._word_pattern.finditer(text):
+                output.append_text(text[start:match.start(2)])
+                output.append_tag(HINT_OPEN_TAG)
+                output.append_text(match.group(2))
+                output.append_tag(HINT_CLOSE_TAG)
+                start = match.end()
+            output.append_text(text[start:])
+
+        return output
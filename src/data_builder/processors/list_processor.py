@@ -1,25 +1,79 @@
 # Path: src/data_builder/processors/list_processor.py
+from typing import List
+
+from src.data_builder.processors.token_stream import TokenStream
 
 __all__ = ["ListProcessor"]
 
+BLOCK_TAG_PREFIXES = ("<div", "<ul", "<ol")
+
+
 class ListProcessor:
     """Xử lý định dạng danh sách duyenco và chuẩn hoá HTML templates."""
 
-    def process_duyenco(self, text: str) -> str:
+    def process_duyenco(self, tokens: TokenStream) -> TokenStream:
         """Xử lý định dạng danh sách duyenco."""
-        parts = [p.strip() for p in text.split(';') if p.strip()]
+        parts = [p for p in self._split_items(tokens, ';') if p.serialize().strip()]
         if not parts:
-            return text
+            return tokens
 
+        output = TokenStream()
         if len(parts) == 1:
-            return f"<ul class='duyenco-list single-item'><li><span class='duyenco-content'>{parts[0]}</span></li></ul>"
+            output.append_tag("<ul class='duyenco-list single-item'>")
+            self._append_item(output, parts[0])
+            output.append_tag("</ul>")
         else:
-            list_items = "".join([f"<li><span class='duyenco-content'>{p}</span></li>" for p in parts])
-            return f"<ol class='duyenco-list multi-item'>{list_items}</ol>"
+            output.append_tag("<ol class='duyenco-list multi-item'>")
+            for part in parts:
+                self._append_item(output, part)
+            output.append_tag("</ol>")
+        return output
+
+    def _split_items(self, tokens: TokenStream, separator: str) -> List[TokenStream]:
+        """Tách stream theo ký tự phân cách trong phần text, loại bỏ khoảng trắng ở hai đầu mỗi phần."""
+        parts: List[TokenStream] = []
+        current = TokenStream()
+        for token in tokens:
+            if token.is_tag:
+                current.append_tag(token.value)
+                continue
+            pieces = token.value.split(separator)
+            current.append_text(pieces[0])
+            for piece in pieces[1:]:
+                parts.append(current)
+                current = TokenStream()
+                current.append_text(piece)
+        parts.append(current)
+        return [self._strip(p) for p in parts]
+
+    def _strip(self, part: TokenStream) -> TokenStream:
+        tokens = part.tokens
+        if not tokens:
+            return part
+        stripped = TokenStream()
+        last = len(tokens) - 1
+        for idx, token in enumerate(tokens):
+            if token.is_tag:
+                stripped.append_tag(token.value)
+                continue
+            value = token.value
+            if idx == 0:
+                value = value.lstrip()
+            if idx == last:
+                value = value.rstrip()
+            stripped.append_text(value)
+        return stripped
+
+    def _append_item(self, output: TokenStream, part: TokenStream) -> None:
+        output.append_tag("<li>")
+        output.append_tag("<span class='duyenco-content'>")
+        output.extend(part)
+        output.append_tag("</span>")
+        output.append_tag("</li>")
 
-    def ensure_valid_html(self, html_template: str, current_display_text: str) -> str:
+    def ensure_valid_html(self, html_template: str, tokens: TokenStream) -> str:
         """Tự động chuyển đổi template p -> div nếu nội dung chứa các thẻ block (div, ul, ol)."""
-        if any(tag in current_display_text for tag in ["<div", "<ul", "<ol"]):
+        if tokens.has_tag(BLOCK_TAG_PREFIXES):
             if html_template.startswith("<p"):
                 return html_template.replace("<p", "<div").replace("</p>", "</div>")
         return html_template
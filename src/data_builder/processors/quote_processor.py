@@ -1,38 +1,53 @@
 # Path: src/data_builder/processors/quote_processor.py
+import re
+
+from src.data_builder.processors.token_stream import TokenStream
 
 __all__ = ["QuoteStateProcessor"]
 
+QUOTE_OPEN_TAG = "<span class='quote-text'>"
+QUOTE_CLOSE_TAG = "</span>"
+
+
 class QuoteStateProcessor:
     """Xử lý bọc thẻ quote cho các trích dẫn nằm giữa ‘ và ’, hỗ trợ đa segment."""
     
     def __init__(self):
         self.in_quote = False
+        self._quote_chars = re.compile('[‘’]')
+
+    def process(self, tokens: TokenStream) -> TokenStream:
+        output = TokenStream()
 
-    def process(self, text: str) -> str:
-        was_in_quote = self.in_quote
-        new_text = ""
-        
-        # Quét từng ký tự để bắt chính xác lúc mở và đóng ngoặc
-        for char in text:
-            if char == '‘':
-                if not self.in_quote:
-                    new_text += "<span class='quote-text'>"
-                    self.in_quote = True
-                new_text += '‘'
-            elif char == '’':
-                new_text += '’'
-                if self.in_quote:
-                    new_text += "</span>"
-                    self.in_quote = False
-            else:
-                new_text += char
-                
         # Nếu đoạn này bắt đầu mà đã nằm trong quote (từ đoạn trước kéo sang), mở thẻ ngay từ đầu
-        if was_in_quote:
-            new_text = "<span class='quote-text'>" + new_text
-            
+        if self.in_quote:
+            output.append_tag(QUOTE_OPEN_TAG)
+
+        for token in tokens:
+            if token.is_tag:
+                output.append_tag(token.value)
+                continue
+
+            # Chỉ dừng tại các dấu ngoặc để bắt chính xác lúc mở và đóng
+            text = token.value
+            start = 0
+            for match in self._quote_chars.finditer(text):
+                pos = match.start()
+                if match.group() == '‘':
+                    if not self.in_quote:
+                        output.append_text(text[start:pos])
+                        output.append_tag(QUOTE_OPEN_TAG)
+                        start = pos
+                        self.in_quote = True
+                elif self.in_quote:
+                    output.append_text(text[start:pos + 1])
+                    output.append_tag(QUOTE_CLOSE_TAG)
+                    start = pos + 1
+                    self.in_quote = False
+            output.append_text(text[start:])
+
         # Nếu kết thúc đoạn này mà vẫn đang trong quote (chưa có dấu đóng), phải đóng tạm thẻ
         if self.in_quote:
-            new_text = new_text + "</span>"
-            
-        return new_text
+            output.append_tag(QUOTE_CLOSE_TAG)
+
+        return output
@@ -1,21 +1,29 @@
 # Path: src/data_builder/processors/selection_processor.py
 import re
 
+from src.data_builder.processors.token_stream import TokenStream
+
 __all__ = ["SelectionProcessor"]
 
 class SelectionProcessor:
     """Xử lý các đoạn lựa chọn trong ngoặc vuông [...hoặc...] với logic block/stacked."""
 
-    def process(self, text: str) -> str:
-        if '[' not in text:
-            return text
+    SUFFIX_CHARS = ".,;!:?"
+
+    def process(self, tokens: TokenStream) -> TokenStream:
+        if not tokens.has_text_char('['):
+            return tokens
 
         # 1. Tìm tất cả các cụm ngoặc vuông và dấu câu theo sau ngay lập tức
         groups = []
-        pattern = r'\[(.*?)\]([.,;!:\?]*)'
-        for match in re.finditer(pattern, text):
-            content = match.group(1).strip()
-            suffix = match.group(2) 
+        for open_pos, (close_idx, close_off) in tokens.find_pairs('[', ']'):
+            close_text = tokens.tokens[close_idx].value
+            suffix_end = close_off + 1
+            while suffix_end < len(close_text) and close_text[suffix_end] in self.SUFFIX_CHARS:
+                suffix_end += 1
+
+            content = tokens.serialize_range((open_pos[0], open_pos[1] + 1), (close_idx, close_off)).strip()
+            suffix = close_text[close_off + 1:suffix_end]
             
             items = []
             if content.startswith("hoặc"):
@@ -31,13 +39,13 @@ class SelectionProcessor:
             groups.append({
                 'content': content,
                 'items': items,
-                'start': match.start(),
-                'end': match.end(),
+                'start': open_pos,
+                'end': (close_idx, suffix_end),
                 'suffix': suffix
             })
 
         if not groups:
-            return text
+            return tokens
 
         # 2. Xác định các cụm cần được "stacked" hoặc "block"
         for i, g in enumerate(groups):
@@ -53,7 +61,7 @@ class SelectionProcessor:
                     if i > 0:
                         prev_g = groups[i-1]
                         if len(prev_g['items']) == 2:
-                            between = text[prev_g['end']:g['start']]
+                            between = tokens.serialize_range(prev_g['end'], g['start'])
                             if between.strip() == "":
                                 g['is_stacked'] = True
                                 prev_g['is_stacked'] = True
@@ -61,14 +69,15 @@ class SelectionProcessor:
                     if i < len(groups) - 1:
                         next_g = groups[i+1]
                         if len(next_g['items']) == 2:
-                            between = text[g['end']:next_g['start']]
+                            between = tokens.serialize_range(g['end'], next_g['start'])
                             if between.strip() == "":
                                 g['is_stacked'] = True
                                 next_g['is_stacked'] = True
 
-        # 3. Thực hiện thay thế từ cuối lên đầu
-        result = text
-        for g in reversed(groups):
+        # 3. Thực hiện thay thế theo thứ tự, nối vào stream mới
+        output = TokenStream()
+        cursor = (0, 0)
+        for g in groups:
             is_block = g['is_block']
             is_stacked = g['is_stacked']
             should_wrap = is_block or is_stacked
@@ -116,7 +125,12 @@ class SelectionProcessor:
             elif is_stacked:
                 classes.append("is-stacked")
             
-            replacement = f"<{tag} class='{' '.join(classes)}'>{inner_content}</{tag}>"
-            result = result[:g['start']] + replacement + result[g['end']:]
+            output.copy_range(tokens, cursor, g['start'])
+            output.append_tag(f"<{tag} class='{' '.join(classes)}'>")
+            # Nội dung cụm có thể chứa thẻ do các bộ xử lý trước chèn vào, chỉ parse lại phần nhỏ này
+            output.extend(TokenStream.parse(inner_content))
+            output.append_tag(f"</{tag}>")
+            cursor = g['end']
 
-        return result
+        output.copy_range(tokens, cursor, tokens.end_pos())
+        return output
@@ -3,7 +3,8 @@ import re
 import csv
 from typing import List, Dict, Optional, Tuple
 
-from src.data_builder.models import RuleData, HeadingData
+from src.data_builder.models import RuleData
+from src.data_builder.records import RuleRecord, HeadingRecord
 from src.data_builder.processors.base import strip_html_tags
 
 __all__ = ["StructureProcessor"]
@@ -12,29 +13,30 @@ class StructureProcessor:
     """Quản lý và theo dõi cấu trúc phân cấp Heading và Rule."""
 
     def __init__(self, rule_groups_path: str):
-        self.rules: List[RuleData] = []
-        self.headings: List[HeadingData] = []
+        self.rules: List[RuleRecord] = []
+        self.headings: List[HeadingRecord] = []
         
-        self.current_heading_path: List[HeadingData] = []
+        self.current_heading_path: List[HeadingRecord] = []
         self.current_heading_id: Optional[int] = None
         self.current_rule_id: Optional[str] = None
         
         self._load_rule_groups(rule_groups_path)
 
     def _load_rule_groups(self, path: str):
-        """Nạp danh sách Rule Groups từ file TSV."""
+        """Nạp danh sách Rule Groups từ file TSV (kiểm tra bằng Pydantic tại đầu vào)."""
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f, delimiter='\t')
                 for row in reader:
-                    self.rules.append(RuleData(
+                    rule = RuleData(
                         id=row['id'],
                         type=int(row['type']),
                         acronym=row.get('acronym', ''),
                         pali=row['pali'],
                         viet=row['viet'],
                         group=row['group'] if row['group'] else None
-                    ))
+                    )
+                    self.rules.append(RuleRecord(rule.id, rule.type, rule.acronym, rule.pali, rule.viet, rule.group))
         except FileNotFoundError:
             import logging
             logger = logging.getLogger(__name__)
@@ -64,7 +66,7 @@ class StructureProcessor:
             path_texts = [h.text for h in self.current_heading_path] + [clean_text]
             breadcrumbs = " > ".join(path_texts)
             
-            heading_data = HeadingData(
+            heading_data = HeadingRecord(
                 uid=uid,
                 text=clean_text,
                 level=level,
@@ -114,7 +116,7 @@ class StructureProcessor:
             viet = m.group(1).strip() if m.group(1) else raw_text
             pali = m.group(2).strip() if m.group(2) else ""
             
-        self.rules.append(RuleData(
+        self.rules.append(RuleRecord(
             id=rule_id,
             type=1, # 1: rule
             acronym=acronym,
@@ -124,8 +126,8 @@ class StructureProcessor:
         ))
         self.current_rule_id = rule_id
 
-    def get_rules(self) -> List[RuleData]:
+    def get_rules(self) -> List[RuleRecord]:
         return self.rules
 
-    def get_headings(self) -> List[HeadingData]:
+    def get_headings(self) -> List[HeadingRecord]:
         return self.headings
\ No newline at end of file
@@ -0,0 +1,153 @@
+# Path: src/data_builder/processors/token_stream.py
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+__all__ = ["Token", "TokenPos", "TokenStream", "TAG_SPLIT_PATTERN"]
+
+# Regex tách thẻ HTML, dùng chung cho mọi nơi cần phân biệt text/tag
+TAG_SPLIT_PATTERN = re.compile(r'(<[^>]+>)')
+
+# Vị trí trong luồng token: (chỉ số token, offset ký tự trong token)
+TokenPos = Tuple[int, int]
+
+
+class Token(NamedTuple):
+    value: str
+    is_tag: bool
+
+
+class TokenStream:
+    """
+    Chuỗi token text/tag của một segment.
+    Segment chỉ được parse một lần, các bộ xử lý nối token vào stream mới và serialize ở cuối.
+    Các text liền kề luôn được gộp lại (qua bộ đệm) để chi phí xây dựng là tuyến tính.
+    """
+
+    __slots__ = ("_tokens", "_pending")
+
+    def __init__(self, tokens: Optional[Iterable[Token]] = None) -> None:
+        self._tokens: List[Token] = []
+        self._pending: List[str] = []
+        if tokens is not None:
+            for token in tokens:
+                if token.is_tag:
+                    self.append_tag(token.value)
+                else:
+                    self.append_text(token.value)
+
+    @classmethod
+    def parse(cls, text: str) -> "TokenStream":
+        """Tách chuỗi HTML thành các token text/tag."""
+        stream = cls()
+        if text:
+            for part in TAG_SPLIT_PATTERN.split(text):
+                if part.startswith('<') and part.endswith('>'):
+                    stream.append_tag(part)
+                elif part:
+                    stream.append_text(part)
+        return stream
+
+    # --- Xây dựng ---
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._tokens.append(Token("".join(self._pending), False))
+            self._pending = []
+
+    def append_text(self, text: str) -> None:
+        if text:
+            self._pending.append(text)
+
+    def append_tag(self, tag: str) -> None:
+        self._flush()
+        self._tokens.append(Token(tag, True))
+
+    def extend(self, tokens: Iterable[Token]) -> None:
+        for token in tokens:
+            if token.is_tag:
+                self.append_tag(token.value)
+            else:
+                self.append_text(token.value)
+
+    def copy_range(self, source: "TokenStream", start: TokenPos, end: TokenPos) -> None:
+        """Nối phần [start, end) của một stream khác vào stream này."""
+        tokens = source.tokens
+        start_idx, start_off = start
+        end_idx, end_off = end
+        if start_idx == end_idx:
+            if start_idx < len(tokens):
+                self._append_part(tokens[start_idx], start_off, end_off)
+            return
+
+        self._append_part(tokens[start_idx], start_off, None)
+        for token in tokens[start_idx + 1:end_idx]:
+            self._append_part(token, 0, None)
+        if end_idx < len(tokens):
+            self._append_part(tokens[end_idx], 0, end_off)
+
+    def _append_part(self, token: Token, start: int, end: Optional[int]) -> None:
+        if token.is_tag:
+            # Thẻ không bao giờ bị cắt đôi: chỉ copy khi nằm trọn trong khoảng
+            if start == 0 and end != 0:
+                self.append_tag(token.value)
+        else:
+            self.append_text(token.value[start:end])
+
+    # --- Truy vấn ---
+
+    @property
+    def tokens(self) -> List[Token]:
+        self._flush()
+        return self._tokens
+
+    def __iter__(self) -> Iterator[Token]:
+        return iter(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def end_pos(self) -> TokenPos:
+        return (len(self.tokens), 0)
+
+    def has_text_char(self, char: str) -> bool:
+        return any(char in token.value for token in self.tokens if not token.is_tag)
+
+    def has_tag(self, prefixes: Sequence[str]) -> bool:
+        return any(token.value.startswith(tuple(prefixes)) for token in self.tokens if token.is_tag)
+
+    def find_pairs(self, open_char: str, close_char: str) -> List[Tuple[TokenPos, TokenPos]]:
+        """
+        Tìm các cặp ký tự mở/đóng trong phần text (có thể vắt qua thẻ).
+        Tương đương regex non-greedy `open(.*?)close` (không DOTALL): ký tự đóng đầu tiên sau ký tự mở sẽ kết thúc cặp,
+        gặp xuống dòng trước ký tự đóng thì cặp bị huỷ.
+        """
+        pairs: List[Tuple[TokenPos, TokenPos]] = []
+        opened: Optional[TokenPos] = None
+        for idx, token in enumerate(self.tokens):
+            if token.is_tag:
+                continue
+            value = token.value
+            if open_char not in value and (opened is None or (close_char not in value and "\n" not in value)):
+                continue
+            for off, char in enumerate(value):
+                if opened is None:
+                    if char == open_char:
+                        opened = (idx, off)
+                elif char == close_char:
+                    pairs.append((opened, (idx, off)))
+                    opened = None
+                elif char == "\n":
+                    opened = None
+        return pairs
+
+    def char_at(self, pos: TokenPos) -> str:
+        idx, off = pos
+        return self.tokens[idx].value[off]
+
+    def serialize_range(self, start: TokenPos, end: TokenPos) -> str:
+        part = TokenStream()
+        part.copy_range(self, start, end)
+        return part.serialize()
+
+    def serialize(self) -> str:
+        return "".join(token.value for token in self.tokens)
@@ -0,0 +1,64 @@
+# Path: src/data_builder/records.py
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from src.data_builder.models import SegmentData, RuleData, HeadingData
+
+__all__ = ["SegmentRecord", "RuleRecord", "HeadingRecord", "AnyRecord", "iter_validated", "CONTENT_COLUMN_COUNT"]
+
+# Các record dạng tuple dùng trong hot path (xử lý & ghi dữ liệu).
+# Thứ tự field trùng với thứ tự cột trong TSV/SQLite để ghi trực tiếp bằng csv.writer/executemany.
+# Pydantic model (models.py) chỉ dùng khi cần kiểm tra dữ liệu (to_model / iter_validated).
+
+# Số cột đầu của SegmentRecord tương ứng với bảng contents và file TSV
+CONTENT_COLUMN_COUNT = 10
+
+
+class SegmentRecord(NamedTuple):
+    uid: int
+    html: str
+    label: str
+    segment: str
+    audio: str
+    segment_html: str
+    has_hint: int
+    hint_text: Optional[str]
+    heading_id: Optional[int]
+    rule_id: Optional[str]
+    # Audio của các giọng phụ (theo thứ tự cấu hình), không thuộc bảng contents/TSV
+    voice_audio: Tuple[str, ...] = ()
+
+    def to_model(self) -> SegmentData:
+        return SegmentData.model_validate(self._asdict())
+
+
+class RuleRecord(NamedTuple):
+    id: str
+    type: int
+    acronym: str
+    pali: str
+    viet: str
+    group: Optional[str]
+
+    def to_model(self) -> RuleData:
+        return RuleData.model_validate(self._asdict())
+
+
+class HeadingRecord(NamedTuple):
+    uid: int
+    text: str
+    level: int
+    parent_uid: Optional[int]
+    breadcrumbs: str
+
+    def to_model(self) -> HeadingData:
+        return HeadingData.model_validate(self._asdict())
+
+
+AnyRecord = Union[SegmentRecord, RuleRecord, HeadingRecord]
+
+
+def iter_validated(records: Iterable[AnyRecord]) -> Iterator[AnyRecord]:
+    """Kiểm tra từng record bằng Pydantic model tương ứng (bật theo yêu cầu), trả lại record gốc."""
+    for record in records:
+        record.to_model()
+        yield record
@@ -0,0 +1,112 @@
+# Path: src/data_builder/row_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["RenderedRow", "RowCache", "compute_processor_fingerprint"]
+
+# Thư mục chứa mã nguồn các bộ xử lý. Mọi thay đổi code ở đây sẽ làm mất hiệu lực cache.
+PROCESSORS_DIR = Path(__file__).parent / "processors"
+
+
+class RenderedRow(NamedTuple):
+    """Kết quả render văn bản của một dòng TSV (phần tốn kém nhất của quá trình xử lý)."""
+    html: str
+    segment_html: str
+    has_hint: int
+    hint_text: Optional[str]
+    quote_state_out: bool
+
+
+def compute_processor_fingerprint(rule_groups_path: Optional[str] = None) -> str:
+    """Tạo dấu vân tay từ mã nguồn của toàn bộ các bộ xử lý văn bản và nội dung file rule groups (nếu có)."""
+    hasher = hashlib.sha256()
+    for path in sorted(PROCESSORS_DIR.glob("*.py")):
+        hasher.update(path.name.encode("utf-8"))
+        hasher.update(path.read_bytes())
+    if rule_groups_path and os.path.exists(rule_groups_path):
+        hasher.update(Path(rule_groups_path).read_bytes())
+    return hasher.hexdigest()
+
+
+class RowCache:
+    """
+    Cache bền vững (SQLite) cho kết quả render từng dòng.
+    Khoá = (nội dung dòng, trạng thái quote đầu vào, fingerprint bộ xử lý + rule groups).
+    Ngữ cảnh cấu trúc (heading, segment kết thúc) suy ra từ html và label nên không cần nằm trong khoá.
+    """
+
+    def __init__(self, cache_path: str, fingerprint: Optional[str] = None, rule_groups_path: Optional[str] = None) -> None:
+        self.cache_path = cache_path
+        self.rule_groups_path = rule_groups_path
+        self.fingerprint = fingerprint or compute_processor_fingerprint(rule_groups_path)
+        self.run_id = time.time_ns()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(cache_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rows (
+                key TEXT PRIMARY KEY,
+                html TEXT,
+                segment_html TEXT,
+                has_hint INTEGER,
+                hint_text TEXT,
+                quote_state_out INTEGER,
+                last_run INTEGER
+            ) WITHOUT ROWID
+        """)
+
+    def refresh_fingerprint(self) -> None:
+        """Tính lại fingerprint khi rule groups thay đổi trong lúc cache đang mở (chế độ watch)."""
+        self.fingerprint = compute_processor_fingerprint(self.rule_groups_path)
+
+    def make_key(self, html: str, label: str, segment: str, in_quote: bool) -> str:
+        raw_data = "\x1f".join([self.fingerprint, html, label, segment, str(int(in_quote))])
+        return hashlib.sha256(raw_data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[RenderedRow]:
+        row = self.conn.execute(
+            "SELECT html, segment_html, has_hint, hint_text, quote_state_out FROM rows WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute("UPDATE rows SET last_run = ? WHERE key = ?", (self.run_id, key))
+        return RenderedRow(row[0], row[1], row[2], row[3], bool(row[4]))
+
+    def put(self, key: str, rendered: RenderedRow) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, rendered.html, rendered.segment_html, rendered.has_hint, rendered.hint_text,
+             int(rendered.quote_state_out), self.run_id)
+        )
+
+    def flush(self, prune: bool = True) -> None:
+        """
+        Ghi cache xuống đĩa và bắt đầu lượt build mới (giữ kết nối mở).
+        Nếu prune=True, xoá các dòng không được dùng trong lượt build vừa xong.
+        """
+        if prune:
+            removed = self.conn.execute("DELETE FROM rows WHERE last_run != ?", (self.run_id,)).rowcount
+            if removed:
+                logger.debug(f"Đã dọn {removed} dòng cache không còn sử dụng.")
+        self.conn.commit()
+        logger.info(f"🧠 Row cache: {self.hits} hit / {self.misses} miss.")
+        self.run_id = time.time_ns()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self, prune: bool = True) -> None:
+        """Ghi cache xuống đĩa và đóng kết nối."""
+        self.flush(prune)
+        self.conn.close()
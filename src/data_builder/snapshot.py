@@ -0,0 +1,70 @@
+# Path: src/data_builder/snapshot.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["SNAPSHOT_ROWS", "build_snapshot", "write_snapshot"]
+
+# Số segment đầu tiên có trong snapshot (khớp BATCH_SIZE của web/modules/ui/content/lazy_renderer.js)
+SNAPSHOT_ROWS = 100
+
+# Cùng cột và thứ tự với ContentLoader.load / loadHeadings bên web, để UI dùng lại được các dòng snapshot
+SEGMENT_QUERY = """SELECT c.uid, c.html, c.label, c.audio_name, c.segment,
+                 c.segment_html, c.has_hint, c.hint_text, c.heading_id, c.rule_id, h.level as heading_level
+                 FROM contents c
+                 LEFT JOIN headings h ON c.heading_id = h.uid
+                 ORDER BY c.uid ASC
+                 LIMIT ?"""
+HEADINGS_QUERY = "SELECT uid, text, level, parent_uid, breadcrumbs FROM headings ORDER BY uid ASC"
+RULES_QUERY = 'SELECT id, type, acronym, pali, viet, "group" FROM rules ORDER BY rowid ASC'
+
+
+def _table(cursor: sqlite3.Cursor) -> Dict[str, List[Any]]:
+    """Kết quả query dạng cột + mảng dòng (gọn hơn mảng object khi serialize)."""
+    rows = [list(row) for row in cursor.fetchall()]
+    return {"columns": [column[0] for column in cursor.description], "rows": rows}
+
+
+def build_snapshot(db_path: str, segment_rows: int = SNAPSHOT_ROWS) -> Dict[str, Any]:
+    """Đọc mục lục (headings), danh sách rules và `segment_rows` segment đầu tiên từ DB đã build."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return {
+            "headings": _table(conn.execute(HEADINGS_QUERY)),
+            "rules": _table(conn.execute(RULES_QUERY)),
+            "segments": _table(conn.execute(SEGMENT_QUERY, (segment_rows,))),
+            "total_segments": conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+def write_snapshot(db_path: str, snapshot_path: str, segment_rows: int = SNAPSHOT_ROWS) -> bool:
+    """
+    Ghi snapshot first-paint dạng JSON gọn kèm hash nội dung. Giữ nguyên file cũ (và timestamp) nếu hash không đổi.
+    Trả về True nếu file được ghi mới.
+    """
+    snapshot = build_snapshot(db_path, segment_rows)
+    payload = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    content_hash = hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+    if os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("hash") == content_hash:
+                    logger.info(f"💤 Snapshot không đổi ({content_hash}). Bỏ qua ghi file.")
+                    return False
+        except Exception:
+            pass
+
+    temp_path = snapshot_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"hash": content_hash, **snapshot}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, snapshot_path)
+    logger.info(f"🖼️  Đã ghi snapshot first-paint tại: {snapshot_path} ({os.path.getsize(snapshot_path) // 1024} KB, Hash: {content_hash})")
+    return True
@@ -0,0 +1,229 @@
+# Path: src/data_builder/spell_index.py
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+from itertools import product
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+__all__ = [
+    "SPELL_MAX_DISTANCE",
+    "SPELL_PREFIX_LENGTH",
+    "SPELL_WORDS_SCHEMA",
+    "SPELL_DELETES_SCHEMA",
+    "Suggestion",
+    "spell_db_path",
+    "write_spell_db",
+    "update_spell_index",
+    "fold_diacritics",
+    "word_max_distance",
+    "delete_variants",
+    "build_vocabulary",
+    "spell_index_rows",
+    "edit_distance",
+    "spell_lookup_query",
+    "suggest_words",
+    "correct_query",
+]
+
+# Tham số kiểu SymSpell: khoảng cách sửa tối đa và độ dài tiền tố dùng để sinh biến thể xoá
+SPELL_MAX_DISTANCE = 2
+SPELL_PREFIX_LENGTH = 7
+MIN_WORD_LENGTH = 2
+# Từ ngắn (phần lớn âm tiết tiếng Việt) chỉ sửa 1 ký tự: sửa 2 ký tự trên từ ≤ 4 ký tự gần như chỉ ra từ khác nghĩa
+SHORT_WORD_LENGTH = 4
+# Số gợi ý mỗi từ và số từ tối đa khi thử các tổ hợp cụm từ (3^4 = 81 lần tra FTS)
+PHRASE_CANDIDATES = 3
+MAX_PHRASE_TOKENS = 4
+
+# Cùng cách tách từ với tokenizer unicode61 của contents_fts (chỉ lấy chữ cái)
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+
+# Từ vựng của corpus: mỗi cách viết (có dấu) kèm dạng bỏ dấu và tần suất
+SPELL_WORDS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS spell_words (
+        folded TEXT,
+        word TEXT,
+        count INTEGER,
+        PRIMARY KEY (folded, word)
+    ) WITHOUT ROWID
+"""
+# Biến thể xoá (tới SPELL_MAX_DISTANCE ký tự trong tiền tố) của từng dạng bỏ dấu
+SPELL_DELETES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS spell_deletes (
+        variant TEXT,
+        folded TEXT,
+        PRIMARY KEY (variant, folded)
+    ) WITHOUT ROWID
+"""
+
+
+def spell_db_path(db_path: str) -> str:
+    """
+    Chỉ mục sửa chính tả là một file SQLite riêng cạnh DB nội dung (content.db -> content_spell.db):
+    không làm nặng content.db (tải trước lần vẽ đầu), web app chỉ tải khi một lần tìm kiếm không có kết quả.
+    """
+    stem, ext = os.path.splitext(db_path)
+    return f"{stem}_spell{ext or '.db'}"
+
+
+class Suggestion(NamedTuple):
+    word: str
+    distance: int
+    count: int
+
+
+def fold_diacritics(text: str) -> str:
+    """Chữ thường, bỏ dấu thanh/dấu phụ (NFD rồi bỏ combining mark), đ -> d. VD: Saṅghādisesa -> sanghadisesa"""
+    text = text.lower().replace("đ", "d")
+    return COMBINING_MARKS.sub("", unicodedata.normalize("NFD", text))
+
+
+def word_max_distance(folded: str, max_distance: int = SPELL_MAX_DISTANCE) -> int:
+    return min(max_distance, 1) if len(folded) <= SHORT_WORD_LENGTH else max_distance
+
+
+def delete_variants(word: str, max_distance: int = SPELL_MAX_DISTANCE, prefix_length: int = SPELL_PREFIX_LENGTH) -> Set[str]:
+    """Tập các chuỗi thu được khi xoá 0..max_distance ký tự trong tiền tố prefix_length ký tự của từ."""
+    prefix = word[:prefix_length]
+    variants = {prefix}
+    frontier = {prefix}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier if len(variant) > 1 for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def build_vocabulary(segments: Iterable[str]) -> Counter:
+    """Đếm tần suất các từ (chữ thường) trong các segment, bỏ từ quá ngắn."""
+    vocabulary: Counter = Counter()
+    for segment in segments:
+        vocabulary.update(word for word in WORD_PATTERN.findall((segment or "").lower()) if len(word) >= MIN_WORD_LENGTH)
+    return vocabulary
+
+
+def spell_index_rows(vocabulary: Counter) -> Tuple[List[Tuple[str, str, int]], List[Tuple[str, str]]]:
+    """Dòng cho spell_words và spell_deletes (biến thể xoá tính trên dạng bỏ dấu, mỗi dạng chỉ một lần)."""
+    word_rows = sorted((fold_diacritics(word), word, count) for word, count in vocabulary.items())
+    delete_rows = sorted({
+        (variant, folded)
+        for folded in {row[0] for row in word_rows}
+        for variant in delete_variants(folded, word_max_distance(folded))
+    })
+    return word_rows, delete_rows
+
+
+def write_spell_db(segments: Iterable[str], path: str) -> Tuple[int, int]:
+    """Ghi chỉ mục (spell_words, spell_deletes) từ các segment ra file SQLite mới tại path. Trả về (số từ, số biến thể xoá)."""
+    word_rows, delete_rows = spell_index_rows(build_vocabulary(segments))
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(SPELL_WORDS_SCHEMA)
+        conn.execute(SPELL_DELETES_SCHEMA)
+        conn.executemany("INSERT INTO spell_words VALUES (?, ?, ?)", word_rows)
+        conn.executemany("INSERT INTO spell_deletes VALUES (?, ?)", delete_rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(word_rows), len(delete_rows)
+
+
+def update_spell_index(conn: sqlite3.Connection, old_segments: Iterable[str], new_segments: Iterable[str], schema: str = "main") -> Tuple[int, int]:
+    """
+    Cập nhật chỉ mục theo delta (chế độ watch, trong transaction của conn): cộng/trừ tần suất các từ của segment cũ/mới,
+    bỏ từ hết xuất hiện; biến thể xoá chỉ được thêm/bỏ cho dạng bỏ dấu mới xuất hiện/không còn từ nào.
+    Kết quả giống hệt ghi lại từ đầu bằng write_spell_db. Trả về (số từ, số biến thể xoá) đã thay đổi.
+    """
+    delta = build_vocabulary(new_segments)
+    delta.subtract(build_vocabulary(old_segments))
+    changed = {word: diff for word, diff in delta.items() if diff}
+    folded_forms = {fold_diacritics(word) for word in changed}
+    existed = {folded for folded in folded_forms if conn.execute(f"SELECT 1 FROM {schema}.spell_words WHERE folded = ? LIMIT 1", (folded,)).fetchone()}
+
+    for word, diff in changed.items():
+        folded = fold_diacritics(word)
+        conn.execute(f"UPDATE {schema}.spell_words SET count = count + ? WHERE folded = ? AND word = ?", (diff, folded, word))
+        if conn.execute("SELECT changes()").fetchone()[0] == 0:
+            conn.execute(f"INSERT INTO {schema}.spell_words VALUES (?, ?, ?)", (folded, word, diff))
+    conn.execute(f"DELETE FROM {schema}.spell_words WHERE count <= 0")
+
+    delete_count = 0
+    for folded in sorted(folded_forms):
+        present = conn.execute(f"SELECT 1 FROM {schema}.spell_words WHERE folded = ? LIMIT 1", (folded,)).fetchone() is not None
+        if present and folded not in existed:
+            rows = [(variant, folded) for variant in delete_variants(folded, word_max_distance(folded))]
+            conn.executemany(f"INSERT INTO {schema}.spell_deletes VALUES (?, ?)", rows)
+            delete_count += len(rows)
+        elif not present and folded in existed:
+            delete_count += conn.execute(f"DELETE FROM {schema}.spell_deletes WHERE folded = ?", (folded,)).rowcount
+    return len(changed), delete_count
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Khoảng cách Damerau-Levenshtein (optimal string alignment): chèn, xoá, thay, đổi chỗ hai ký tự kề nhau."""
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def spell_lookup_query(variant_count: int) -> str:
+    """Câu query tra ứng viên theo biến thể xoá (giống ContentLoader.suggestCorrection)."""
+    placeholders = ", ".join("?" * variant_count)
+    return f"""SELECT DISTINCT w.word, w.folded, w.count
+               FROM spell_deletes d
+               JOIN spell_words w ON w.folded = d.folded
+               WHERE d.variant IN ({placeholders})"""
+
+
+def suggest_words(conn: sqlite3.Connection, word: str, max_distance: int = SPELL_MAX_DISTANCE, limit: int = 5) -> List[Suggestion]:
+    """
+    Gợi ý sửa chính tả cho một từ: sinh biến thể xoá của từ nhập (đã bỏ dấu) rồi tra bảng spell_deletes,
+    chỉ tính khoảng cách trên vài ứng viên trả về. Sắp theo khoảng cách (bỏ dấu), độ lệch dấu, tần suất.
+    """
+    folded = fold_diacritics(word)
+    if len(folded) < MIN_WORD_LENGTH:
+        return []
+    max_distance = word_max_distance(folded, max_distance)
+    variants = sorted(delete_variants(folded, max_distance))
+    candidates = conn.execute(spell_lookup_query(len(variants)), variants).fetchall()
+    ranked = []
+    for candidate, candidate_folded, count in candidates:
+        distance = edit_distance(folded, candidate_folded)
+        if distance <= word_max_distance(candidate_folded, max_distance):
+            ranked.append((distance, edit_distance(word.lower(), candidate), -count, candidate))
+    ranked.sort()
+    return [Suggestion(candidate, distance, -count) for distance, _, count, candidate in ranked[:limit]]
+
+
+def correct_query(spell_conn: sqlite3.Connection, content_conn: sqlite3.Connection, keyword: str, max_distance: int = SPELL_MAX_DISTANCE) -> Optional[str]:
+    """
+    Sửa từ khoá: mỗi từ lấy vài gợi ý tốt nhất (từ đúng chính tả đứng đầu vì khoảng cách 0), chọn tổ hợp đầu tiên
+    có xuất hiện thành cụm trong contents_fts (của content_conn), nếu không có thì lấy tổ hợp đứng đầu. None nếu không sửa được gì.
+    """
+    tokens = keyword.lower().split()
+    if not tokens:
+        return None
+    options: List[List[str]] = []
+    for token in tokens:
+        words = [suggestion.word for suggestion in suggest_words(spell_conn, token, max_distance, limit=PHRASE_CANDIDATES)]
+        options.append(words or [token])
+    best = [words[0] for words in options]
+    if len(tokens) > 1 and len(tokens) <= MAX_PHRASE_TOKENS:
+        for phrase in product(*options):
+            match = '"' + " ".join(phrase).replace('"', "") + '"'
+            if content_conn.execute("SELECT 1 FROM contents_fts WHERE contents_fts MATCH ? LIMIT 1", (match,)).fetchone():
+                best = list(phrase)
+                break
+    return " ".join(best) if best != tokens else None
@@ -0,0 +1,107 @@
+# Path: src/data_builder/telemetry.py
+import json
+import math
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["Telemetry", "percentile", "write_build_report"]
+
+R = TypeVar("R")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile theo nearest-rank trên danh sách đã sắp xếp."""
+    if not values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(values))
+    return values[min(len(values), max(rank, 1)) - 1]
+
+
+class Telemetry:
+    """
+    Thu thập số liệu của một lần build: thời gian (wall/CPU) theo bước, bộ đếm, độ trễ và kích thước file.
+    Các phương thức ghi an toàn khi gọi từ nhiều luồng (hàng đợi TTS).
+    CPU là của cả tiến trình (time.process_time, gồm mọi luồng chạy cùng lúc, VD: hàng đợi TTS), không phải riêng luồng đo,
+    nên được báo cáo là process_cpu_ms.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.sizes: Dict[str, int] = {}
+
+    def add_time(self, name: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += wall
+            stage[2] += cpu
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Đo thời gian wall/CPU tiến trình của một khối lệnh (cộng dồn nếu chạy nhiều lần)."""
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+    def timed(self, name: str, func: Callable[..., R], *args: Any) -> R:
+        """Gọi func(*args) và cộng dồn thời gian vào bước `name` (nhẹ hơn context manager, dùng trong vòng lặp nóng)."""
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = func(*args)
+        self.add_time(name, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+        return result
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def record_size(self, name: str, path: str) -> None:
+        if os.path.exists(path):
+            with self._lock:
+                self.sizes[name] = os.path.getsize(path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies: Dict[str, Dict[str, float]] = {}
+        for name, values in self.latencies.items():
+            ordered = sorted(values)
+            latencies[name] = {
+                "count": len(ordered),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p90_ms": round(percentile(ordered, 90) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return {
+            "stages": {
+                name: {"calls": int(calls), "wall_ms": round(wall * 1000, 3), "process_cpu_ms": round(cpu * 1000, 3)}
+                for name, (calls, wall, cpu) in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "latencies": latencies,
+            "sizes": dict(self.sizes),
+        }
+
+
+def write_build_report(report_path: str, report: Dict[str, Any]) -> None:
+    """Ghi báo cáo build dạng JSON (ghi file tạm rồi thay thế)."""
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    temp_path = report_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, report_path)
+    logger.info(f"📊 Đã ghi báo cáo build tại: {report_path}")
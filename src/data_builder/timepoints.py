@@ -0,0 +1,113 @@
+# Path: src/data_builder/timepoints.py
+import html
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "TIMEPOINTS_DIR",
+    "voice_supports_marks",
+    "marked_ssml",
+    "marks_path",
+    "save_marks",
+    "load_marks",
+    "estimate_word_times",
+    "segment_timepoints",
+    "encode_timepoints",
+    "decode_timepoints",
+]
+
+# Thư mục con trong cache audio-tmp chứa mốc thời gian trả về từ API (--clean xoá file của audio không còn dùng)
+TIMEPOINTS_DIR = "timepoints"
+# Tốc độ đọc danh nghĩa khi chưa biết thời lượng audio (ms cho mỗi ký tự)
+MS_PER_CHAR = 65
+# Trọng số khoảng ngừng sau dấu câu (tính như số ký tự)
+PAUSE_WEIGHTS: Dict[str, int] = {",": 2, ";": 3, ":": 3, ".": 5, "?": 5, "!": 5}
+
+WORD_PATTERN = re.compile(r"\S+")
+
+Timepoint = Tuple[int, int]
+
+
+def voice_supports_marks(voice: str) -> bool:
+    """Giọng Chirp 3 HD không hỗ trợ SSML <mark>, các giọng Standard/Wavenet/Neural2 thì có."""
+    return "Chirp" not in voice
+
+
+def marked_ssml(text: str) -> str:
+    """SSML với một <mark name="i"/> trước mỗi từ (i là chỉ số từ trong văn bản TTS)."""
+    words = WORD_PATTERN.findall(text)
+    return "<speak>" + " ".join(f'<mark name="{i}"/>{html.escape(word)}' for i, word in enumerate(words)) + "</speak>"
+
+
+def marks_path(tmp_dir: str, audio_name: str) -> str:
+    return os.path.join(tmp_dir, TIMEPOINTS_DIR, os.path.splitext(audio_name)[0] + ".json")
+
+
+def save_marks(path: str, timepoints: Sequence[Dict[str, Any]]) -> None:
+    """Lưu mốc thời gian (ms) theo chỉ số từ từ response `timepoints` của Google TTS (v1beta1)."""
+    marks = sorted((int(tp["markName"]), round(float(tp.get("timeSeconds", 0)) * 1000)) for tp in timepoints)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([ms for _, ms in marks], f)
+
+
+def load_marks(path: str) -> Optional[List[int]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [int(ms) for ms in json.load(f)] or None
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def estimate_word_times(text: str, duration_ms: Optional[int] = None) -> List[int]:
+    """
+    Mốc bắt đầu (ms) của từng từ khi không có mốc từ API: thời lượng được chia theo độ dài từ,
+    cộng thêm khoảng ngừng sau dấu câu. Tất định: cùng văn bản + thời lượng luôn cho cùng kết quả.
+    """
+    words = WORD_PATTERN.findall(text)
+    weights = [len(word) + PAUSE_WEIGHTS.get(word[-1], 0) for word in words]
+    total = sum(weights)
+    unit = duration_ms / total if duration_ms and total else MS_PER_CHAR
+    times: List[int] = []
+    elapsed = 0
+    for weight in weights:
+        times.append(round(elapsed * unit))
+        elapsed += weight
+    return times
+
+
+def segment_timepoints(segment_text: str, duration_ms: Optional[int] = None, marks: Optional[List[int]] = None) -> List[Timepoint]:
+    """
+    Các cặp (vị trí ký tự của từ trong contents.segment, ms). Mốc từ API đánh theo từ của văn bản TTS
+    (đã áp dụng quy tắc phát âm), nên khi số từ khác nhau thì từ thứ i được ánh xạ tỉ lệ sang mốc tương ứng.
+    """
+    offsets = [match.start() for match in WORD_PATTERN.finditer(segment_text)]
+    if not offsets:
+        return []
+    if not marks:
+        return list(zip(offsets, estimate_word_times(segment_text, duration_ms)))
+    return [(offset, marks[i * len(marks) // len(offsets)]) for i, offset in enumerate(offsets)]
+
+
+def encode_timepoints(points: Sequence[Timepoint]) -> str:
+    """Mã hoá gọn: các cặp chênh lệch "ký tự:ms" so với mốc trước, VD: "0:0,4:260,6:390"."""
+    parts: List[str] = []
+    prev_offset = prev_ms = 0
+    for offset, ms in points:
+        parts.append(f"{offset - prev_offset}:{ms - prev_ms}")
+        prev_offset, prev_ms = offset, ms
+    return ",".join(parts)
+
+
+def decode_timepoints(value: str) -> List[Timepoint]:
+    points: List[Timepoint] = []
+    offset = ms = 0
+    for part in filter(None, value.split(",")):
+        delta_offset, delta_ms = part.split(":")
+        offset, ms = offset + int(delta_offset), ms + int(delta_ms)
+        points.append((offset, ms))
+    return points
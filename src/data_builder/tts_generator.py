@@ -7,31 +7,90 @@ import base64
 import logging
 import re
 import json
-from typing import Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.config.constants import DEFAULT_TTS_VOICE
+from src.data_builder.audio_chunks import CHUNKS_DIR, ChunkOptions, chunk_manifest_path, composite_audio_name, save_chunk_manifest, split_chunks
+from src.data_builder.audio_profiles import DEFAULT_AUDIO_PROFILE, AudioProfile, profile_audio_name
+from src.data_builder.mp3_frames import TrimOptions, concat_mp3, mp3_duration_ms, trim_audio_file, trimmed_audio_name
+from src.data_builder.timepoints import TIMEPOINTS_DIR, load_marks, marked_ssml, marks_path, save_marks, voice_supports_marks
+from src.data_builder.telemetry import Telemetry
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["TTSGenerator"]
+__all__ = ["TTSGenerator", "TTSJob", "TTS_RULES_PATH"]
+
+# Quy tắc tiền xử lý văn bản dùng chung với Frontend
+TTS_RULES_PATH = "web/public/app-content/tts_rules.json"
+
+# Số request song song tối đa tới Google TTS API
+DEFAULT_TTS_WORKERS = 4
+
+
+class TTSJob(NamedTuple):
+    """
+    Một yêu cầu tổng hợp giọng nói: văn bản đã chuẩn hoá, giọng đọc, profile mã hoá và tên file cache tương ứng.
+    Job có chunks là audio ghép: từng chunk được sinh và cache riêng, file của job được ghép lại từ các chunk.
+    """
+    text: str
+    filename: str
+    voice: str = DEFAULT_TTS_VOICE
+    profile: AudioProfile = DEFAULT_AUDIO_PROFILE
+    chunks: Tuple["TTSJob", ...] = ()
+
+
+def voice_language_code(voice_name: str) -> str:
+    """Lấy mã ngôn ngữ từ tên giọng (VD: vi-VN-Chirp3-HD-Charon -> vi-VN)."""
+    return "-".join(voice_name.split("-")[:2])
+
 
 class TTSGenerator:
-    def __init__(self, output_dir: str, tmp_dir: str):
+    def __init__(
+        self,
+        output_dir: str,
+        tmp_dir: str,
+        offline: bool = False,
+        voices: Optional[List[str]] = None,
+        telemetry: Optional[Telemetry] = None,
+        profiles: Optional[List[AudioProfile]] = None,
+        trim: Optional[TrimOptions] = None,
+        timepoints: bool = False,
+        chunking: Optional[ChunkOptions] = None,
+    ):
         self.output_dir = output_dir
         self.tmp_dir = tmp_dir
+        # offline=True: chỉ dùng audio đã có trong cache, không gọi API (audio đã được sinh ở bước trước)
+        self.offline = offline
         self.api_key = os.getenv("GOOGLE_TTS_API_KEY")
-        self.voice_name = "vi-VN-Chirp3-HD-Charon"
-        self.language_code = "vi-VN"
+        # Giọng đầu tiên là giọng chính (cột contents.audio_name), các giọng sau được xuất bản kèm theo
+        self.voices: List[str] = list(voices) if voices else [DEFAULT_TTS_VOICE]
+        self.voice_name = self.voices[0]
+        self.language_code = voice_language_code(self.voice_name)
+        # Profile đầu tiên là profile chính (audio của web app), các profile sau chỉ dùng cho gói audio riêng
+        self.profiles: List[AudioProfile] = list(profiles) if profiles else [DEFAULT_AUDIO_PROFILE]
+        # trim: cắt khoảng lặng đầu/cuối của audio MP3 (bản đã cắt nằm cạnh bản gốc trong cache)
+        self.trim: Optional[TrimOptions] = trim
+        # timepoints: gọi API với SSML <mark> để lấy mốc thời gian từng từ (với giọng hỗ trợ)
+        self.timepoints = timepoints
+        # chunking: chia segment dài tại ranh giới câu/mệnh đề, mỗi chunk sinh và cache riêng (dùng chung giữa các segment)
+        self.chunking: Optional[ChunkOptions] = chunking
         
         self.tts_rules: Dict[str, Any] = {}
+        # Các file audio đã được lập kế hoạch nhưng chưa có trong cache (build lại khi chúng xuất hiện)
+        self.missing: Set[str] = set()
+        # Độ trễ/kích thước các lần gọi API và tỉ lệ trúng cache audio
+        self.telemetry = telemetry or Telemetry()
         
         self._load_rules()
         self._prepare_directories()
 
     def _load_rules(self) -> None:
         """Đọc quy tắc tiền xử lý Text từ file JSON dùng chung."""
-        rules_path = "web/public/app-content/tts_rules.json"
-        if os.path.exists(rules_path):
+        if os.path.exists(TTS_RULES_PATH):
             try:
-                with open(rules_path, 'r', encoding='utf-8') as f:
+                with open(TTS_RULES_PATH, 'r', encoding='utf-8') as f:
                     self.tts_rules = json.load(f)
                 logger.info("Đã tải tts_rules.json thành công.")
             except Exception as e:
@@ -42,34 +101,54 @@ class TTSGenerator:
         os.makedirs(self.tmp_dir, exist_ok=True)
         # Không cần tạo output_dir nữa vì ta nhúng thẳng vào DB
 
-    def _get_hash(self, text: str) -> str:
+    def _get_hash(self, text: str, voice_name: Optional[str] = None) -> str:
         """Tạo mã băm SHA-256 bao gồm cả nội dung và cấu hình giọng đọc."""
-        raw_data = f"{text}|{self.voice_name}|{self.language_code}"
+        voice_name = voice_name or self.voice_name
+        raw_data = f"{text}|{voice_name}|{voice_language_code(voice_name)}"
         return hashlib.sha256(raw_data.encode('utf-8')).hexdigest()
 
-    def _fetch_audio_from_api(self, text: str, output_filepath: str) -> bool:
+    def _fetch_audio_from_api(
+        self, text: str, output_filepath: str, voice_name: Optional[str] = None, profile: AudioProfile = DEFAULT_AUDIO_PROFILE
+    ) -> bool:
         """Gọi API Google TTS và lưu file."""
         if not self.api_key:
             logger.warning("⚠️ Thiếu GOOGLE_TTS_API_KEY. Bỏ qua tạo audio từ API.")
             return False
 
-        url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={self.api_key}"
+        voice_name = voice_name or self.voice_name
+        use_marks = self.timepoints and voice_supports_marks(voice_name)
+        # Mốc thời gian (enableTimePointing) chỉ có ở API v1beta1
+        api_version = "v1beta1" if use_marks else "v1"
+        url = f"https://texttospeech.googleapis.com/{api_version}/text:synthesize?key={self.api_key}"
         payload: Dict[str, Any] = {
-            "input": {"text": text},
-            "voice": {"languageCode": self.language_code, "name": self.voice_name},
-            "audioConfig": {"audioEncoding": "MP3"}
+            "input": {"ssml": marked_ssml(text)} if use_marks else {"text": text},
+            "voice": {"languageCode": voice_language_code(voice_name), "name": voice_name},
+            "audioConfig": profile.audio_config()
         }
+        if use_marks:
+            payload["enableTimePointing"] = ["SSML_MARK"]
 
+        started = time.perf_counter()
         try:
             response = requests.post(url, json=payload)
             response.raise_for_status()
-            content: Optional[str] = response.json().get('audioContent')
+            body: Dict[str, Any] = response.json()
+            content: Optional[str] = body.get('audioContent')
             if content:
+                audio_bytes = base64.b64decode(content)
                 with open(output_filepath, 'wb') as f:
-                    f.write(base64.b64decode(content))
+                    f.write(audio_bytes)
+                if use_marks:
+                    # Lưu cả khi API không trả mốc nào: file mốc đánh dấu audio đã được sinh ở chế độ có <mark>
+                    save_marks(marks_path(self.tmp_dir, os.path.basename(output_filepath)), body.get('timepoints') or [])
+                self.telemetry.count("tts.api_bytes", len(audio_bytes))
                 return True
         except Exception as e:
             logger.error(f"❌ Lỗi sinh audio cho '{text[:30]}...': {e}")
+            self.telemetry.count("tts.api_errors")
+        finally:
+            self.telemetry.observe("tts.api", time.perf_counter() - started)
+            self.telemetry.count("tts.api_calls")
         return False
 
     def _apply_tts_rules(self, text: str) -> str:
@@ -99,40 +178,207 @@ class TTSGenerator:
             
         return text
 
-    def process_segment(self, segment_text: str, html: str = "", label: str = "") -> str:
-        """Xử lý đoạn văn, trả về tên file MP3 (hash) hoặc 'skip'."""
+    def plan_segment(self, segment_text: str, html: str = "", label: str = "") -> List[TTSJob]:
+        """
+        Chuẩn hoá văn bản (một lần) và tính tên file audio cho từng giọng đọc.
+        Trả về danh sách rỗng nếu segment không cần audio.
+        """
         # Logic skip dựa trên label và html structure
         if not segment_text.strip() or label.startswith("note") or label.endswith("-name") or label in ["title", "subtitle"] or html.startswith("<h"):
-            return "skip"
+            return []
 
         # 1. Áp dụng toàn bộ quy tắc động từ file JSON
         tts_text = self._apply_tts_rules(segment_text)
 
         if not tts_text:
-            return "skip"
+            return []
 
-        # 2. Sinh Hash (chỉ dùng hash làm tên file)
-        text_hash = self._get_hash(tts_text)[:16]
-        filename = f"{text_hash}.mp3"
-        
-        tmp_filepath = os.path.join(self.tmp_dir, filename)
-
-        # 3. Kiểm tra cache/tồn tại
-        if os.path.exists(tmp_filepath):
-             # Đã có trong cache, không làm gì cả
-             pass
-        else:
-            # 4. Gọi API với bản text sạch
-            if self._fetch_audio_from_api(tts_text, tmp_filepath):
-                logger.debug(f"✅ Đã tạo mới Audio: {filename}")
+        # 2. Sinh Hash cho từng giọng (chỉ dùng hash làm tên file, profile mặc định giữ nguyên tên cũ)
+        profile = self.profiles[0]
+        chunk_texts = split_chunks(tts_text, self.chunking) if self.chunking and profile.encoding == "MP3" else [tts_text]
+        jobs: List[TTSJob] = []
+        for voice in self.voices:
+            if len(chunk_texts) > 1:
+                # Audio ghép theo ranh giới frame MP3: tên file suy ra từ danh sách chunk
+                chunks = tuple(self._plan_job(text, voice, profile) for text in chunk_texts)
+                jobs.append(TTSJob(tts_text, composite_audio_name([chunk.filename for chunk in chunks]), voice, profile, chunks))
+            else:
+                jobs.append(self._plan_job(tts_text, voice, profile))
+        return jobs
+
+    def _plan_job(self, tts_text: str, voice: str, profile: AudioProfile) -> TTSJob:
+        return TTSJob(tts_text, profile_audio_name(f"{self._get_hash(tts_text, voice)[:16]}.mp3", profile), voice, profile)
+
+    def plan_segment_profiles(self, segment_text: str, html: str = "", label: str = "") -> List[TTSJob]:
+        """
+        Như plan_segment, kèm thêm job cho các profile phụ (tên file suy ra từ tên file của profile chính).
+        Profile phụ luôn sinh nguyên segment (chỉ MP3 mới ghép được theo frame).
+        """
+        jobs = self.plan_segment(segment_text, html, label)
+        return jobs + [
+            job._replace(filename=profile_audio_name(job.filename, profile), profile=profile, chunks=())
+            for profile in self.profiles[1:]
+            for job in jobs
+        ]
+
+    def is_cached(self, filename: str) -> bool:
+        return os.path.exists(os.path.join(self.tmp_dir, filename))
+
+    def needs_marks(self, job: TTSJob) -> bool:
+        """
+        Có bật timepoints, giọng hỗ trợ <mark> nhưng audio chưa từng được sinh kèm mốc (VD: sinh trước khi bật --timepoints):
+        tên audio không phụ thuộc chế độ nên phải gọi lại API. Audio ghép cần mốc khi chính nó hoặc một chunk chưa có.
+        """
+        if not self.timepoints or not voice_supports_marks(job.voice):
+            return False
+        if any(self.needs_marks(chunk) for chunk in job.chunks):
+            return True
+        return not os.path.exists(marks_path(self.tmp_dir, job.filename))
+
+    def is_pending(self, job: TTSJob) -> bool:
+        """Job cần sinh (lại): audio chưa có trong cache, hoặc còn thiếu mốc thời gian (needs_marks)."""
+        return not self.is_cached(job.filename) or self.needs_marks(job)
+
+    def synthesize(self, job: TTSJob) -> bool:
+        """Đảm bảo audio của job có trong cache, gọi API nếu cần (và nếu không ở chế độ offline)."""
+        tmp_filepath = os.path.join(self.tmp_dir, job.filename)
+
+        # Kiểm tra cache/tồn tại (audio thiếu mốc thời gian được sinh lại, trừ ở chế độ offline)
+        refresh_marks = not self.offline and os.path.exists(tmp_filepath) and self.needs_marks(job)
+        if os.path.exists(tmp_filepath) and not refresh_marks:
+            self.telemetry.count("tts.cache_hit")
+            return True
+        if job.chunks:
+            # Audio ghép: chỉ cần các chunk có sẵn (hoặc sinh được), việc ghép không gọi API
+            if not all([self.synthesize(chunk) for chunk in job.chunks]):
+                return False
+            return self._assemble(job)
+        self.telemetry.count("tts.cache_miss")
+        if self.offline:
+            return False
+
+        # Gọi API với bản text sạch
+        if self._fetch_audio_from_api(job.text, tmp_filepath, job.voice, job.profile):
+            logger.debug(f"✅ Đã tạo mới Audio: {job.filename}")
+            return True
+        # Không lấy lại được mốc thời gian: vẫn dùng audio đã có (mốc sẽ được ước lượng)
+        return refresh_marks
+
+    def synthesize_jobs(self, jobs: Iterable[TTSJob], max_workers: int = DEFAULT_TTS_WORKERS) -> int:
+        """
+        Hàng đợi TTS dùng chung: loại trùng theo tên file (cùng văn bản chỉ sinh một lần),
+        bỏ qua file đã có và gọi API song song cho phần còn lại. Trả về số file sinh thành công.
+        """
+        pending: Dict[str, TTSJob] = {}
+        composites: Dict[str, TTSJob] = {}
+        for job in jobs:
+            if not self.is_pending(job):
+                continue
+            if job.chunks:
+                # Chunk dùng chung giữa các segment cũng được loại trùng như audio thường
+                composites.setdefault(job.filename, job)
+                for chunk in job.chunks:
+                    if chunk.filename not in pending and self.is_pending(chunk):
+                        pending[chunk.filename] = chunk
+            elif job.filename not in pending:
+                pending[job.filename] = job
+
+        if not pending and not composites:
+            return 0
+
+        results: List[bool] = []
+        if pending:
+            logger.info(f"🎙️  Đang sinh {len(pending)} audio mới (song song {max_workers} luồng)...")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self.synthesize, pending.values()))
+        # Ghép audio của các segment đã chia chunk (sau khi mọi chunk đã có trong cache)
+        assembled = [self.synthesize(job) for job in composites.values()]
+
+        created = sum(results) + sum(assembled)
+        total = len(results) + len(assembled)
+        if created < total:
+            logger.warning(f"⚠️ Không sinh được {total - created}/{total} audio.")
+        return created
+
+    def _assemble(self, job: TTSJob) -> bool:
+        """
+        Ghép audio của job từ các chunk trong cache (theo ranh giới frame MP3) và lưu danh sách chunk cạnh cache.
+        Nếu mọi chunk có mốc thời gian từ API thì mốc của audio ghép là mốc các chunk cộng dồn thời lượng.
+        """
+        parts: List[bytes] = []
+        for chunk in job.chunks:
+            with open(os.path.join(self.tmp_dir, chunk.filename), "rb") as f:
+                parts.append(f.read())
+        data = concat_mp3(parts)
+        if data is None:
+            logger.warning(f"⚠️ Không ghép được audio {job.filename} (chunk không phải MP3).")
+            return False
+
+        output_filepath = os.path.join(self.tmp_dir, job.filename)
+        temp_path = output_filepath + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, output_filepath)
+        save_chunk_manifest(chunk_manifest_path(self.tmp_dir, job.filename), [chunk.filename for chunk in job.chunks])
+
+        chunk_marks = [load_marks(marks_path(self.tmp_dir, chunk.filename)) for chunk in job.chunks]
+        if all(chunk_marks):
+            marks: List[int] = []
+            offset = 0
+            for part, part_marks in zip(parts, chunk_marks):
+                marks.extend(offset + ms for ms in part_marks or [])
+                offset += mp3_duration_ms(part) or 0
+            save_marks(marks_path(self.tmp_dir, job.filename), [{"markName": i, "timeSeconds": ms / 1000} for i, ms in enumerate(marks)])
+        elif self.needs_marks(job._replace(chunks=())):
+            # Chunk không có mốc từ API: ghi nhận đã thử để không gọi lại ở lần build sau (mốc được ước lượng)
+            save_marks(marks_path(self.tmp_dir, job.filename), [])
+        self.telemetry.count("audio.chunks.assembled")
+        return True
+
+    def process_segment_voices(self, segment_text: str, html: str = "", label: str = "") -> List[str]:
+        """Xử lý đoạn văn cho mọi giọng đọc, trả về tên file MP3 (hash) hoặc 'skip' theo thứ tự self.voices."""
+        jobs = self.plan_segment(segment_text, html, label)
+        if not jobs:
+            return ["skip"] * len(self.voices)
+
+        # Nếu lỗi API (hoặc thiếu file ở chế độ offline), trả về skip
+        names: List[str] = []
+        for job in jobs:
+            if self.synthesize(job):
+                names.append(self.trimmed(job) if self.trim else job.filename)
             else:
-                # Nếu lỗi API, trả về skip
-                return "skip"
+                self.missing.add(job.filename)
+                names.append("skip")
+        return names
+
+    def trimmed(self, job: TTSJob) -> str:
+        """
+        Tên audio đã cắt khoảng lặng của một job có sẵn trong cache; bản cắt được tạo một lần và cache theo
+        hash nguồn + tham số cắt. Giữ tên gốc nếu không cắt được (không phải MP3).
+        """
+        if not self.trim or job.profile.encoding != "MP3":
+            return job.filename
+        trimmed_name = trimmed_audio_name(job.filename, self.trim)
+        trimmed_path = os.path.join(self.tmp_dir, trimmed_name)
+        if os.path.exists(trimmed_path):
+            self.telemetry.count("audio.trim.cache_hit")
+            return trimmed_name
+        saved = trim_audio_file(os.path.join(self.tmp_dir, job.filename), trimmed_path, self.trim)
+        if saved is None:
+            return job.filename
+        self.telemetry.count("audio.trim.created")
+        self.telemetry.count("audio.trim.saved_bytes", saved)
+        return trimmed_name
 
-        return filename
+    def process_segment(self, segment_text: str, html: str = "", label: str = "") -> str:
+        """Xử lý đoạn văn, trả về tên file MP3 (hash) của giọng chính hoặc 'skip'."""
+        return self.process_segment_voices(segment_text, html, label)[0]
 
     def get_garbage_files(self, active_filenames: list[str]) -> list[str]:
-        """Trả về danh sách các file trong thư mục cache không được sử dụng."""
+        """
+        Trả về danh sách các file trong thư mục cache không được sử dụng, kể cả danh sách chunk (chunks/)
+        và mốc thời gian (timepoints/) của audio không còn dùng (đường dẫn tương đối với tmp_dir).
+        """
         if not os.path.exists(self.tmp_dir):
             return []
             
@@ -147,6 +393,17 @@ class TTSGenerator:
             if os.path.isfile(file_path) and not f.startswith('.'):
                 if f not in active_set:
                     garbage_files.append(f)
+
+        # File phụ trong thư mục con được đặt tên theo audio (<tên audio không đuôi>.json)
+        active_stems = {os.path.splitext(name)[0] for name in active_set}
+        for sub_dir in (CHUNKS_DIR, TIMEPOINTS_DIR):
+            dir_path = os.path.join(self.tmp_dir, sub_dir)
+            if not os.path.isdir(dir_path):
+                continue
+            for f in sorted(os.listdir(dir_path)):
+                if os.path.isfile(os.path.join(dir_path, f)) and not f.startswith('.'):
+                    if os.path.splitext(f)[0] not in active_stems:
+                        garbage_files.append(os.path.join(sub_dir, f))
                     
         return garbage_files
 
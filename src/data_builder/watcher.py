@@ -0,0 +1,279 @@
+# Path: src/data_builder/watcher.py
+import csv
+import logging
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from src.data_builder.audio_chunks import DEFAULT_CHUNKING
+from src.data_builder.build_graph import BuildGraph
+from src.data_builder.corpus_builder import (
+    assets_fingerprint, build_corpora, content_fingerprint, corpus_audio_dir, corpus_db_path, corpus_state_path, published_fingerprint,
+)
+from src.data_builder.models import CorpusConfig
+from src.data_builder.mp3_frames import DEFAULT_TRIM
+from src.data_builder.processors import ProcessorCheckpoint, TsvContentProcessor
+from src.data_builder.processors.base import strip_html_tags, clean_brackets
+from src.data_builder.records import SegmentRecord, RuleRecord, HeadingRecord
+from src.data_builder.row_cache import RowCache
+from src.data_builder.tts_generator import TTSGenerator, TTS_RULES_PATH
+from src.data_builder.writer import DataWriter
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CorpusWatcher", "watch_corpora"]
+
+# Chu kỳ kiểm tra thay đổi file nguồn (giây)
+WATCH_INTERVAL = 0.3
+
+SourceRow = Tuple[str, str, str]
+
+
+def _stat_signature(paths: Sequence[str]) -> Tuple[Tuple[int, int], ...]:
+    signature: List[Tuple[int, int]] = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append((-1, -1))
+    return tuple(signature)
+
+
+def _common_prefix(rows: Sequence[SourceRow], previous: Sequence[SourceRow]) -> int:
+    count = 0
+    for row, old in zip(rows, previous):
+        if row != old:
+            break
+        count += 1
+    return count
+
+
+def _common_suffix(rows: Sequence[SourceRow], previous: Sequence[SourceRow]) -> int:
+    return _common_prefix(rows[::-1], previous[::-1])
+
+
+class CorpusWatcher:
+    """
+    Giữ trạng thái build của một corpus trong bộ nhớ (bộ xử lý, bộ chuẩn hoá TTS, Row Cache, bản chụp các dòng,
+    checkpoint trạng thái bộ xử lý trước từng dòng) để mỗi lần file nguồn thay đổi chỉ xử lý lại
+    từ dòng đầu tiên bị sửa, sinh audio và ghi DB/TSV cho các dòng bị ảnh hưởng.
+    """
+
+    def __init__(self, corpus: CorpusConfig, audio_tmp_dir: str, cache_dir: Optional[str] = None, state_dir: Optional[str] = None) -> None:
+        self.corpus = corpus
+        self.audio_tmp_dir = audio_tmp_dir
+        self.cache_dir = cache_dir
+        self.state_dir = state_dir
+        self.watched_paths = [corpus.source, corpus.rule_groups, TTS_RULES_PATH]
+
+        # Render chỉ dùng audio có sẵn; audio mới của các dòng thay đổi được sinh riêng qua synth_tts
+        profiles = corpus.resolved_audio_profiles()
+        chunking = DEFAULT_CHUNKING if corpus.chunk_audio else None
+        self.tts = TTSGenerator(
+            corpus_audio_dir(corpus), audio_tmp_dir, offline=True, voices=corpus.voices, profiles=profiles,
+            trim=DEFAULT_TRIM if corpus.trim_silence else None, chunking=chunking
+        )
+        self.synth_tts = TTSGenerator(
+            corpus_audio_dir(corpus), audio_tmp_dir, voices=corpus.voices, profiles=profiles, timepoints=corpus.timepoints,
+            chunking=chunking
+        )
+        self.row_cache = RowCache(os.path.join(cache_dir, f"row_cache_{corpus.id}.db"), rule_groups_path=corpus.rule_groups) if cache_dir else None
+        self.processor = TsvContentProcessor(self.tts, corpus.rule_groups, row_cache=self.row_cache)
+        self.writer = DataWriter(
+            corpus.tsv_out, corpus_db_path(corpus), audio_tmp_dir, corpus_audio_dir(corpus),
+            voices=corpus.voices, db_layout=corpus.db_layout, audio_profiles=profiles, timepoints=corpus.timepoints
+        )
+
+        self.signature: Tuple[Tuple[int, int], ...] = ()
+        self.source_rows: List[SourceRow] = []
+        # records[i] là segment uid i + 1; checkpoints[i] là trạng thái bộ xử lý trước dòng i (phần tử cuối: sau dòng cuối)
+        self.records: List[SegmentRecord] = []
+        self.checkpoints: List[ProcessorCheckpoint] = []
+        self.rules: List[RuleRecord] = []
+        self.headings: List[HeadingRecord] = []
+
+    def start(self, build: bool = True) -> None:
+        """
+        Build đầy đủ như `gioibon data` (lập kế hoạch & sinh audio còn thiếu, bỏ qua các bước đã cập nhật)
+        rồi nạp bản chụp ban đầu vào bộ nhớ. build=False khi các corpus đã được build chung (watch_corpora).
+        """
+        if build:
+            build_corpora([self.corpus], self.audio_tmp_dir, self.cache_dir, state_dir=self.state_dir)
+        self.signature = _stat_signature(self.watched_paths)
+        self.source_rows = self._read_source_rows()
+        self.processor.reset()
+        self.tts.missing.clear()
+        self.records, self.checkpoints, _ = self._render(self.source_rows, 0)
+        self.rules, self.headings = list(self.processor.iter_rules()), list(self.processor.iter_headings())
+        self._flush_cache()
+        logger.info(f"👀 [{self.corpus.id}] Đang theo dõi {self.corpus.source}...")
+
+    def poll(self) -> bool:
+        """Kiểm tra file nguồn, build lại phần thay đổi nếu có. Trả về True nếu đã build lại."""
+        signature = _stat_signature(self.watched_paths)
+        if signature == self.signature:
+            return False
+        rule_groups_changed = signature[1] != self.signature[1]
+        tts_rules_changed = signature[2] != self.signature[2]
+        self.signature = signature
+        try:
+            self.rebuild(tts_rules_changed, rule_groups_changed)
+        except Exception as e:
+            # File nguồn có thể đang được ghi dở: giữ nguyên dữ liệu cũ và chờ lần lưu tiếp theo (xử lý lại từ đầu file)
+            self.checkpoints = []
+            logger.error(f"❌ [{self.corpus.id}] Lỗi khi build lại: {e}")
+        return True
+
+    def rebuild(self, tts_rules_changed: bool = False, rule_groups_changed: bool = False) -> None:
+        """
+        Build lại phần thay đổi. Khi tts_rules.json đổi, văn bản TTS (tên audio) của mọi dòng có thể đổi theo;
+        khi rule_groups.tsv đổi, danh sách rule được nạp lại (và Row Cache đổi fingerprint): cả hai trường hợp đều xử lý lại từ đầu file.
+        """
+        started = time.perf_counter()
+        rows = self._read_source_rows()
+        if tts_rules_changed:
+            self.tts._load_rules()
+            self.synth_tts._load_rules()
+        if rule_groups_changed and self.row_cache:
+            self.row_cache.refresh_fingerprint()
+
+        # 1. Sinh audio cho các dòng nguồn mới/thay đổi (audio của dòng cũ đã nằm sẵn trong cache)
+        previous_rows = set(self.source_rows)
+        changed_rows = [row for row in rows if tts_rules_changed or row not in previous_rows]
+        jobs = [
+            job
+            for html, label, segment in changed_rows
+            for job in self.synth_tts.plan_segment_profiles(strip_html_tags(clean_brackets(segment)), html, label)
+        ]
+        self.synth_tts.synthesize_jobs(jobs)
+
+        # 2. Xử lý lại từ dòng đầu tiên bị sửa, dừng khi trạng thái bộ xử lý khớp lại checkpoint cũ ở phần đuôi không đổi
+        full = tts_rules_changed or rule_groups_changed or not self.checkpoints
+        start = 0 if full else _common_prefix(rows, self.source_rows)
+        if start == len(rows) == len(self.source_rows):
+            logger.info(f"💤 [{self.corpus.id}] Nội dung không thay đổi.")
+            return
+        same_length = not full and len(rows) == len(self.source_rows)
+        converge_from = len(rows) - _common_suffix(rows, self.source_rows) if same_length else len(rows) + 1
+        if start == 0:
+            self.processor.reset()
+        else:
+            self.processor.restore(self.checkpoints[start])
+        rendered, checkpoints, stop = self._render(rows, start, converge_from)
+        reprocessed = len(rendered)
+
+        structure = self.processor.structure_proc
+        if stop is not None:
+            # Phần đuôi giống hệt lần trước: dùng lại record, checkpoint, rule và heading cũ
+            rendered += self.records[stop:]
+            checkpoints += self.checkpoints[stop:]
+            structure.rules.extend(self.rules[self.checkpoints[stop].rule_count:])
+            structure.headings.extend(self.headings[self.checkpoints[stop].heading_count:])
+        records = self.records[:start] + rendered
+        rules, headings = list(structure.rules), list(structure.headings)
+        changed = [record for record in rendered if record.uid > len(self.records) or self.records[record.uid - 1] != record]
+        removed_uids = list(range(len(records) + 1, len(self.records) + 1))
+        rules_changed, headings_changed = rules != self.rules, headings != self.headings
+        self._flush_cache()
+        self.source_rows = rows
+        self.checkpoints = self.checkpoints[:start] + checkpoints
+
+        if not changed and not removed_uids and not rules_changed and not headings_changed:
+            logger.info(f"💤 [{self.corpus.id}] Nội dung không thay đổi.")
+            return
+
+        # 3. Ghi TSV từ dòng đầu tiên thay đổi (cả file nếu xử lý lại từ đầu), cập nhật DB theo delta (trên bản sao tạm, thay thế nguyên tử)
+        self.writer.update_tsv(records, 0 if full else (changed[0].uid - 1 if changed else len(records)))
+        self.writer.update_content(
+            changed,
+            removed_uids,
+            rules if rules_changed else None,
+            headings if headings_changed else None,
+        )
+        self.records, self.rules, self.headings = records, rules, headings
+
+        # 4. Các bước xuất bản như build đầy đủ: version, snapshot, audio, audio manifest, zip (khi danh sách audio đổi), asset manifest
+        previous_audio = self.writer.voice_audio_names
+        self.writer.load_audio_names()
+        self.writer.save_version_file()
+        self.writer.save_snapshot()
+        self.writer.sync_audio_files()
+        self.writer.save_audio_manifest()
+        if self.writer.voice_audio_names != previous_audio:
+            self.writer.zip_audio_bundles()
+        self.writer.publish_assets()
+        self._save_state()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"⚡ [{self.corpus.id}] Xử lý lại {reprocessed} dòng, "
+            f"cập nhật {len(changed)} segment, xoá {len(removed_uids)} segment trong {elapsed_ms:.0f} ms."
+        )
+
+    def close(self) -> None:
+        if self.row_cache:
+            self.row_cache.close()
+
+    def _read_source_rows(self) -> List[SourceRow]:
+        with open(self.corpus.source, 'r', encoding='utf-8') as f:
+            return [(row['html'], row['label'], row['segment']) for row in csv.DictReader(f, delimiter='\t')]
+
+    def _render(
+        self, rows: Sequence[SourceRow], start: int, converge_from: Optional[int] = None
+    ) -> Tuple[List[SegmentRecord], List[ProcessorCheckpoint], Optional[int]]:
+        """
+        Xử lý các dòng từ start (bộ xử lý đang ở trạng thái trước dòng start). Dừng ở dòng i >= converge_from nếu trạng thái
+        trùng checkpoint cũ của dòng đó: mọi dòng từ i trở đi cho kết quả như lần trước.
+        Trả về (record, checkpoint trước từng dòng đã xử lý (kèm trạng thái cuối nếu không dừng), dòng dừng hoặc None).
+        """
+        records: List[SegmentRecord] = []
+        checkpoints = [self.processor.checkpoint()]
+        if converge_from is None:
+            converge_from = len(rows) + 1
+        for i, record in enumerate(self.processor.iter_rows(rows[start:], start + 1), start + 1):
+            records.append(record)
+            checkpoint = self.processor.checkpoint()
+            if i >= converge_from and checkpoint == self.checkpoints[i]:
+                return records, checkpoints, i
+            checkpoints.append(checkpoint)
+        return records, checkpoints, None
+
+    def _flush_cache(self) -> None:
+        if self.row_cache:
+            self.row_cache.flush(prune=False)
+
+    def _save_state(self) -> None:
+        """Cập nhật build state (mọi bước watch đã chạy) để lần `gioibon data` tiếp theo không build lại những gì watch đã làm."""
+        if not self.state_dir:
+            return
+        graph = BuildGraph(corpus_state_path(self.corpus, self.state_dir))
+        input_fingerprint = content_fingerprint(self.corpus)
+        publish_fingerprint = published_fingerprint(self.corpus)
+        graph.record("tsv", input_fingerprint)
+        graph.record("sqlite", input_fingerprint)
+        for stage in ("version", "snapshot", "audio-sync", "audio-manifest", "zip"):
+            graph.record(stage, publish_fingerprint)
+        graph.record("assets", assets_fingerprint(self.corpus, self.writer))
+        graph.set("missing_audio", sorted(name for name in self.tts.missing if not self.tts.is_cached(name)))
+        graph.set("segment_count", self.writer.segment_count)
+        graph.save()
+
+
+def watch_corpora(corpora: Sequence[CorpusConfig], audio_tmp_dir: str, cache_dir: Optional[str] = None, state_dir: Optional[str] = None) -> None:
+    """Vòng lặp watch: build lại phần thay đổi của các corpus mỗi khi file nguồn được lưu (Ctrl+C để dừng)."""
+    watchers = [CorpusWatcher(corpus, audio_tmp_dir, cache_dir, state_dir) for corpus in corpora]
+    try:
+        # Build chung như `gioibon data` (một hàng đợi TTS cho mọi corpus) rồi mới nạp trạng thái của từng watcher
+        build_corpora(corpora, audio_tmp_dir, cache_dir, state_dir=state_dir)
+        for watcher in watchers:
+            watcher.start(build=False)
+        while True:
+            for watcher in watchers:
+                watcher.poll()
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        logger.info("👋 Dừng chế độ watch.")
+    finally:
+        for watcher in watchers:
+            watcher.close()
@@ -1,5 +1,6 @@
 # Path: src/data_builder/writer.py
 import csv
+import io
 import sqlite3
 import os
 import logging
@@ -8,47 +9,516 @@ import time
 import hashlib
 import shutil
 import zipfile
-from typing import List, Optional, Set
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
 
-from src.data_builder.models import SegmentData, RuleData, HeadingData
+from src.config.constants import DEFAULT_TTS_VOICE
+from src.data_builder.audio_chunks import chunk_manifest_path, load_chunk_manifest
+from src.data_builder.audio_manifest import write_audio_manifest
+from src.data_builder.audio_profiles import DEFAULT_AUDIO_PROFILE, AudioProfile, profile_audio_name, profile_bundle_name
+from src.data_builder.asset_publisher import ASSET_MANIFEST_NAME, publish_assets
+from src.data_builder.mp3_frames import mp3_duration_ms, trim_source_name
+from src.data_builder.timepoints import encode_timepoints, load_marks, marks_path, segment_timepoints
+from src.data_builder.db_layout import relayout_for_range_requests, write_page_manifest
+from src.data_builder.spell_index import spell_db_path, update_spell_index, write_spell_db
+from src.data_builder.snapshot import write_snapshot
+from src.data_builder.records import SegmentRecord, RuleRecord, HeadingRecord, CONTENT_COLUMN_COUNT
+from src.data_builder.telemetry import Telemetry
 
 logger = logging.getLogger(__name__)
 
 __all__ = ["DataWriter"]
 
+T = TypeVar("T")
+
+# Số dòng mỗi lần executemany: đủ lớn để nhanh, đủ nhỏ để bộ nhớ không phụ thuộc kích thước corpus
+INSERT_CHUNK_SIZE = 500
+TSV_FIELDNAMES = ["uid", "html", "label", "segment", "audio", "segment_html", "has_hint", "hint_text", "heading_id", "rule_id"]
+HASH_READ_SIZE = 1024 * 1024
+AUDIO_FILES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS audio_files (
+        audio_name TEXT PRIMARY KEY,
+        duration_ms INTEGER,
+        size INTEGER
+    ) WITHOUT ROWID
+"""
+# Bảng tìm kiếm phi chuẩn hoá: segment kèm breadcrumbs & rule, để ContentLoader.searchSegments chỉ đọc
+# search_rows/contents_fts, không join contents -> headings -> rules. Ghi bởi _insert_search_index.
+SEARCH_ROWS_SCHEMA = """
+    CREATE TABLE search_rows (
+        uid INTEGER PRIMARY KEY,
+        segment TEXT,
+        heading_id INTEGER,
+        breadcrumbs TEXT,
+        rule_id TEXT,
+        rule_acronym TEXT,
+        rule_viet TEXT,
+        rule_pali TEXT
+    )
+"""
+# FTS5 external content trên search_rows: chỉ đánh chỉ mục segment, các cột UNINDEXED được đọc thẳng từ search_rows
+SEARCH_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE contents_fts USING fts5(
+        segment,
+        heading_id UNINDEXED,
+        breadcrumbs UNINDEXED,
+        rule_id UNINDEXED,
+        rule_acronym UNINDEXED,
+        rule_viet UNINDEXED,
+        rule_pali UNINDEXED,
+        content='search_rows',
+        content_rowid='uid',
+        tokenize='unicode61 remove_diacritics 0'
+    )
+"""
+# Dòng của search_rows dựng từ contents + headings + rules (mệnh đề WHERE do _insert_search_index thêm vào)
+SEARCH_ROWS_INSERT = """
+    INSERT INTO search_rows
+    SELECT c.uid, c.segment, c.heading_id, h.breadcrumbs, r.id, r.acronym, r.viet, r.pali
+    FROM contents c
+    LEFT JOIN headings h ON c.heading_id = h.uid
+    LEFT JOIN rules r ON c.rule_id = r.id
+"""
+CHUNKS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS content_chunks (
+        voice TEXT,
+        uid INTEGER,
+        chunks TEXT,
+        PRIMARY KEY (voice, uid)
+    ) WITHOUT ROWID
+"""
+TIMEPOINTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS content_timepoints (
+        voice TEXT,
+        uid INTEGER,
+        points TEXT,
+        PRIMARY KEY (voice, uid)
+    ) WITHOUT ROWID
+"""
+# Các uid bị ảnh hưởng của một lần cập nhật delta (bảng tạm, giới hạn phạm vi của các bảng dẫn xuất)
+TOUCHED_SCHEMA = "CREATE TEMP TABLE IF NOT EXISTS touched (uid INTEGER PRIMARY KEY)"
+TOUCHED_SCOPE = "uid IN (SELECT uid FROM temp.touched)"
+
+
+def voice_bundle_name(voice: str, is_primary: bool) -> str:
+    """Tên file nén audio của một giọng đọc (giọng chính giữ tên audio.zip để tương thích)."""
+    return "audio.zip" if is_primary else f"audio-{voice}.zip"
+
+
+def _iter_chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Gom một iterable thành các chunk có kích thước cố định."""
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 class DataWriter:
-    def __init__(self, tsv_path: str, db_path: str, tmp_audio_dir: Optional[str] = None, final_audio_dir: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        tsv_path: str,
+        db_path: str,
+        tmp_audio_dir: Optional[str] = None,
+        final_audio_dir: Optional[str] = None,
+        voices: Optional[List[str]] = None,
+        telemetry: Optional[Telemetry] = None,
+        db_layout: str = "default",
+        audio_profiles: Optional[List[AudioProfile]] = None,
+        timepoints: bool = False,
+    ) -> None:
         self.tsv_path: str = tsv_path
         self.db_path: str = db_path
         self.tmp_audio_dir: Optional[str] = tmp_audio_dir
         self.final_audio_dir: Optional[str] = final_audio_dir
+        self.voices: List[str] = list(voices) if voices else [DEFAULT_TTS_VOICE]
+        self.telemetry: Telemetry = telemetry or Telemetry()
+        self.db_layout: str = db_layout
+        # Profile đầu tiên: audio của web app (audio/, audio.zip); các profile sau: gói audio riêng lấy từ cache
+        self.audio_profiles: List[AudioProfile] = list(audio_profiles) if audio_profiles else [DEFAULT_AUDIO_PROFILE]
+        # Ghi mốc thời gian từng từ (bảng content_timepoints) cho việc đồng bộ highlight khi phát audio
+        self.timepoints: bool = timepoints
 
-    def save(self, data: List[SegmentData], rules: List[RuleData] = None, headings: List[HeadingData] = None) -> None:
+        # Thống kê của lần save gần nhất
+        self.segment_count: int = 0
+        self.audio_names: Set[str] = set()
+        self.voice_audio_names: Dict[str, Set[str]] = {}
+        # Chunk của các audio ghép (xuất bản vào thư mục audio để phát từ chunk đầu, không nén vào zip)
+        self.chunk_names: Set[str] = set()
+        self._chunk_lists: Dict[str, Optional[List[str]]] = {}
+
+    def save(self, data: Iterable[SegmentRecord], rules: Optional[Iterable[RuleRecord]] = None, headings: Optional[Iterable[HeadingRecord]] = None) -> None:
+        """Chạy toàn bộ các bước ghi: nội dung (TSV & SQLite) -> version -> snapshot -> đồng bộ audio -> audio manifest -> nén audio -> asset manifest."""
+        self.write_content(data, rules, headings)
+        self.save_version_file()
+        self.save_snapshot()
+        self.sync_audio_files()
+        self.save_audio_manifest()
+        self.zip_audio_bundles()
+        self.publish_assets()
+
+    def write_content(
+        self,
+        data: Iterable[SegmentRecord],
+        rules: Optional[Iterable[RuleRecord]] = None,
+        headings: Optional[Iterable[HeadingRecord]] = None,
+        write_tsv: bool = True,
+        write_sqlite: bool = True,
+    ) -> None:
+        """
+        Ghi dữ liệu theo dạng stream: mỗi segment được ghi đồng thời ra TSV và chèn theo chunk vào SQLite.
+        `rules` và `headings` chỉ được duyệt sau khi `data` đã cạn, nên có thể truyền iterable lười.
+        Có thể tắt từng đích ghi (write_tsv / write_sqlite) khi đích đó không cần cập nhật.
+        """
         if rules is None: rules = []
         if headings is None: headings = []
-        self._save_tsv(data)
-        self._save_sqlite(data, rules, headings)
-        self._copy_audio_files(data)
+        self.segment_count = 0
+        self.audio_names = set()
+        self.voice_audio_names = {voice: set() for voice in self.voices}
+        self.chunk_names = set()
 
-    def _save_tsv(self, data: List[SegmentData]) -> None:
-        os.makedirs(os.path.dirname(self.tsv_path), exist_ok=True)
-        with open(self.tsv_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=["uid", "html", "label", "segment", "audio", "segment_html", "has_hint", "hint_text", "heading_id", "rule_id"], delimiter='\t')
-            writer.writeheader()
-            for item in data:
-                writer.writerow(item.model_dump())
-        logger.info(f"✅ Đã lưu TSV tại: {self.tsv_path}")
-
-    def _save_sqlite(self, data: List[SegmentData], rules: List[RuleData], headings: List[HeadingData]) -> None:
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
+        temp_tsv_path: str = self.tsv_path + ".tmp"
         temp_db_path: str = self.db_path + ".tmp"
-        if os.path.exists(temp_db_path):
-            os.remove(temp_db_path)
+        conn: Optional[sqlite3.Connection] = None
+        tsv_file: Optional[IO[str]] = None
+
+        try:
+            cursor: Optional[sqlite3.Cursor] = None
+            if write_sqlite:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                if os.path.exists(temp_db_path):
+                    os.remove(temp_db_path)
+                conn = sqlite3.connect(temp_db_path)
+                cursor = conn.cursor()
+                self._create_schema(cursor)
+
+            tsv_writer: Any = None
+            if write_tsv:
+                os.makedirs(os.path.dirname(self.tsv_path), exist_ok=True)
+                tsv_file = open(temp_tsv_path, 'w', encoding='utf-8', newline='')
+                tsv_writer = csv.writer(tsv_file, delimiter='\t')
+                tsv_writer.writerow(TSV_FIELDNAMES)
+
+            for chunk in _iter_chunks(data, INSERT_CHUNK_SIZE):
+                self._write_segment_chunk(cursor, tsv_writer, chunk)
+
+            if cursor is not None and conn is not None:
+                self._insert_voices(cursor)
+                self._insert_chunks(cursor)
+                self._insert_audio_files(cursor)
+                self._insert_timepoints(cursor)
+                self._insert_rules(cursor, rules)
+                self._insert_headings(cursor, headings)
+                self._insert_search_index(cursor)
+                self.telemetry.timed("sqlite.commit", conn.commit)
+            else:
+                # Vẫn duyệt hết để StructureProcessor hoàn tất (không ghi gì)
+                for _ in rules: pass
+                for _ in headings: pass
+        except Exception:
+            if tsv_file:
+                tsv_file.close()
+            if conn:
+                conn.close()
+            for path in (temp_tsv_path, temp_db_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+        if tsv_file:
+            tsv_file.close()
+            os.replace(temp_tsv_path, self.tsv_path)
+            self.telemetry.record_size("tsv", self.tsv_path)
+            logger.info(f"✅ Đã lưu TSV tại: {self.tsv_path}")
+        if conn:
+            conn.close()
+            if self.db_layout == "range":
+                self.telemetry.timed("sqlite.layout", relayout_for_range_requests, temp_db_path)
+            self.telemetry.timed("sqlite.publish", self._publish_sqlite, temp_db_path)
+            self.telemetry.record_size("db", self.db_path)
+            self.save_page_manifest()
+            self.save_spell_index()
+
+    def load_audio_names(self) -> None:
+        """Nạp lại danh sách audio (theo giọng) từ DB đã có, dùng khi bước xử lý nội dung được bỏ qua."""
+        self.audio_names = set()
+        self.voice_audio_names = {voice: set() for voice in self.voices}
+        self.chunk_names = set()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.segment_count = conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0]
+            for voice, audio_name in conn.execute("SELECT voice, audio_name FROM content_audio"):
+                self.voice_audio_names.setdefault(voice, set()).add(audio_name)
+                self.audio_names.add(audio_name)
+                self.chunk_names.update(self._chunk_list(audio_name) or [])
+        finally:
+            conn.close()
+
+    def _bundles(self) -> List[Tuple[str, str, AudioProfile]]:
+        """(tên file zip, giọng, profile) của mọi gói audio: gói theo profile chính trước, rồi tới các profile phụ."""
+        return [
+            (profile_bundle_name(voice_bundle_name(voice, i == 0), profile, j == 0), voice, profile)
+            for j, profile in enumerate(self.audio_profiles)
+            for i, voice in enumerate(self.voices)
+        ]
+
+    def bundle_paths(self, skip_empty: bool = False) -> List[str]:
+        """Đường dẫn các file zip audio (theo giọng và profile) mà writer sẽ tạo ra."""
+        if not self.final_audio_dir:
+            return []
+        base_dir = os.path.dirname(self.final_audio_dir)
+        return [
+            os.path.join(base_dir, bundle_name)
+            for bundle_name, voice, _ in self._bundles()
+            if not skip_empty or self.voice_audio_names.get(voice)
+        ]
+
+    @staticmethod
+    def _profile_name(audio_name: str, profile: AudioProfile) -> str:
+        # Audio của profile phụ suy ra từ file gốc trong cache (trước khi cắt khoảng lặng), giống TTSGenerator
+        return profile_audio_name(trim_source_name(audio_name) or audio_name, profile)
+
+    def profile_audio_names(self) -> Set[str]:
+        """Tên file cache của các profile phụ (để --clean không xoá nhầm audio của các gói riêng)."""
+        return {
+            self._profile_name(audio_name, profile)
+            for profile in self.audio_profiles[1:]
+            for audio_names in self.voice_audio_names.values()
+            for audio_name in audio_names
+        }
+
+    def cache_audio_names(self) -> Set[str]:
+        """
+        Mọi file trong cache audio-tmp mà corpus còn dùng: audio của DB, file gốc của bản đã cắt,
+        chunk của audio ghép và audio của profile phụ.
+        """
+        sources = {trim_source_name(audio_name) for audio_name in self.audio_names}
+        return self.audio_names | self.chunk_names | self.profile_audio_names() | {name for name in sources if name}
+
+    def _chunk_list(self, audio_name: str) -> Optional[List[str]]:
+        """Danh sách chunk của một audio ghép (đọc từ cache, kể cả khi audio đã được cắt khoảng lặng), None nếu không phải audio ghép."""
+        if not self.tmp_audio_dir:
+            return None
+        if audio_name not in self._chunk_lists:
+            source = trim_source_name(audio_name) or audio_name
+            self._chunk_lists[audio_name] = load_chunk_manifest(chunk_manifest_path(self.tmp_audio_dir, source))
+        return self._chunk_lists[audio_name]
+
+    def version_path(self) -> str:
+        return self._sidecar_path("_version.json")
+
+    def page_manifest_path(self) -> str:
+        """Manifest truy cập trang (chỉ có khi db_layout = range)."""
+        return self._sidecar_path("_pages.json")
+
+    def snapshot_path(self) -> str:
+        """Snapshot first-paint (mục lục, rules, các segment đầu) để UI hiển thị trước khi DB tải xong."""
+        return self._sidecar_path("_snapshot.json")
+
+    def save_snapshot(self) -> None:
+        if not os.path.exists(self.db_path):
+            return
+        if write_snapshot(self.db_path, self.snapshot_path()):
+            self.telemetry.record_size("snapshot", self.snapshot_path())
+
+    def audio_manifest_path(self) -> str:
+        """Cây hash audio (nhóm điều luật -> điều luật -> file) để client chỉ đối chiếu các nhánh đã thay đổi."""
+        return self._sidecar_path("_audio_manifest.json")
+
+    def save_audio_manifest(self) -> None:
+        """Ghi cây hash của audio giọng chính đã xuất bản (chạy sau sync_audio_files)."""
+        if not self.final_audio_dir or not os.path.exists(self.db_path):
+            return
+        if write_audio_manifest(self.db_path, self.final_audio_dir, self.voices[0], self.audio_manifest_path()):
+            self.telemetry.record_size("audio-manifest", self.audio_manifest_path())
+
+    def asset_paths(self) -> List[str]:
+        """Các artifact được xuất bản theo hash nội dung (DB, các file JSON đi kèm, zip audio)."""
+        sidecars = [self.version_path(), self.snapshot_path(), self.page_manifest_path(), self.spell_index_path(), self.audio_manifest_path()]
+        return [self.db_path] + sidecars + self.bundle_paths()
+
+    def asset_manifest_path(self) -> str:
+        return os.path.join(os.path.dirname(self.db_path), ASSET_MANIFEST_NAME)
+
+    def publish_assets(self) -> None:
+        output_dir = os.path.dirname(self.db_path)
+        names = [os.path.relpath(path, output_dir) for path in self.asset_paths()]
+        publish_assets(output_dir, names)
+        self.telemetry.record_size("asset-manifest", self.asset_manifest_path())
+
+    def _sidecar_path(self, suffix: str) -> str:
+        db_filename: str = os.path.basename(self.db_path)
+        sidecar_filename: str = db_filename.rsplit('.', 1)[0] + suffix if '.' in db_filename else db_filename + suffix
+        return os.path.join(os.path.dirname(self.db_path), sidecar_filename)
+
+    def spell_index_path(self) -> str:
+        """Chỉ mục sửa chính tả (file SQLite riêng, web app chỉ tải khi cần)."""
+        return spell_db_path(self.db_path)
+
+    def save_spell_index(self) -> None:
+        """
+        Chỉ mục sửa chính tả kiểu SymSpell (symmetric delete) trên từ vựng của contents.segment: gợi ý cho từ gõ sai
+        chỉ là vài lần tra spell_deletes theo biến thể xoá của từ nhập, không phải quét corpus.
+        Ghi ra file riêng (không nằm trong content.db); giữ nguyên file cũ nếu nội dung không đổi.
+        """
+        if not os.path.exists(self.db_path):
+            return
+        spell_path = self.spell_index_path()
+        temp_path = spell_path + ".tmp"
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            # Bộ đếm từ vựng đọc thẳng từ cursor: bộ nhớ chỉ phụ thuộc số từ khác nhau, không phụ thuộc số segment
+            segments = (segment for (segment,) in conn.execute("SELECT segment FROM contents"))
+            words, deletes = self.telemetry.timed("sqlite.spell", write_spell_db, segments, temp_path)
+        finally:
+            conn.close()
+        if os.path.exists(spell_path) and self._files_are_identical(spell_path, temp_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, spell_path)
+        self.telemetry.count("spell.words", words)
+        self.telemetry.count("spell.deletes", deletes)
+        self.telemetry.record_size("spell-db", spell_path)
+
+    def save_page_manifest(self) -> None:
+        """Ghi page manifest cho bố cục range; xoá manifest cũ khi quay về bố cục mặc định (tránh trình đọc dùng nhầm)."""
+        manifest_path = self.page_manifest_path()
+        if self.db_layout != "range":
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            return
+        manifest = self.telemetry.timed("sqlite.manifest", write_page_manifest, self.db_path, manifest_path)
+        self.telemetry.count("db.first_screen_bytes", manifest["first_screen"]["bytes"])
+
+    def _write_segment_chunk(self, cursor: Optional[sqlite3.Cursor], tsv_writer: Any, chunk: List[SegmentRecord]) -> None:
+        """Ghi một chunk segment ra TSV và SQLite, đồng thời thu thập danh sách audio."""
+        # Record có thứ tự field trùng với cột TSV/SQLite nên được ghi trực tiếp, không cần chuyển đổi
+        content_rows = [item[:CONTENT_COLUMN_COUNT] for item in chunk]
+        if tsv_writer is not None:
+            tsv_writer.writerows(content_rows)
+        if cursor is not None:
+            cursor.executemany("INSERT INTO contents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", content_rows)
+
+        # Audio theo từng giọng đọc (giọng chính + giọng phụ)
+        voice_rows = self._voice_rows(chunk)
+        for voice, _, audio_name in voice_rows:
+            self.voice_audio_names[voice].add(audio_name)
+            self.audio_names.add(audio_name)
+            self.chunk_names.update(self._chunk_list(audio_name) or [])
+        if cursor is not None:
+            cursor.executemany("INSERT INTO content_audio VALUES (?, ?, ?)", voice_rows)
+        self.segment_count += len(chunk)
+
+    def _voice_rows(self, chunk: List[SegmentRecord]) -> List[tuple]:
+        """Các dòng (voice, uid, audio_name) của bảng content_audio cho một chunk segment."""
+        return [
+            (voice, item.uid, audio_name)
+            for item in chunk
+            for voice, audio_name in zip(self.voices, (item.audio,) + item.voice_audio)
+            if audio_name and audio_name != 'skip'
+        ]
+
+    def update_tsv(self, data: Sequence[SegmentRecord], start: int = 0) -> None:
+        """
+        Ghi lại TSV từ dòng thứ start (các dòng trước đó không đổi): vị trí byte của dòng được tính trong bộ nhớ,
+        file bị cắt tại đó rồi chỉ phần đuôi được ghi. Không có TSV cũ thì ghi cả file.
+        """
+        if not os.path.exists(self.tsv_path):
+            start = 0
+        buffer = io.StringIO()
+        tsv_writer = csv.writer(buffer, delimiter='\t')
+        tsv_writer.writerow(TSV_FIELDNAMES)
+        tsv_writer.writerows(item[:CONTENT_COLUMN_COUNT] for item in data[:start])
+        offset = len(buffer.getvalue().encode("utf-8")) if start else 0
+
+        buffer = io.StringIO()
+        tsv_writer = csv.writer(buffer, delimiter='\t')
+        if not start:
+            tsv_writer.writerow(TSV_FIELDNAMES)
+        tsv_writer.writerows(item[:CONTENT_COLUMN_COUNT] for item in data[start:])
+        os.makedirs(os.path.dirname(self.tsv_path), exist_ok=True)
+        with open(self.tsv_path, "r+b" if start else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            f.write(buffer.getvalue().encode("utf-8"))
+        logger.info(f"✅ Đã ghi lại TSV từ dòng {start + 1} tại: {self.tsv_path}")
+
+    def update_content(
+        self,
+        changed: List[SegmentRecord],
+        removed_uids: Iterable[int] = (),
+        rules: Optional[Iterable[RuleRecord]] = None,
+        headings: Optional[Iterable[HeadingRecord]] = None,
+    ) -> None:
+        """
+        Cập nhật DB theo delta: UPDATE/INSERT/DELETE từng dòng contents, các bảng dẫn xuất (kể cả contents_fts)
+        và chỉ mục chính tả chỉ cho các segment/audio bị ảnh hưởng; rules/headings được thay toàn bộ nếu truyền vào.
+        Delta được áp lên bản sao tạm của content.db/content_spell.db (một transaction) rồi thay thế nguyên tử:
+        file đang được phục vụ (và bản theo hash đã xuất bản) không bao giờ bị ghi dở.
+        """
+        removed = sorted(removed_uids)
+        touched = sorted({item.uid for item in changed} | set(removed))
+        spell_path = self.spell_index_path()
+        if not os.path.exists(spell_path):
+            self.save_spell_index()
+        temp_db_path, temp_spell_path = self.db_path + ".tmp", spell_path + ".tmp"
+        shutil.copyfile(self.db_path, temp_db_path)
+        shutil.copyfile(spell_path, temp_spell_path)
 
         conn = sqlite3.connect(temp_db_path)
-        cursor = conn.cursor()
-        
+        try:
+            conn.execute("ATTACH DATABASE ? AS spell", (temp_spell_path,))
+            cursor = conn.cursor()
+            cursor.execute(TOUCHED_SCHEMA)
+            cursor.executemany("INSERT INTO temp.touched VALUES (?)", [(uid,) for uid in touched])
+            old_segments = dict(cursor.execute(f"SELECT uid, segment FROM contents WHERE {TOUCHED_SCOPE}").fetchall())
+
+            cursor.executemany("DELETE FROM contents WHERE uid = ?", [(uid,) for uid in removed])
+            for chunk in _iter_chunks(changed, INSERT_CHUNK_SIZE):
+                cursor.executemany(
+                    "UPDATE contents SET html = ?, label = ?, segment = ?, audio_name = ?, segment_html = ?, has_hint = ?, "
+                    "hint_text = ?, heading_id = ?, rule_id = ? WHERE uid = ?",
+                    [item[1:CONTENT_COLUMN_COUNT] + (item.uid,) for item in chunk if item.uid in old_segments]
+                )
+                cursor.executemany(
+                    "INSERT INTO contents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [item[:CONTENT_COLUMN_COUNT] for item in chunk if item.uid not in old_segments]
+                )
+            cursor.execute(f"DELETE FROM content_audio WHERE {TOUCHED_SCOPE}")
+            cursor.executemany("INSERT INTO content_audio VALUES (?, ?, ?)", self._voice_rows(changed))
+            self._insert_chunks(cursor, touched_only=True)
+            self._insert_audio_files(cursor)
+            self._insert_timepoints(cursor, touched_only=True)
+            if rules is not None:
+                cursor.execute("DELETE FROM rules")
+                self._insert_rules(cursor, rules)
+            if headings is not None:
+                cursor.execute("DELETE FROM headings")
+                self._insert_headings(cursor, headings)
+            self._insert_search_index(cursor, touched_only=True)
+            words, deletes = update_spell_index(conn, old_segments.values(), [item.segment for item in changed], schema="spell")
+            self.telemetry.timed("sqlite.commit", conn.commit)
+        except Exception:
+            conn.close()
+            for path in (temp_db_path, temp_spell_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        conn.close()
+
+        self.telemetry.count("spell.words", words)
+        self.telemetry.count("spell.deletes", deletes)
+        if self.db_layout == "range":
+            self.telemetry.timed("sqlite.layout", relayout_for_range_requests, temp_db_path)
+        os.replace(temp_spell_path, spell_path)
+        os.replace(temp_db_path, self.db_path)
+        self.telemetry.record_size("db", self.db_path)
+        self.save_page_manifest()
+        logger.info(f"✅ Đã cập nhật {len(changed)} segment, xoá {len(removed)} segment trong SQLite DB tại: {self.db_path}")
+
+    def _create_schema(self, cursor: sqlite3.Cursor) -> None:
         # Tạo bảng contents
         cursor.execute("""
             CREATE TABLE contents (
@@ -65,32 +535,43 @@ class DataWriter:
             )
         """)
 
-        # Tạo bảng FTS5 (Full Text Search) ảo cho cột segment
-        cursor.execute("""
-            CREATE VIRTUAL TABLE contents_fts USING fts5(
-                segment,
-                content='contents',
-                content_rowid='uid',
-                tokenize='unicode61 remove_diacritics 0'
-            )
-        """)
-        
-        # Tạo Trigger để tự động đồng bộ contents -> contents_fts
+        # Tạo bảng tìm kiếm phi chuẩn hoá và bảng FTS5 (Full Text Search) ảo cho cột segment của nó
+        cursor.execute(SEARCH_ROWS_SCHEMA)
+        cursor.execute(SEARCH_FTS_SCHEMA)
+
+        # Tạo Trigger để tự động đồng bộ search_rows -> contents_fts
         cursor.executescript("""
-            CREATE TRIGGER contents_ai AFTER INSERT ON contents BEGIN
+            CREATE TRIGGER search_rows_ai AFTER INSERT ON search_rows BEGIN
                 INSERT INTO contents_fts(rowid, segment) VALUES (new.uid, new.segment);
             END;
             
-            CREATE TRIGGER contents_ad AFTER DELETE ON contents BEGIN
+            CREATE TRIGGER search_rows_ad AFTER DELETE ON search_rows BEGIN
                 INSERT INTO contents_fts(contents_fts, rowid, segment) VALUES('delete', old.uid, old.segment);
             END;
             
-            CREATE TRIGGER contents_au AFTER UPDATE ON contents BEGIN
+            CREATE TRIGGER search_rows_au AFTER UPDATE ON search_rows BEGIN
                 INSERT INTO contents_fts(contents_fts, rowid, segment) VALUES('delete', old.uid, old.segment);
                 INSERT INTO contents_fts(rowid, segment) VALUES (new.uid, new.segment);
             END;
         """)
-        
+
+        # Tạo bảng voices & content_audio (audio theo từng giọng đọc, giọng chính trùng với contents.audio_name)
+        cursor.execute("""
+            CREATE TABLE voices (
+                id TEXT PRIMARY KEY,
+                is_default INTEGER,
+                bundle TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE content_audio (
+                voice TEXT,
+                uid INTEGER,
+                audio_name TEXT,
+                PRIMARY KEY (voice, uid)
+            ) WITHOUT ROWID
+        """)
+
         # Tạo bảng rules
         cursor.execute("""
             CREATE TABLE rules (
@@ -113,117 +594,236 @@ class DataWriter:
                 breadcrumbs TEXT
             )
         """)
-        
-        # Chèn dữ liệu contents
-        insert_contents: List[tuple] = []
-        for item in data:
-            insert_contents.append((
-                item.uid,
-                item.html,
-                item.label,
-                item.segment,
-                item.audio,
-                item.segment_html,
-                item.has_hint,
-                item.hint_text,
-                item.heading_id,
-                item.rule_id
-            ))
-        cursor.executemany("INSERT INTO contents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", insert_contents)
-        
+
+    def _insert_search_index(self, cursor: sqlite3.Cursor, touched_only: bool = False) -> None:
+        """
+        Ghi search_rows từ contents + headings + rules (chạy sau khi cả ba bảng đã ghi xong); trigger đồng bộ contents_fts.
+        Khi cập nhật delta chỉ ghi lại các dòng bị ảnh hưởng: uid trong temp.touched và những dòng có breadcrumbs/rule
+        đã lưu khác với headings/rules hiện tại (khi rules/headings được thay), không dựng lại toàn bộ chỉ mục.
+        """
+        if not touched_only:
+            cursor.execute(f"{SEARCH_ROWS_INSERT} ORDER BY c.uid")
+            cursor.execute("INSERT INTO contents_fts(contents_fts) VALUES ('optimize')")
+            return
+        stale = {uid for (uid,) in cursor.execute("SELECT uid FROM temp.touched")}
+        stale.update(uid for (uid,) in cursor.execute("""
+            SELECT s.uid FROM search_rows s
+            JOIN contents c ON c.uid = s.uid
+            LEFT JOIN headings h ON c.heading_id = h.uid
+            LEFT JOIN rules r ON c.rule_id = r.id
+            WHERE s.breadcrumbs IS NOT h.breadcrumbs OR s.rule_id IS NOT r.id OR s.rule_acronym IS NOT r.acronym
+               OR s.rule_viet IS NOT r.viet OR s.rule_pali IS NOT r.pali
+        """).fetchall())
+        rows = [(uid,) for uid in sorted(stale)]
+        cursor.executemany("DELETE FROM search_rows WHERE uid = ?", rows)
+        cursor.executemany(f"{SEARCH_ROWS_INSERT} WHERE c.uid = ?", rows)
+        self.telemetry.count("search.rows", len(rows))
+
+    def _insert_audio_files(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Bảng audio_files: thời lượng (đọc từ header các frame MP3, không giải mã) và kích thước của mọi audio đang dùng.
+        Đối chiếu với các dòng đã có: chỉ đọc audio mới được dùng, bỏ dòng của audio không còn dùng (ghi mới lẫn cập nhật delta).
+        """
+        cursor.execute(AUDIO_FILES_SCHEMA)
+        if not self.tmp_audio_dir:
+            cursor.execute("DELETE FROM audio_files")
+            return
+        audio_names = {audio_name for (audio_name,) in cursor.execute("SELECT DISTINCT audio_name FROM content_audio").fetchall()}
+        audio_names.update(name for (chunks,) in cursor.execute("SELECT chunks FROM content_chunks").fetchall() for name in chunks.split())
+        existing = {audio_name for (audio_name,) in cursor.execute("SELECT audio_name FROM audio_files").fetchall()}
+        cursor.executemany("DELETE FROM audio_files WHERE audio_name = ?", [(name,) for name in sorted(existing - audio_names)])
+        rows = []
+        for audio_name in sorted(audio_names - existing):
+            audio_path = os.path.join(self.tmp_audio_dir, audio_name)
+            if os.path.exists(audio_path):
+                with open(audio_path, "rb") as f:
+                    data = f.read()
+                rows.append((audio_name, mp3_duration_ms(data), len(data)))
+        cursor.executemany("INSERT INTO audio_files VALUES (?, ?, ?)", rows)
+
+    def _insert_chunks(self, cursor: sqlite3.Cursor, touched_only: bool = False) -> None:
+        """
+        Bảng content_chunks: với mỗi (giọng, segment) có audio ghép, danh sách chunk theo thứ tự phát (cách nhau bởi khoảng trắng).
+        Trình phát có thể bắt đầu ngay khi chunk đầu tải xong. Dựng từ content_audio (touched_only: chỉ các uid trong temp.touched).
+        """
+        cursor.execute(CHUNKS_SCHEMA)
+        scope = f" WHERE {TOUCHED_SCOPE}" if touched_only else ""
+        cursor.execute(f"DELETE FROM content_chunks{scope}")
+        rows = []
+        for voice, uid, audio_name in cursor.execute(f"SELECT voice, uid, audio_name FROM content_audio{scope} ORDER BY voice, uid").fetchall():
+            chunks = self._chunk_list(audio_name)
+            if chunks:
+                rows.append((voice, uid, " ".join(chunks)))
+        cursor.executemany("INSERT INTO content_chunks VALUES (?, ?, ?)", rows)
+        self.telemetry.count("audio.chunks.segments", len(rows))
+
+    def _insert_timepoints(self, cursor: sqlite3.Cursor, touched_only: bool = False) -> None:
+        """
+        Bảng content_timepoints: với mỗi (giọng, segment), các cặp (vị trí ký tự của từ trong contents.segment, ms)
+        mã hoá gọn bằng encode_timepoints. Dùng mốc SSML <mark> lấy từ API nếu có (audio chưa cắt khoảng lặng),
+        nếu không thì ước lượng tất định theo thời lượng trong audio_files. Phạm vi như content_chunks.
+        """
+        cursor.execute(TIMEPOINTS_SCHEMA)
+        cursor.execute(f"DELETE FROM content_timepoints WHERE {TOUCHED_SCOPE}" if touched_only else "DELETE FROM content_timepoints")
+        if not self.timepoints:
+            return
+        rows = []
+        query = """SELECT ca.voice, ca.uid, ca.audio_name, c.segment, af.duration_ms
+                   FROM content_audio ca
+                   JOIN contents c ON c.uid = ca.uid
+                   LEFT JOIN audio_files af ON af.audio_name = ca.audio_name"""
+        if touched_only:
+            query += f" WHERE ca.{TOUCHED_SCOPE}"
+        for voice, uid, audio_name, segment, duration_ms in cursor.execute(query).fetchall():
+            marks = None
+            if self.tmp_audio_dir and not trim_source_name(audio_name):
+                marks = load_marks(marks_path(self.tmp_audio_dir, audio_name))
+            points = segment_timepoints(segment or "", duration_ms, marks)
+            if points:
+                rows.append((voice, uid, encode_timepoints(points)))
+        cursor.executemany("INSERT INTO content_timepoints VALUES (?, ?, ?)", rows)
+        self.telemetry.count("timepoints.segments", len(rows))
+
+    def _insert_voices(self, cursor: sqlite3.Cursor) -> None:
+        cursor.executemany("INSERT INTO voices VALUES (?, ?, ?)", [
+            (voice, int(i == 0), voice_bundle_name(voice, i == 0)) for i, voice in enumerate(self.voices)
+        ])
+
+    def _insert_rules(self, cursor: sqlite3.Cursor, rules: Iterable[RuleRecord]) -> None:
         # Chèn dữ liệu rules (loại bỏ trùng lặp nếu có do rule_groups và extracted data)
-        seen_rules = set()
-        insert_rules: List[tuple] = []
+        seen_rules: Set[str] = set()
+        insert_rules: List[RuleRecord] = []
         for r in rules:
             if r.id not in seen_rules:
                 seen_rules.add(r.id)
-                insert_rules.append((r.id, r.type, r.acronym, r.pali, r.viet, r.group))
+                insert_rules.append(r)
         cursor.executemany('INSERT INTO rules (id, type, acronym, pali, viet, "group") VALUES (?, ?, ?, ?, ?, ?)', insert_rules)
-        
-        # Chèn dữ liệu headings
-        seen_headings = set()
-        insert_headings: List[tuple] = []
-        for h in headings:
-            if h.uid not in seen_headings:
-                seen_headings.add(h.uid)
-                insert_headings.append((h.uid, h.text, h.level, h.parent_uid, h.breadcrumbs))
-        cursor.executemany("INSERT INTO headings VALUES (?, ?, ?, ?, ?)", insert_headings)
-        
-        conn.commit()
-        conn.close()
 
+    def _insert_headings(self, cursor: sqlite3.Cursor, headings: Iterable[HeadingRecord]) -> None:
+        # Chèn dữ liệu headings theo chunk
+        seen_headings: Set[int] = set()
+        for chunk in _iter_chunks(headings, INSERT_CHUNK_SIZE):
+            insert_headings: List[HeadingRecord] = []
+            for h in chunk:
+                if h.uid not in seen_headings:
+                    seen_headings.add(h.uid)
+                    insert_headings.append(h)
+            cursor.executemany("INSERT INTO headings VALUES (?, ?, ?, ?, ?)", insert_headings)
+
+    def _publish_sqlite(self, temp_db_path: str) -> None:
+        """Thay DB cũ bằng DB tạm nếu nội dung khác."""
         if os.path.exists(self.db_path) and self._files_are_identical(self.db_path, temp_db_path):
             logger.info("💤 DB nội dung không thay đổi. Giữ nguyên file cũ (để bảo toàn timestamp).")
             os.remove(temp_db_path)
-            self._save_version_file() 
         else:
             if os.path.exists(self.db_path):
                 logger.info("♻️  DB có thay đổi. Đang cập nhật file mới...")
-                os.remove(self.db_path)
             else:
                 logger.info("✨ Tạo mới DB lần đầu.")
-            os.rename(temp_db_path, self.db_path)
+            os.replace(temp_db_path, self.db_path)
             logger.info(f"✅ Đã lưu SQLite DB tại: {self.db_path}")
-            self._save_version_file()
 
-    def _copy_audio_files(self, data: List[SegmentData]) -> None:
+    def sync_audio_files(self) -> None:
+        """
+        Đồng bộ thư mục audio Web với danh sách audio đang dùng: xoá file thừa, chỉ copy file còn thiếu.
+        Tên file là hash nội dung nên file trùng tên (và cùng kích thước) không cần copy lại.
+        """
         if not self.tmp_audio_dir or not self.final_audio_dir:
             return
             
         os.makedirs(self.final_audio_dir, exist_ok=True)
         
-        # 1. Lấy danh sách các file audio DUY NHẤT thực sự được dùng trong db
-        required_audios: Set[str] = {item.audio for item in data if item.audio and item.audio != 'skip'}
+        # 1. Lấy danh sách các file audio DUY NHẤT thực sự được dùng trong db (kể cả chunk của audio ghép)
+        required_audios: Set[str] = self.audio_names | self.chunk_names
         
-        # 2. Xóa sạch thư mục đích để dọn dẹp file cũ không còn dùng
+        # 2. Dọn các file cũ không còn dùng
+        existing: Set[str] = set()
+        removed_count = 0
         for f in os.listdir(self.final_audio_dir):
             file_path = os.path.join(self.final_audio_dir, f)
-            if os.path.isfile(file_path):
+            if not os.path.isfile(file_path):
+                continue
+            if f in required_audios:
+                existing.add(f)
+            else:
                 os.remove(file_path)
+                removed_count += 1
 
         copied_count = 0
         missing_count = 0
         
-        # 3. Chỉ copy đúng các file có trong tập required_audios
+        # 3. Chỉ copy các file trong tập required_audios chưa có (hoặc khác kích thước) ở thư mục đích
         for audio_name in required_audios:
             src_path = os.path.join(self.tmp_audio_dir, audio_name)
             dest_path = os.path.join(self.final_audio_dir, audio_name)
             
-            if os.path.exists(src_path):
-                shutil.copy2(src_path, dest_path)
-                copied_count += 1
-            else:
+            if not os.path.exists(src_path):
                 missing_count += 1
                 logger.warning(f"⚠️ Không tìm thấy file audio trong cache để copy: {audio_name}")
+            elif audio_name not in existing or os.path.getsize(src_path) != os.path.getsize(dest_path):
+                shutil.copy2(src_path, dest_path)
+                copied_count += 1
+                self.telemetry.count("audio.copied_bytes", os.path.getsize(dest_path))
                     
-        logger.info(f"✅ Đã đồng bộ {copied_count} file audio (lọc từ {len(data)} segments) ra thư mục Web.")
+        self.telemetry.count("audio.copied", copied_count)
+        self.telemetry.count("audio.removed", removed_count)
+        self.telemetry.count("audio.missing", missing_count)
+        logger.info(
+            f"✅ Đã đồng bộ {len(required_audios) - missing_count} file audio (lọc từ {self.segment_count} segments) ra thư mục Web "
+            f"({copied_count} file mới, xoá {removed_count} file cũ)."
+        )
         if missing_count > 0:
             logger.warning(f"⚠️ Thiếu {missing_count} file audio. Hãy thử chạy lại không có --clean hoặc kiểm tra API.")
 
-        # 4. Nén toàn bộ thành file audio.zip (Bỏ qua cấu trúc thư mục)
-        if copied_count > 0:
-            zip_path = os.path.join(os.path.dirname(self.final_audio_dir), "audio.zip")
-            logger.info(f"📦 Đang nén {copied_count} file âm thanh thành audio.zip...")
-            try:
-                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for audio_name in required_audios:
-                        file_to_zip = os.path.join(self.final_audio_dir, audio_name)
-                        if os.path.exists(file_to_zip):
-                            zipf.write(file_to_zip, arcname=audio_name)
-                logger.info(f"✅ Đã tạo file nén tại: {zip_path}")
-            except Exception as e:
-                logger.error(f"❌ Lỗi khi tạo file audio.zip: {e}")
-
-    def _save_version_file(self) -> None:
+    def zip_audio_bundles(self) -> None:
+        """
+        Nén audio của từng giọng (và từng profile) thành một file zip riêng (Bỏ qua cấu trúc thư mục).
+        Profile chính lấy audio từ thư mục Web, các profile phụ lấy thẳng từ cache audio-tmp.
+        Tổng dung lượng audio của mỗi profile được ghi vào telemetry (counter audio_profile.<tên>.bytes) để so sánh.
+        """
+        if not self.tmp_audio_dir or not self.final_audio_dir:
+            return
+        for bundle_name, voice, profile in self._bundles():
+            audio_names = self.voice_audio_names.get(voice, set())
+            if profile == self.audio_profiles[0]:
+                self._zip_audio_bundle(bundle_name, audio_names, self.final_audio_dir, profile)
+            else:
+                profile_names = {self._profile_name(audio_name, profile) for audio_name in audio_names}
+                self._zip_audio_bundle(bundle_name, profile_names, self.tmp_audio_dir, profile)
+
+    def _zip_audio_bundle(self, bundle_name: str, audio_names: Set[str], source_dir: str, profile: AudioProfile = DEFAULT_AUDIO_PROFILE) -> None:
+        """Nén danh sách audio (lấy trong source_dir) thành một file zip cạnh thư mục audio."""
+        if not self.final_audio_dir or not audio_names:
+            return
+        zip_path = os.path.join(os.path.dirname(self.final_audio_dir), bundle_name)
+        logger.info(f"📦 Đang nén {len(audio_names)} file âm thanh thành {bundle_name}...")
+        audio_bytes = missing = 0
+        try:
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for audio_name in sorted(audio_names):
+                    file_to_zip = os.path.join(source_dir, audio_name)
+                    if os.path.exists(file_to_zip):
+                        zipf.write(file_to_zip, arcname=audio_name)
+                        audio_bytes += os.path.getsize(file_to_zip)
+                    else:
+                        missing += 1
+            self.telemetry.record_size(f"zip:{bundle_name}", zip_path)
+            self.telemetry.count(f"audio_profile.{profile.name}.files", len(audio_names) - missing)
+            self.telemetry.count(f"audio_profile.{profile.name}.bytes", audio_bytes)
+            if missing:
+                self.telemetry.count(f"audio_profile.{profile.name}.missing", missing)
+                logger.warning(f"⚠️ {bundle_name}: thiếu {missing} file audio profile '{profile.name}' trong cache.")
+            logger.info(f"✅ Đã tạo file nén tại: {zip_path} ({audio_bytes / 1024:.1f} KB audio, profile {profile.name})")
+        except Exception as e:
+            logger.error(f"❌ Lỗi khi tạo file {bundle_name}: {e}")
+
+    def save_version_file(self) -> None:
         if not os.path.exists(self.db_path):
             return
 
-        with open(self.db_path, "rb") as f:
-            db_hash: str = hashlib.md5(f.read()).hexdigest()
+        db_hash: str = self._hash_file(self.db_path)
             
-        db_filename: str = os.path.basename(self.db_path)
-        version_filename: str = db_filename.rsplit('.', 1)[0] + "_version.json" if '.' in db_filename else db_filename + "_version.json"
-        version_path: str = os.path.join(os.path.dirname(self.db_path), version_filename)
+        version_path: str = self.version_path()
 
         if os.path.exists(version_path):
             try:
@@ -240,13 +840,25 @@ class DataWriter:
             "generated_at": int(time.time())
         }
         
-        with open(version_path, "w", encoding="utf-8") as f:
+        # Ghi file tạm rồi thay thế nguyên tử (dev server không đọc phải file đang ghi dở)
+        temp_version_path: str = version_path + ".tmp"
+        with open(temp_version_path, "w", encoding="utf-8") as f:
             json.dump(version_info, f)
+        os.replace(temp_version_path, version_path)
         logger.info(f"🔖 Đã cập nhật DB Version tại: {version_path} (Hash: {db_hash})")
 
-    def _files_are_identical(self, file1: str, file2: str) -> bool:
-        def get_hash(filepath: str) -> str:
+    def _hash_file(self, filepath: str) -> str:
+        """Tính MD5 của file theo từng khối để không nạp cả file vào bộ nhớ."""
+        with self.telemetry.stage("hash"):
+            hasher = hashlib.md5()
             with open(filepath, "rb") as f:
-                return hashlib.md5(f.read()).hexdigest()
-        return get_hash(file1) == get_hash(file2)
+                for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                    hasher.update(block)
+            self.telemetry.count("hash.bytes", os.path.getsize(filepath))
+            return hasher.hexdigest()
+
+    def _files_are_identical(self, file1: str, file2: str) -> bool:
+        if os.path.getsize(file1) != os.path.getsize(file2):
+            return False
+        return self._hash_file(file1) == self._hash_file(file2)
 
@@ -1,21 +1,19 @@
 # Path: src/main.py
 import sys
 import os
+import time
 import logging
 import argparse
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, List, Optional
 
 # Add src to python path to allow imports if run directly
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from src.config.logging_config import setup_logging
-from src.data_builder.writer import DataWriter
-from src.data_builder.tts_generator import TTSGenerator
-from src.data_builder.processors import TsvContentProcessor
+if TYPE_CHECKING:
+    from src.data_builder.models import CorpusConfig
 
-# Load Environment Variables (.env)
-load_dotenv()
-setup_logging()
+# Các module nặng (pydantic, requests, bộ xử lý, writer...) chỉ được import bên trong lệnh cần dùng,
+# để `gioibon --help` và các lệnh nhẹ khởi động nhanh (xem tests/test_cli_startup.py).
 logger = logging.getLogger(__name__)
 
 # Cấu hình đường dẫn
@@ -23,40 +21,141 @@ DATA_CONTENT_DIR = "data/content"
 WEB_DATA_DIR = "web/public/app-content"
 TSV_SOURCE = os.path.join(DATA_CONTENT_DIR, "content_source.tsv")
 TSV_OUT = os.path.join(DATA_CONTENT_DIR, "content.tsv")
-DB_OUT = os.path.join(WEB_DATA_DIR, "content.db")
 AUDIO_FINAL_DIR = os.path.join(WEB_DATA_DIR, "audio")
 AUDIO_TMP_DIR = os.path.join(DATA_CONTENT_DIR, "audio-tmp")
+BUILD_CACHE_DIR = os.path.join(DATA_CONTENT_DIR, "build-cache")
+CORPUS_MANIFEST = os.path.join(DATA_CONTENT_DIR, "corpora.json")
+RULE_GROUPS_SOURCE = os.path.join(DATA_CONTENT_DIR, "rule_groups.tsv")
+BUILD_REPORT = os.path.join(BUILD_CACHE_DIR, "build_report.json")
+BUILD_PROFILE = os.path.join(BUILD_CACHE_DIR, "build_profile.pstats")
+BENCH_BASELINE = os.path.join("src", "benchmarks", "builder_baseline.json")
+QUERY_BASELINE = os.path.join("src", "benchmarks", "query_baseline.json")
+QUERY_REPORT = os.path.join(BUILD_CACHE_DIR, "query_report.json")
+SERVE_ROOT = os.path.join("web", "public")
+SERVE_BASE = "/gioibon/"
+AUDIO_EXPORT_DIR = os.path.join("output", "sentences", "Patimokkha audio_sentences")
+AUDIO_TAGGED_DIR = os.path.join(BUILD_CACHE_DIR, "audio-tagged")
 
 
-def run_data_builder(clean: bool = False) -> None:
+def load_corpora(
+    selected: Optional[List[str]] = None,
+    voices: Optional[List[str]] = None,
+    db_layout: Optional[str] = None,
+    audio_profiles: Optional[List[str]] = None,
+    trim_silence: bool = False,
+    timepoints: bool = False,
+    chunk_audio: bool = False,
+) -> List["CorpusConfig"]:
+    """Đọc danh sách corpus từ manifest (hoặc corpus mặc định nếu chưa có manifest)."""
+    from src.data_builder.models import CorpusConfig
+    from src.data_builder.corpus_builder import load_corpus_manifest
+
+    if os.path.exists(CORPUS_MANIFEST):
+        corpora = load_corpus_manifest(CORPUS_MANIFEST).corpora
+    else:
+        corpora = [CorpusConfig(
+            id="bhikkhu",
+            source=TSV_SOURCE,
+            rule_groups=RULE_GROUPS_SOURCE,
+            tsv_out=TSV_OUT,
+            output_dir=WEB_DATA_DIR
+        )]
+
+    if selected:
+        unknown = set(selected) - {c.id for c in corpora}
+        if unknown:
+            raise ValueError(f"Không có corpus: {', '.join(sorted(unknown))}")
+        corpora = [c for c in corpora if c.id in selected]
+    if voices:
+        corpora = [c.model_copy(update={"voices": voices}) for c in corpora]
+    if db_layout:
+        corpora = [c.model_copy(update={"db_layout": db_layout}) for c in corpora]
+    if audio_profiles:
+        # model_validate để kiểm tra tên profile (model_copy không chạy validator)
+        corpora = [CorpusConfig.model_validate({**c.model_dump(), "audio_profiles": audio_profiles}) for c in corpora]
+    if trim_silence:
+        corpora = [c.model_copy(update={"trim_silence": True}) for c in corpora]
+    if timepoints:
+        corpora = [c.model_copy(update={"timepoints": True}) for c in corpora]
+    if chunk_audio:
+        corpora = [c.model_copy(update={"chunk_audio": True}) for c in corpora]
+    return corpora
+
+
+def run_data_builder(
+    clean: bool = False,
+    use_cache: bool = True,
+    validate: bool = False,
+    selected: Optional[List[str]] = None,
+    workers: int = 1,
+    voices: Optional[List[str]] = None,
+    force: bool = False,
+    explain: bool = False,
+    check_queries: bool = False,
+    db_layout: Optional[str] = None,
+    audio_profiles: Optional[List[str]] = None,
+    trim_silence: bool = False,
+    timepoints: bool = False,
+    chunk_audio: bool = False,
+) -> None:
     """Thực thi logic build dữ liệu từ TSV Source sang DB/TSV kèm theo việc sinh Audio TTS."""
-    logger.info("🚀 Khởi động quy trình xây dựng dữ liệu và Audio từ TSV Source...")
+    from src.data_builder.corpus_builder import build_corpora
+    from src.data_builder.telemetry import Telemetry, write_build_report
+    from src.data_builder.tts_generator import TTSGenerator
 
-    if not os.path.exists(TSV_SOURCE):
-        logger.error(f"❌ Không tìm thấy file nguồn: {TSV_SOURCE}")
-        return
+    logger.info("🚀 Khởi động quy trình xây dựng dữ liệu và Audio từ TSV Source...")
 
     try:
-        # 1. Khởi tạo Logic
-        tts_generator = TTSGenerator(AUDIO_FINAL_DIR, AUDIO_TMP_DIR)
-        processor = TsvContentProcessor(tts_generator)
+        # 1. Đọc danh sách corpus và kiểm tra file nguồn
+        corpora = load_corpora(selected, voices, db_layout, audio_profiles, trim_silence, timepoints, chunk_audio)
+        missing_sources = [c.source for c in corpora if not os.path.exists(c.source)]
+        if missing_sources:
+            for source in missing_sources:
+                logger.error(f"❌ Không tìm thấy file nguồn: {source}")
+            return
 
-        # 2. Xử lý nội dung từ TSV
-        segments, rules, headings = processor.process_tsv(TSV_SOURCE)
+        # 2 & 3. Build các corpus (song song nếu có nhiều), dùng chung cache audio
+        telemetry = Telemetry()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        results = build_corpora(
+            corpora,
+            AUDIO_TMP_DIR,
+            cache_dir=BUILD_CACHE_DIR if use_cache else None,
+            validate=validate,
+            workers=workers,
+            state_dir=BUILD_CACHE_DIR,
+            force=force,
+            explain=explain,
+            telemetry=telemetry
+        )
+        total_segments = sum(r.segment_count for r in results)
 
-        # 3. Ghi dữ liệu (TSV & SQLite & Copy Audio Files)
-        # TRUYỀN THÊM THAM SỐ final_audio_dir ĐỂ COPY FILE
-        writer = DataWriter(TSV_OUT, DB_OUT, AUDIO_TMP_DIR, AUDIO_FINAL_DIR)
-        writer.save(segments, rules, headings)
+        # Báo cáo build dạng JSON (theo dõi hiệu năng qua các lần build)
+        write_build_report(BUILD_REPORT, {
+            "generated_at": int(time.time()),
+            "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+            "process_cpu_ms": round((time.process_time() - cpu_start) * 1000, 3),
+            "workers": workers,
+            "segments": total_segments,
+            "build": telemetry.to_dict(),
+            "corpora": {r.corpus_id: r.report for r in results},
+        })
 
         logger.info(
-            f"🏁 Hoàn tất! Đã xử lý {len(segments)} segments và tạo/cache Audio thành công."
+            f"🏁 Hoàn tất! Đã xử lý {total_segments} segments ({len(results)} corpus) và tạo/cache Audio thành công."
         )
 
-        # 4. Thực hiện dọn dẹp nếu có cờ --clean
-        if clean:
+        # Kiểm tra query đọc của web app trên DB vừa build (full scan mới / chậm hơn baseline thì dừng build)
+        if check_queries and not run_query_checks(corpora):
+            sys.exit(1)
+
+        # 4. Thực hiện dọn dẹp nếu có cờ --clean (cache audio dùng chung nên cần danh sách của mọi corpus)
+        if clean and selected:
+            logger.warning("⚠️ Bỏ qua --clean: chỉ dọn audio-tmp khi build toàn bộ corpus.")
+        elif clean:
             # Lấy danh sách file audio đang được sử dụng
-            active_filenames = [seg.audio for seg in segments if seg.audio and seg.audio != "skip"]
+            active_filenames = sorted({name for r in results for name in r.audio_names})
+            tts_generator = TTSGenerator(AUDIO_FINAL_DIR, AUDIO_TMP_DIR)
             
             logger.info("🔍 Đang kiểm tra thư mục audio-tmp để tìm file rác...")
             garbage_files = tts_generator.get_garbage_files(active_filenames)
@@ -88,6 +187,138 @@ def run_data_builder(clean: bool = False) -> None:
         sys.exit(1)
 
 
+def run_profiled(func, *args, **kwargs) -> None:
+    """Chạy hàm dưới cProfile, lưu pstats và in các hàm tốn thời gian nhất."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func, *args, **kwargs)
+    finally:
+        os.makedirs(os.path.dirname(BUILD_PROFILE), exist_ok=True)
+        profiler.dump_stats(BUILD_PROFILE)
+        logger.info(f"🔬 Đã lưu profile tại: {BUILD_PROFILE} (xem bằng: python -m pstats {BUILD_PROFILE})")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+def run_data_watch(
+    selected: Optional[List[str]] = None,
+    voices: Optional[List[str]] = None,
+    use_cache: bool = True,
+    db_layout: Optional[str] = None,
+    audio_profiles: Optional[List[str]] = None,
+    trim_silence: bool = False,
+    timepoints: bool = False,
+    chunk_audio: bool = False,
+) -> None:
+    """Chế độ watch: giữ bộ xử lý chạy nền và build lại phần thay đổi mỗi khi file nguồn được lưu."""
+    from src.data_builder.watcher import watch_corpora
+
+    corpora = load_corpora(selected, voices, db_layout, audio_profiles, trim_silence, timepoints, chunk_audio)
+    watch_corpora(corpora, AUDIO_TMP_DIR, cache_dir=BUILD_CACHE_DIR if use_cache else None, state_dir=BUILD_CACHE_DIR)
+
+
+def run_query_checks(corpora: List["CorpusConfig"], baseline_path: str = QUERY_BASELINE, update_baseline: bool = False) -> bool:
+    """
+    Phát lại các query của web app trên content.db của từng corpus và so với baseline.
+    Ghi báo cáo vào QUERY_REPORT. Trả về False nếu có full scan mới hoặc hồi quy độ trễ.
+    """
+    from src.benchmarks.query_benchmark import check_query_report, load_query_baseline, run_query_benchmark, save_query_baseline
+    from src.data_builder.corpus_builder import corpus_db_path
+    from src.data_builder.telemetry import write_build_report
+
+    reports = {}
+    passed = True
+    for corpus in corpora:
+        db_path = corpus_db_path(corpus)
+        if not os.path.exists(db_path):
+            logger.error(f"❌ [{corpus.id}] Chưa có DB để kiểm tra query: {db_path}")
+            passed = False
+            continue
+
+        logger.info(f"🔎 [{corpus.id}] Đo các query đọc trên {db_path}:")
+        report = run_query_benchmark(db_path)
+        baseline = load_query_baseline(baseline_path, corpus.id)
+        if update_baseline or baseline is None:
+            save_query_baseline(baseline_path, corpus.id, report)
+            problems = []
+        else:
+            problems = check_query_report(report, baseline)
+        for problem in problems:
+            logger.error(f"❌ [{corpus.id}] Hồi quy query: {problem}")
+        passed = passed and not problems
+        reports[corpus.id] = {**report, "problems": problems}
+
+    write_build_report(QUERY_REPORT, {"generated_at": int(time.time()), "corpora": reports})
+    if passed:
+        logger.info("✅ Các query đọc không có full scan mới hay hồi quy độ trễ.")
+    return passed
+
+
+def run_benchmark(
+    target: str,
+    scale: int = 100,
+    scales: Optional[List[int]] = None,
+    baseline_path: Optional[str] = None,
+    update_baseline: bool = False,
+    threshold: Optional[float] = None,
+) -> None:
+    """Chạy benchmark theo mục tiêu được chọn."""
+    if target == "records":
+        from src.benchmarks.record_benchmark import run_record_benchmark
+        run_record_benchmark(TSV_SOURCE, scale=scale)
+    elif target == "builder":
+        from src.benchmarks.builder_benchmark import (
+            DEFAULT_SCALES, DEFAULT_THRESHOLD, compare_with_baseline, load_baseline, run_builder_benchmark, save_baseline,
+        )
+        baseline_path = baseline_path or BENCH_BASELINE
+        report = run_builder_benchmark(TSV_SOURCE, RULE_GROUPS_SOURCE, scales or list(DEFAULT_SCALES))
+        baseline = load_baseline(baseline_path)
+
+        if update_baseline or baseline is None:
+            save_baseline(baseline_path, report, threshold if threshold is not None else DEFAULT_THRESHOLD)
+            return
+
+        if threshold is not None:
+            baseline.setdefault("thresholds", {})["default"] = threshold
+        logger.info(f"🔍 So sánh với baseline {baseline_path}:")
+        regressions = compare_with_baseline(report, baseline)
+        if regressions:
+            for regression in regressions:
+                logger.error(f"❌ Hồi quy hiệu năng: {regression}")
+            sys.exit(1)
+        logger.info("✅ Không có hồi quy hiệu năng so với baseline.")
+    elif target == "queries":
+        if not run_query_checks(load_corpora(), baseline_path or QUERY_BASELINE, update_baseline):
+            sys.exit(1)
+
+
+def run_serve(root: str, host: str, port: int, base: str, latency_ms: float = 0.0, bandwidth_kbps: float = 0.0) -> None:
+    """Phục vụ artifact đã build qua HTTP (Range, ETag, bản nén sẵn, giả lập mạng chậm)."""
+    from src.server.artifact_server import ServeOptions, serve
+
+    if not os.path.isdir(root):
+        logger.error(f"❌ Không tìm thấy thư mục: {root}")
+        sys.exit(1)
+    base = "/" + base.strip("/") + "/" if base.strip("/") else "/"
+    serve(ServeOptions(root, base, latency_ms, bandwidth_kbps), host, port)
+
+
+def run_export_audio(out_dir: str, corpus_id: Optional[str] = None, voice: Optional[str] = None, workers: int = 1) -> None:
+    """Xuất audio từng câu (đã đặt tên và gắn thẻ ID3) từ content.db đã build, dùng chung cache audio với builder."""
+    from src.data_builder.audio_export import export_audio
+    from src.data_builder.corpus_builder import corpus_db_path
+
+    corpus = load_corpora([corpus_id] if corpus_id else None)[0]
+    db_path = corpus_db_path(corpus)
+    if not os.path.exists(db_path):
+        logger.error(f"❌ Chưa có {db_path}, hãy chạy `gioibon data` trước.")
+        sys.exit(1)
+    tagged_dir = os.path.join(AUDIO_TAGGED_DIR, corpus.id)
+    export_audio(db_path, AUDIO_TMP_DIR, out_dir, tagged_dir, voice or corpus.voices[0], workers=workers, chunk_audio=corpus.chunk_audio)
+
+
 def cli() -> None:
     """Cổng giao tiếp CLI cho toàn bộ ứng dụng."""
     parser = argparse.ArgumentParser(description="Công cụ quản lý dự án Giới Bổn")
@@ -103,15 +334,242 @@ def cli() -> None:
         action="store_true",
         help="Dọn dẹp thư mục audio-tmp (xóa các file audio cũ không còn sử dụng)."
     )
+    parser_data.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bỏ qua Row Cache, render lại toàn bộ các dòng."
+    )
+    parser_data.add_argument(
+        "--corpus",
+        action="append",
+        metavar="ID",
+        help=f"Chỉ build corpus được chọn (có thể lặp lại). Danh sách corpus nằm trong {CORPUS_MANIFEST}."
+    )
+    parser_data.add_argument(
+        "--voice",
+        action="append",
+        metavar="NAME",
+        help="Giọng đọc TTS (có thể lặp lại, giọng đầu tiên là giọng chính). Mặc định lấy theo manifest."
+    )
+    parser_data.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Số process build song song khi có nhiều corpus."
+    )
+    parser_data.add_argument(
+        "--validate",
+        action="store_true",
+        help="Kiểm tra toàn bộ dữ liệu đầu ra bằng Pydantic models."
+    )
+    parser_data.add_argument(
+        "--force",
+        action="store_true",
+        help="Chạy lại mọi bước build kể cả khi đầu vào không thay đổi."
+    )
+    parser_data.add_argument(
+        "--explain",
+        action="store_true",
+        help="In lý do chạy/bỏ qua của từng bước build."
+    )
+    parser_data.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Chạy build dưới cProfile (một process) và lưu kết quả vào {BUILD_PROFILE}."
+    )
+    parser_data.add_argument(
+        "--watch",
+        action="store_true",
+        help="Theo dõi file nguồn và build lại phần thay đổi (cập nhật nguyên tử content.db & version)."
+    )
+    parser_data.add_argument(
+        "--db-layout",
+        choices=["default", "range"],
+        help=(
+            "Bố cục content.db (mặc định lấy theo manifest). range: page_size nhỏ, heading và các dòng đầu nằm ở những trang đầu, "
+            "kèm content_pages.json để đọc lười bằng HTTP range request."
+        )
+    )
+    parser_data.add_argument(
+        "--audio-profile",
+        action="append",
+        metavar="NAME",
+        help=(
+            "Audio profile (có thể lặp lại): default, mobile (Opus 16 kHz), hq (PCM 24 kHz). Profile đầu tiên là audio của web app, "
+            "các profile sau xuất thành gói audio-<profile>.zip; dung lượng từng profile được ghi vào build report."
+        )
+    )
+    parser_data.add_argument(
+        "--trim-silence",
+        action="store_true",
+        help="Cắt khoảng lặng đầu/cuối của audio MP3 theo ranh giới frame (thuần Python, bản cắt được cache trong audio-tmp)."
+    )
+    parser_data.add_argument(
+        "--timepoints",
+        action="store_true",
+        help=(
+            "Ghi mốc thời gian từng từ vào content.db (bảng content_timepoints): lấy từ SSML <mark> khi giọng hỗ trợ, "
+            "nếu không thì ước lượng tất định theo thời lượng audio. Giọng Chirp (kể cả giọng mặc định Chirp3-HD) không hỗ trợ "
+            "<mark> nên chỉ có mốc ước lượng. Audio trong cache chưa từng được sinh kèm <mark> sẽ được gọi API sinh lại."
+        )
+    )
+    parser_data.add_argument(
+        "--chunk-audio",
+        action="store_true",
+        help=(
+            "Chia segment dài tại ranh giới câu/mệnh đề: mỗi chunk được sinh và cache riêng (dùng chung giữa các segment), "
+            "audio segment được ghép theo frame MP3 và danh sách chunk ghi vào bảng content_chunks."
+        )
+    )
+    parser_data.add_argument(
+        "--check-queries",
+        action="store_true",
+        help=f"Sau khi build, đo các query đọc của web app và dừng với lỗi nếu có full scan mới hoặc chậm hơn {QUERY_BASELINE}."
+    )
+
+    # Đăng ký lệnh: bench
+    parser_bench = subparsers.add_parser(
+        "bench", help="Chạy benchmark cho data builder"
+    )
+    parser_bench.add_argument(
+        "target",
+        choices=["records", "builder", "queries"],
+        help=(
+            "records: so sánh chi phí Pydantic model và record nhẹ trên mỗi dòng. "
+            "builder: đo từng bộ xử lý, process_tsv và DataWriter.save trên corpus tổng hợp và so với baseline. "
+            "queries: phát lại các query của web app (load, tìm kiếm FTS/LIKE) trên content.db đã build, so sánh dạng tìm kiếm "
+            "phi chuẩn hoá với dạng join cũ và so với baseline."
+        )
+    )
+    parser_bench.add_argument(
+        "--scale",
+        type=int,
+        default=100,
+        help="Hệ số nhân kích thước corpus cho benchmark records (mặc định: 100)."
+    )
+    parser_bench.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        help="Các hệ số kích thước corpus tổng hợp cho benchmark builder (mặc định: 1 10 100)."
+    )
+    parser_bench.add_argument(
+        "--baseline",
+        help=f"File baseline để so sánh (mặc định: {BENCH_BASELINE} hoặc {QUERY_BASELINE})."
+    )
+    parser_bench.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Ghi kết quả lần chạy này làm baseline mới."
+    )
+    parser_bench.add_argument(
+        "--threshold",
+        type=float,
+        help="Ngưỡng hồi quy mặc định (tỉ lệ, VD: 0.25 = chậm hơn 25%%)."
+    )
+
+    # Đăng ký lệnh: serve
+    parser_serve = subparsers.add_parser(
+        "serve", help="Phục vụ artifact đã build (content.db, audio, zip) với Range, ETag và bản nén sẵn"
+    )
+    parser_serve.add_argument(
+        "--root",
+        default=SERVE_ROOT,
+        help=f"Thư mục cần phục vụ (mặc định: {SERVE_ROOT})."
+    )
+    parser_serve.add_argument("--host", default="127.0.0.1", help="Địa chỉ lắng nghe (mặc định: 127.0.0.1).")
+    parser_serve.add_argument("--port", type=int, default=8000, help="Cổng lắng nghe (mặc định: 8000).")
+    parser_serve.add_argument(
+        "--base",
+        default=SERVE_BASE,
+        help=f"Tiền tố URL giống bản deploy, cả / lẫn tiền tố đều dùng được (mặc định: {SERVE_BASE})."
+    )
+    parser_serve.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        metavar="MS",
+        help="Độ trễ thêm vào mỗi response (ms)."
+    )
+    parser_serve.add_argument(
+        "--bandwidth",
+        type=float,
+        default=0.0,
+        metavar="KBPS",
+        help="Giới hạn băng thông mỗi response (KB/s, 0 = không giới hạn)."
+    )
+
+    # Đăng ký lệnh: export-audio
+    parser_export = subparsers.add_parser(
+        "export-audio", help="Xuất audio từng câu thành các track MP3 có tên và thẻ ID3 (dùng chung cache audio-tmp)"
+    )
+    parser_export.add_argument(
+        "--out",
+        default=AUDIO_EXPORT_DIR,
+        help=f"Thư mục xuất track (mặc định: {AUDIO_EXPORT_DIR})."
+    )
+    parser_export.add_argument("--corpus", metavar="ID", help="Corpus cần xuất (mặc định: corpus đầu tiên trong manifest).")
+    parser_export.add_argument("--voice", metavar="NAME", help="Giọng đọc (mặc định: giọng chính của corpus).")
+    parser_export.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Số process gắn thẻ ID3 song song."
+    )
 
     args = parser.parse_args()
+    if args.command is None:
+        # Nếu gõ `gioibon` không kèm argument, hiển thị hướng dẫn (không cần nạp môi trường)
+        parser.print_help()
+        return
+
+    # Load Environment Variables (.env) và logging chỉ khi thực sự chạy một lệnh
+    from dotenv import load_dotenv
+    from src.config.logging_config import setup_logging
+    load_dotenv()
+    setup_logging()
 
     # Điều hướng logic dựa trên lệnh
-    if args.command == "data":
-        run_data_builder(clean=args.clean)
-    else:
-        # Nếu gõ `gioibon` không kèm argument, hiển thị hướng dẫn
-        parser.print_help()
+    if args.command == "data" and args.watch:
+        run_data_watch(
+            selected=args.corpus, voices=args.voice, use_cache=not args.no_cache, db_layout=args.db_layout,
+            audio_profiles=args.audio_profile, trim_silence=args.trim_silence, timepoints=args.timepoints, chunk_audio=args.chunk_audio
+        )
+    elif args.command == "data":
+        data_args = dict(
+            clean=args.clean,
+            use_cache=not args.no_cache,
+            validate=args.validate,
+            selected=args.corpus,
+            workers=args.workers,
+            voices=args.voice,
+            force=args.force,
+            explain=args.explain,
+            check_queries=args.check_queries,
+            db_layout=args.db_layout,
+            audio_profiles=args.audio_profile,
+            trim_silence=args.trim_silence,
+            timepoints=args.timepoints,
+            chunk_audio=args.chunk_audio
+        )
+        if args.profile:
+            # cProfile chỉ thấy process hiện tại: build tuần tự để profile phủ toàn bộ công việc
+            run_profiled(run_data_builder, **{**data_args, "workers": 1})
+        else:
+            run_data_builder(**data_args)
+    elif args.command == "bench":
+        run_benchmark(
+            args.target,
+            scale=args.scale,
+            scales=args.scales,
+            baseline_path=args.baseline,
+            update_baseline=args.update_baseline,
+            threshold=args.threshold
+        )
+    elif args.command == "serve":
+        run_serve(args.root, args.host, args.port, args.base, args.latency, args.bandwidth)
+    elif args.command == "export-audio":
+        run_export_audio(args.out, args.corpus, args.voice, args.workers)
 
 
 if __name__ == "__main__":
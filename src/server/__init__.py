@@ -0,0 +1 @@
+# Path: src/server/__init__.py
@@ -0,0 +1,294 @@
+# Path: src/server/artifact_server.py
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ServeOptions", "ArtifactServer", "create_server", "serve"]
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+# Tên file theo hash nội dung (content.<hash12>.db, audio/<sha>.mp3) được cache vĩnh viễn
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{12}\.[^./]+$|^[0-9a-f]{32,64}\.mp3$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Thứ tự ưu tiên các bản nén sẵn
+ENCODING_SUFFIXES: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+SEND_CHUNK_SIZE = 64 * 1024
+HASH_READ_SIZE = 1024 * 1024
+
+mimetypes.add_type("application/wasm", ".wasm")
+mimetypes.add_type("text/javascript", ".mjs")
+
+
+class ServeOptions(NamedTuple):
+    root: str
+    base: str = "/"
+    # Độ trễ thêm vào trước byte đầu tiên (ms) và băng thông tối đa (KB/s, 0 = không giới hạn)
+    latency_ms: float = 0.0
+    bandwidth_kbps: float = 0.0
+
+
+class _FileInfo(NamedTuple):
+    path: str
+    size: int
+    etag: str
+    content_type: str
+    encoding: Optional[str] = None
+
+
+class ArtifactServer(ThreadingHTTPServer):
+    """HTTP server cho artifact đã build: giữ cấu hình và cache hash nội dung (theo kích thước/mtime) dùng chung giữa các request."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], options: ServeOptions) -> None:
+        super().__init__(address, ArtifactRequestHandler)
+        self.options = options
+        self._lock = threading.Lock()
+        self._hash_cache: Dict[str, Tuple[int, int, str]] = {}
+        self._manifest_cache: Dict[str, Tuple[int, Dict[str, dict]]] = {}
+
+    def content_hash(self, path: str) -> str:
+        """Hash nội dung: lấy từ asset manifest nếu có, không thì tính MD5 (cache theo kích thước/mtime)."""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hash_cache.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+
+        entry = self.manifest_entry(path)
+        if entry and entry.get("size") == stat.st_size and self._matches_manifest(path, entry):
+            content_hash = entry["hash"]
+        else:
+            hasher = hashlib.md5()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                    hasher.update(block)
+            content_hash = hasher.hexdigest()
+        with self._lock:
+            self._hash_cache[path] = (stat.st_size, stat.st_mtime_ns, content_hash)
+        return content_hash
+
+    def _matches_manifest(self, path: str, entry: dict) -> bool:
+        """
+        Chỉ file tên theo hash mới chắc chắn khớp manifest (bản copy bất biến). File tên cố định có thể đã bị
+        builder sửa sau lần xuất bản (chế độ watch) nên được hash lại.
+        """
+        return os.path.basename(path) == entry["file"]
+
+    def manifest_entry(self, path: str) -> Optional[dict]:
+        """Mục của file trong asset-manifest.json cùng thư mục (theo tên gốc hoặc tên hash)."""
+        manifest_path = os.path.join(os.path.dirname(path), ASSET_MANIFEST_NAME)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._manifest_cache.get(manifest_path)
+        if cached is None or cached[0] != mtime:
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    assets = json.load(f).get("assets", {})
+            except (OSError, ValueError):
+                assets = {}
+            index = dict(assets)
+            index.update({entry["file"]: entry for entry in assets.values()})
+            cached = (mtime, index)
+            with self._lock:
+                self._manifest_cache[manifest_path] = cached
+        return cached[1].get(os.path.basename(path))
+
+
+class ArtifactRequestHandler(BaseHTTPRequestHandler):
+    server: ArtifactServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._handle(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._handle(send_body=False)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Log theo request được ghi trong _handle (kèm thời gian), tắt log mặc định của http.server
+        pass
+
+    def _handle(self, send_body: bool) -> None:
+        started = time.perf_counter()
+        status, sent, encoding = self._respond(send_body)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        detail = f" {encoding}" if encoding else ""
+        range_header = self.headers.get("Range")
+        if range_header:
+            detail += f" {range_header}"
+        logger.info(f"🌐 {self.command} {self.path} -> {status} {sent} B{detail} ({elapsed_ms:.1f} ms)")
+
+    def _resolve(self) -> Optional[str]:
+        """Đổi URL thành đường dẫn file trong root (bỏ tiền tố base, chặn thoát khỏi root)."""
+        url_path = unquote(urlsplit(self.path).path)
+        base = self.server.options.base
+        if base != "/" and url_path.startswith(base):
+            url_path = "/" + url_path[len(base):]
+        root = os.path.realpath(self.server.options.root)
+        path = os.path.realpath(os.path.join(root, url_path.lstrip("/")))
+        if path != root and not path.startswith(root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        return path if os.path.isfile(path) else None
+
+    def _select_variant(self, path: str) -> _FileInfo:
+        """Chọn bản nén sẵn (.br/.gz cạnh file hoặc trong asset manifest) theo Accept-Encoding; Range luôn dùng bản gốc."""
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        content_hash = self.server.content_hash(path)
+        identity = _FileInfo(path, os.path.getsize(path), f'"{content_hash}"', content_type)
+        if "Range" in self.headers:
+            return identity
+
+        accepted = {token.split(";")[0].strip() for token in self.headers.get("Accept-Encoding", "").split(",")}
+        entry = self.server.manifest_entry(path)
+        manifest_variants = entry.get("encodings", {}) if entry and entry["hash"] == content_hash else {}
+        for encoding, suffix in ENCODING_SUFFIXES:
+            if encoding not in accepted:
+                continue
+            candidates = [path + suffix]
+            if encoding in manifest_variants:
+                candidates.append(os.path.join(os.path.dirname(path), manifest_variants[encoding]["file"]))
+            for candidate in candidates:
+                if os.path.isfile(candidate):
+                    return _FileInfo(candidate, os.path.getsize(candidate), f'"{content_hash}-{encoding}"', content_type, encoding)
+        return identity
+
+    def _parse_range(self, size: int) -> Optional[Tuple[int, int]]:
+        """Một đoạn byte (đầu, cuối) từ header Range; None nếu không có/không hợp lệ; (-1, -1) nếu ngoài kích thước file."""
+        match = RANGE_PATTERN.match(self.headers.get("Range", "").strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        start_text, end_text = match.groups()
+        if not start_text:
+            length = int(end_text)
+            if length == 0:
+                return (-1, -1)
+            return (max(size - length, 0), size - 1)
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+        if start >= size or end < start:
+            return (-1, -1)
+        return (start, end)
+
+    def _respond(self, send_body: bool) -> Tuple[int, int, Optional[str]]:
+        path = self._resolve()
+        if path is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return HTTPStatus.NOT_FOUND, 0, None
+
+        info = self._select_variant(path)
+        cache_control = "public, max-age=31536000, immutable" if HASHED_NAME_PATTERN.search(os.path.basename(path)) else "no-cache"
+        common_headers = {
+            "ETag": info.etag,
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+            "Last-Modified": formatdate(os.path.getmtime(path), usegmt=True),
+        }
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and (if_none_match.strip() == "*" or info.etag in [tag.strip() for tag in if_none_match.split(",")]):
+            self._send_empty(HTTPStatus.NOT_MODIFIED, common_headers)
+            return HTTPStatus.NOT_MODIFIED, 0, info.encoding
+
+        status = HTTPStatus.OK
+        start, end = 0, info.size - 1
+        byte_range = self._parse_range(info.size)
+        if_range = self.headers.get("If-Range")
+        if byte_range is not None and (not if_range or if_range.strip() == info.etag):
+            if byte_range == (-1, -1):
+                self._send_empty(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {"Content-Range": f"bytes */{info.size}"})
+                return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, 0, None
+            status = HTTPStatus.PARTIAL_CONTENT
+            start, end = byte_range
+            common_headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+
+        length = max(end - start + 1, 0)
+        self._throttle_latency()
+        self.send_response(status)
+        self.send_header("Content-Type", info.content_type)
+        self.send_header("Content-Length", str(length))
+        if info.encoding:
+            self.send_header("Content-Encoding", info.encoding)
+        for name, value in common_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if not send_body:
+            return status, 0, info.encoding
+        return status, self._send_file(info.path, start, length), info.encoding
+
+    def _send_empty(self, status: int, headers: Optional[Dict[str, str]] = None) -> None:
+        self._throttle_latency()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _throttle_latency(self) -> None:
+        if self.server.options.latency_ms > 0:
+            time.sleep(self.server.options.latency_ms / 1000)
+
+    def _send_file(self, path: str, start: int, length: int) -> int:
+        """Gửi một đoạn file theo từng khối, giới hạn băng thông nếu được cấu hình."""
+        bandwidth = self.server.options.bandwidth_kbps * 1024
+        sent = 0
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            f.seek(start)
+            while sent < length:
+                block = f.read(min(SEND_CHUNK_SIZE, length - sent))
+                if not block:
+                    break
+                try:
+                    self.wfile.write(block)
+                except (BrokenPipeError, ConnectionResetError):
+                    break
+                sent += len(block)
+                if bandwidth > 0:
+                    # Ngủ tới thời điểm lẽ ra đã gửi xong `sent` byte với băng thông giới hạn
+                    delay = sent / bandwidth - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+        return sent
+
+
+def create_server(options: ServeOptions, host: str = "127.0.0.1", port: int = 8000) -> ArtifactServer:
+    return ArtifactServer((host, port), options)
+
+
+def serve(options: ServeOptions, host: str = "127.0.0.1", port: int = 8000) -> None:
+    """Chạy server cho tới khi Ctrl+C."""
+    server = create_server(options, host, port)
+    throttle = []
+    if options.latency_ms:
+        throttle.append(f"trễ {options.latency_ms:g} ms")
+    if options.bandwidth_kbps:
+        throttle.append(f"{options.bandwidth_kbps:g} KB/s")
+    logger.info(
+        f"🚀 Đang phục vụ {options.root} tại http://{host}:{server.server_address[1]}{options.base}"
+        + (f" (giả lập mạng: {', '.join(throttle)})" if throttle else "")
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("👋 Dừng server.")
+    finally:
+        server.server_close()
@@ -0,0 +1,52 @@
+# Path: tests/test_artifact_server.py
+import gzip
+import http.client
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.server.artifact_server import ServeOptions, create_server
+
+
+def _request(port, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_range_etag_and_precompressed_variants(tmp_path):
+    body = b"SQLite format 3\x00" + b"x" * 5000
+    (tmp_path / "content.db").write_bytes(body)
+    (tmp_path / "content.db.gz").write_bytes(gzip.compress(body))
+
+    server = create_server(ServeOptions(str(tmp_path), "/gioibon/"), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    try:
+        status, headers, data = _request(port, "/gioibon/content.db")
+        assert status == 200 and data == body and headers["Accept-Ranges"] == "bytes"
+        etag = headers["ETag"]
+
+        assert _request(port, "/content.db", {"If-None-Match": etag})[0] == 304
+
+        status, headers, data = _request(port, "/content.db", {"Range": "bytes=0-15"})
+        assert status == 206 and data == body[:16]
+        assert headers["Content-Range"] == f"bytes 0-15/{len(body)}"
+        assert _request(port, "/content.db", {"Range": "bytes=-10"})[2] == body[-10:]
+        assert _request(port, "/content.db", {"Range": f"bytes={len(body)}-"})[0] == 416
+
+        status, headers, data = _request(port, "/content.db", {"Accept-Encoding": "gzip"})
+        assert headers["Content-Encoding"] == "gzip" and gzip.decompress(data) == body
+        assert headers["ETag"] != etag
+
+        assert _request(port, "/../content.db.gz/../../etc/passwd")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
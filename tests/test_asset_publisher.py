@@ -0,0 +1,59 @@
+# Path: tests/test_asset_publisher.py
+import gzip
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.asset_publisher import publish_assets
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_publish_assets_hashes_compresses_and_prunes(tmp_path):
+    out = str(tmp_path)
+    _write(os.path.join(out, "content.db"), "segment " * 200)
+
+    first = publish_assets(out, ["content.db", "missing.json"])
+    entry = first["assets"]["content.db"]
+    assert list(first["assets"]) == ["content.db"]
+    assert entry["file"] == f"content.{entry['hash'][:12]}.db"
+    with gzip.open(os.path.join(out, entry["encodings"]["gzip"]["file"]), "rt", encoding="utf-8") as f:
+        assert f.read() == "segment " * 200
+
+    assert publish_assets(out, ["content.db"]) == first
+
+    # Bản trước vẫn được giữ cho client còn manifest cũ, bản cũ hơn nữa bị dọn
+    _write(os.path.join(out, "content.db"), "segment " * 300)
+    second = publish_assets(out, ["content.db"])["assets"]["content.db"]
+    _write(os.path.join(out, "content.db"), "segment " * 400)
+    third = publish_assets(out, ["content.db"])["assets"]["content.db"]
+    files = set(os.listdir(out))
+    assert {second["file"], third["file"]} <= files
+    assert entry["file"] not in files and entry["encodings"]["gzip"]["file"] not in files
+
+
+def test_hashed_copy_is_immutable_and_checked_before_reuse(tmp_path):
+    out = str(tmp_path)
+    _write(os.path.join(out, "content.db"), "segment " * 200)
+    entry = publish_assets(out, ["content.db"])["assets"]["content.db"]
+    hashed_path = os.path.join(out, entry["file"])
+
+    # Builder sửa file gốc tại chỗ: bản theo hash là bản copy nên không đổi theo
+    with open(os.path.join(out, "content.db"), "r+b") as f:
+        f.write(b"SEGMENT")
+    with open(hashed_path, "r", encoding="utf-8") as f:
+        assert f.read() == "segment " * 200
+
+    # Bản hash đã có nhưng nội dung không khớp tên (VD: hardlink cũ bị sửa) thì được ghi lại, bản nén cũ bị bỏ
+    _write(os.path.join(out, "content.db"), "segment " * 200)
+    _write(hashed_path, "corrupted")
+    again = publish_assets(out, ["content.db"])["assets"]["content.db"]
+    assert again["file"] == entry["file"]
+    with open(hashed_path, "r", encoding="utf-8") as f:
+        assert f.read() == "segment " * 200
+    with gzip.open(os.path.join(out, again["encodings"]["gzip"]["file"]), "rt", encoding="utf-8") as f:
+        assert f.read() == "segment " * 200
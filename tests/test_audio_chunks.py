@@ -0,0 +1,71 @@
+# Path: tests/test_audio_chunks.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.audio_chunks import ChunkOptions, chunk_manifest_path, composite_audio_name, split_chunks
+from src.data_builder.mp3_frames import mp3_duration_ms
+from src.data_builder.records import SegmentRecord
+from src.data_builder.timepoints import marks_path, save_marks
+from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.writer import DataWriter
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono, không CRC: mỗi frame 96 byte, 576 mẫu (24 ms)
+HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+
+
+def _clip(frames=25):
+    side_info = bytes(9)
+    return b"ID3\x03\x00\x00\x00\x00\x00\x00" + (HEADER + side_info + bytes([0x55]) * 83) * frames
+
+
+def test_chunked_segment_is_assembled_and_listed(tmp_path):
+    tts = TTSGenerator("", str(tmp_path), offline=True, chunking=ChunkOptions(min_segment_chars=20, min_chars=16))
+    text = "Vị tỳ khưu nào, khi đã thọ trì, phạm tội pācittiya."
+    assert split_chunks(text, tts.chunking) == ["Vị tỳ khưu nào, khi đã thọ trì,", "phạm tội pācittiya."]
+    (job,) = tts.plan_segment(text)
+    assert len(job.chunks) == 2 and job.filename == composite_audio_name([chunk.filename for chunk in job.chunks])
+
+    # Chunk chưa có trong cache: không ghép được; có đủ chunk thì ghép mà không cần API
+    assert tts.synthesize_jobs([job]) == 0 and not tts.is_cached(job.filename)
+    for chunk in job.chunks:
+        (tmp_path / chunk.filename).write_bytes(_clip())
+    assert tts.synthesize_jobs([job]) == 1
+    assert mp3_duration_ms((tmp_path / job.filename).read_bytes()) == 2 * 600
+
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), str(tmp_path))
+    writer.write_content([SegmentRecord(1, "<p>{}</p>", "text", text, job.filename, text, 0, None, None, None)])
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        chunk_names = [chunk.filename for chunk in job.chunks]
+        assert conn.execute("SELECT chunks FROM content_chunks").fetchall() == [(" ".join(chunk_names),)]
+        assert conn.execute("SELECT COUNT(*) FROM audio_files").fetchone()[0] == 3
+    finally:
+        conn.close()
+    assert writer.cache_audio_names() == {job.filename, *chunk_names}
+
+
+def test_clean_prunes_chunk_manifests_and_marks_of_unused_audio(tmp_path):
+    tts = TTSGenerator("", str(tmp_path), offline=True, chunking=ChunkOptions(min_segment_chars=20, min_chars=16))
+    (job,) = tts.plan_segment("Vị tỳ khưu nào, khi đã thọ trì, phạm tội pācittiya.")
+    (old,) = tts.plan_segment("Vị tỳ khưu nào đã thọ trì giới bổn, phạm tội dukkaṭa.")
+    for planned in (job, old):
+        for chunk in planned.chunks:
+            (tmp_path / chunk.filename).write_bytes(_clip())
+            save_marks(marks_path(str(tmp_path), chunk.filename), [{"markName": "0", "timeSeconds": 0}])
+        assert tts.synthesize_jobs([planned]) == 1
+
+    # Chỉ job còn dùng: audio, chunk manifest và mốc thời gian (của chunk và audio ghép) của audio cũ là rác
+    live = [job.filename, *(chunk.filename for chunk in job.chunks)]
+    garbage = tts.get_garbage_files(live)
+    old_chunks = [chunk.filename for chunk in old.chunks if chunk.filename not in live]
+    expected = [old.filename, *old_chunks, os.path.relpath(chunk_manifest_path(str(tmp_path), old.filename), tmp_path)]
+    expected += [os.path.relpath(marks_path(str(tmp_path), name), tmp_path) for name in [old.filename, *old_chunks]]
+    assert sorted(garbage) == sorted(expected)
+
+    assert tts.remove_files(garbage) == len(garbage)
+    assert tts.get_garbage_files(live) == []
+    assert os.path.exists(chunk_manifest_path(str(tmp_path), job.filename))
+    assert all(os.path.exists(marks_path(str(tmp_path), name)) for name in live)
@@ -0,0 +1,57 @@
+# Path: tests/test_audio_export.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from mutagen.id3 import ID3
+
+from src.data_builder.audio_export import export_audio
+from src.data_builder.tts_generator import TTSGenerator
+
+VOICE = "vi-VN-Chirp3-HD-Charon"
+
+
+def _make_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """CREATE TABLE headings (uid INTEGER PRIMARY KEY, text TEXT);
+           CREATE TABLE rules (id INTEGER PRIMARY KEY, acronym TEXT);
+           CREATE TABLE contents (uid INTEGER PRIMARY KEY, html TEXT, label TEXT, segment TEXT, heading_id INTEGER, rule_id INTEGER);
+           INSERT INTO headings VALUES (1, 'Tụng đọc');
+           INSERT INTO rules VALUES (1, 'Pr 1');
+           INSERT INTO contents VALUES (1, '<h2>Tụng đọc</h2>', 'title', 'Tụng đọc', 1, NULL);
+           INSERT INTO contents VALUES (2, '<p>a</p>', 'pr1', 'Vị tỳ khưu nào hành dâm.', 1, 1);
+           INSERT INTO contents VALUES (3, '<p>b</p>', 'pr1-2', 'Vị ấy là người bất cộng trú.', 1, 1);"""
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_export_reuses_cache_and_only_retags_changes(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_TTS_API_KEY", raising=False)
+    db_path, audio_tmp = str(tmp_path / "content.db"), tmp_path / "audio-tmp"
+    out_dir, tagged_dir = str(tmp_path / "out"), str(tmp_path / "tagged")
+    _make_db(db_path)
+
+    tts = TTSGenerator(str(tmp_path / "unused"), str(audio_tmp), offline=True, voices=[VOICE])
+    for segment in ("Vị tỳ khưu nào hành dâm.", "Vị ấy là người bất cộng trú."):
+        job = tts.plan_segment(segment, "<p>", "pr1")[0]
+        (audio_tmp / job.filename).write_bytes(b"\xff\xfb" + b"\x00" * 400)
+    cache_before = {p.name: p.read_bytes() for p in audio_tmp.iterdir()}
+
+    first = export_audio(db_path, str(audio_tmp), out_dir, tagged_dir, VOICE, workers=2)
+    assert (first.tracks, first.tagged, first.linked, first.missing) == (2, 2, 2, 0)
+    assert sorted(os.listdir(out_dir)) == ["001_tung_oc_pr_1.mp3", "002_tung_oc_pr_1.mp3"]
+    tags = ID3(os.path.join(out_dir, "002_tung_oc_pr_1.mp3"))
+    assert tags["TRCK"].text == ["002"] and tags.getall("USLT")[0].text == "Vị ấy là người bất cộng trú."
+    # File trong cache dùng chung không bị gắn thẻ
+    assert {p.name: p.read_bytes() for p in audio_tmp.iterdir()} == cache_before
+
+    second = export_audio(db_path, str(audio_tmp), out_dir, tagged_dir, VOICE, workers=2)
+    assert (second.tagged, second.linked, second.unchanged) == (0, 0, 2)
+
+    third = export_audio(db_path, str(audio_tmp), out_dir, tagged_dir, VOICE, album="Khác", workers=1)
+    assert (third.tagged, third.linked) == (2, 2)
+    assert len(os.listdir(tagged_dir)) == 2
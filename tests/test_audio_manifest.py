@@ -0,0 +1,56 @@
+# Path: tests/test_audio_manifest.py
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.audio_manifest import diff_audio_manifest
+from src.data_builder.records import HeadingRecord, RuleRecord, SegmentRecord
+from src.data_builder.writer import DataWriter
+
+RULES = [
+    RuleRecord("pc", 0, "Pc", "Pācittiya", "Ưng đối trị", ""),
+    RuleRecord("pc1", 1, "Pc 1", "", "", "pc"),
+    RuleRecord("pc2", 1, "Pc 2", "", "", "pc"),
+    RuleRecord("np1", 1, "Np 1", "", "", "np"),
+]
+
+
+def _segment(uid: int, audio: str, rule_id: str) -> SegmentRecord:
+    return SegmentRecord(uid, "<p>{}</p>", "text", f"Đoạn {uid}.", audio, "", 0, None, 1, rule_id)
+
+
+def _build(tmp_path, segments, files):
+    final_dir = tmp_path / "web" / "audio"
+    final_dir.mkdir(parents=True, exist_ok=True)
+    for name in os.listdir(final_dir):
+        os.remove(final_dir / name)
+    for name, data in files.items():
+        (final_dir / name).write_bytes(data)
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), str(final_dir), str(final_dir))
+    writer.write_content(segments, RULES, [HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn")])
+    writer.save_audio_manifest()
+    with open(writer.audio_manifest_path(), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_manifest_diff_only_walks_changed_subtrees(tmp_path):
+    segments = [_segment(1, "a.mp3", "pc"), _segment(2, "b.mp3", "pc1"), _segment(3, "c.mp3", "pc2"), _segment(4, "d.mp3", "np1")]
+    files = {"a.mp3": b"a", "b.mp3": b"b", "c.mp3": b"c", "d.mp3": b"d"}
+    old = _build(tmp_path, segments, files)
+
+    assert set(old["groups"]) == {"pc", "np"}
+    assert set(old["groups"]["pc"]["rules"]) == {"pc", "pc1", "pc2"}
+    assert diff_audio_manifest(old, old) == ([], [], 1)
+    assert diff_audio_manifest(None, old)[0] == ["a.mp3", "b.mp3", "c.mp3", "d.mp3"]
+
+    # Đổi audio của pc2: nhánh np không được duyệt, pc và pc1 trong nhánh pc được bỏ qua nhờ hash trùng
+    segments[2] = _segment(3, "e.mp3", "pc2")
+    new = _build(tmp_path, segments, {**files, "e.mp3": b"e"})
+    assert new["groups"]["np"]["hash"] == old["groups"]["np"]["hash"]
+    assert diff_audio_manifest(old, new) == (["e.mp3"], ["c.mp3"], 1 + 2 + 3 + 2)
+
+    # File chuyển sang điều luật khác với cùng nội dung thì không tải lại
+    moved = _build(tmp_path, [_segment(1, "a.mp3", "pc"), _segment(2, "b.mp3", "np1"), _segment(3, "c.mp3", "pc2"), _segment(4, "d.mp3", "np1")], files)
+    assert diff_audio_manifest(old, moved)[:2] == ([], [])
@@ -0,0 +1,46 @@
+# Path: tests/test_audio_profiles.py
+import hashlib
+import os
+import sys
+import zipfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.audio_profiles import AUDIO_PROFILES, profile_audio_name, resolve_audio_profiles
+from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.writer import DataWriter
+
+VOICE = "vi-VN-Chirp3-HD-Charon"
+
+
+def test_default_profile_keeps_cache_names_and_others_extend_the_key(tmp_path):
+    tts = TTSGenerator("", str(tmp_path), offline=True, voices=[VOICE], profiles=resolve_audio_profiles(["default", "mobile"]))
+    jobs = tts.plan_segment_profiles("Vị tỳ khưu nào hành dâm.", "<p>", "pr1")
+    legacy = hashlib.sha256(f"{jobs[0].text}|{VOICE}|vi-VN".encode("utf-8")).hexdigest()[:16] + ".mp3"
+
+    assert [job.filename for job in jobs] == [legacy, profile_audio_name(legacy, AUDIO_PROFILES["mobile"])]
+    assert jobs[1].filename.endswith(".ogg") and jobs[1].profile.audio_config() == {"audioEncoding": "OGG_OPUS", "sampleRateHertz": 16000}
+    assert jobs[0].profile.audio_config() == {"audioEncoding": "MP3"}
+    assert profile_audio_name(legacy, AUDIO_PROFILES["hq"]) != jobs[1].filename
+
+
+def test_writer_zips_one_pack_per_profile_and_records_sizes(tmp_path):
+    tmp_dir, final_dir = tmp_path / "audio-tmp", tmp_path / "web" / "audio"
+    tmp_dir.mkdir()
+    final_dir.mkdir(parents=True)
+    mobile = AUDIO_PROFILES["mobile"]
+    (final_dir / "a.mp3").write_bytes(b"m" * 300)
+    (tmp_dir / profile_audio_name("a.mp3", mobile)).write_bytes(b"o" * 100)
+
+    writer = DataWriter(
+        str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), str(tmp_dir), str(final_dir),
+        audio_profiles=resolve_audio_profiles(["default", "mobile"])
+    )
+    writer.voice_audio_names = {writer.voices[0]: {"a.mp3"}}
+    writer.zip_audio_bundles()
+
+    assert [os.path.basename(p) for p in writer.bundle_paths()] == ["audio.zip", "audio-mobile.zip"]
+    with zipfile.ZipFile(tmp_path / "web" / "audio-mobile.zip") as zipf:
+        assert zipf.namelist() == [profile_audio_name("a.mp3", mobile)]
+    counters = writer.telemetry.to_dict()["counters"]
+    assert counters["audio_profile.default.bytes"] == 300 and counters["audio_profile.mobile.bytes"] == 100
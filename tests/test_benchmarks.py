@@ -0,0 +1,74 @@
+# Path: tests/test_benchmarks.py
+import csv
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.benchmarks.synthetic_corpus import generate_synthetic_corpus
+from src.benchmarks.builder_benchmark import compare_with_baseline, run_builder_benchmark
+from src.benchmarks.query_benchmark import check_query_report, fts_search_query
+
+BASE_TSV = os.path.join(os.path.dirname(__file__), "..", "data", "content", "content_source.tsv")
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+
+def test_synthetic_corpus_keeps_structure_and_is_deterministic(tmp_path):
+    base = _read(BASE_TSV)
+    first, second = str(tmp_path / "a.tsv"), str(tmp_path / "b.tsv")
+
+    assert generate_synthetic_corpus(BASE_TSV, first, 3) == 3 * len(base)
+    generate_synthetic_corpus(BASE_TSV, second, 3)
+    with open(first, encoding="utf-8") as a, open(second, encoding="utf-8") as b:
+        assert a.read() == b.read()
+
+    rows = _read(first)
+    copy = rows[len(base):2 * len(base)]
+    assert [r["html"] for r in copy] == [r["html"] for r in base]
+    assert rows[:len(base)] == base
+    # Rule được đánh số lại, các đặc trưng đánh dấu (trích dẫn, lựa chọn) giữ nguyên số lượng
+    assert "pj1001-name" in {r["label"] for r in copy}
+    for orig, synth in zip(base, copy):
+        for char in "‘’[]()":
+            assert orig["segment"].count(char) == synth["segment"].count(char)
+
+
+def test_builder_benchmark_runs_offline_pipeline():
+    # Chạy cả pipeline (TTS giả lập -> DataWriter.save) ở kích thước nhỏ nhất để bắt lỗi lệch chữ ký với TTSGenerator
+    report = run_builder_benchmark(BASE_TSV, RULE_GROUPS, scales=[1])
+    seconds = report["scales"]["1"]["seconds"]
+    assert report["scales"]["1"]["rows"] == len(_read(BASE_TSV))
+    assert {"process_tsv_cold", "process_tsv", "writer_save"} <= set(seconds)
+
+
+def test_compare_with_baseline_flags_regressions():
+    baseline = {
+        "thresholds": {"default": 0.25, "hint": 1.0},
+        "scales": {"1": {"seconds": {"hint": 1.0, "quote": 1.0}, "us_per_row": {"hint": 10.0, "quote": 10.0}}},
+    }
+    report = {"scales": {"1": {"seconds": {"hint": 1.5, "quote": 1.5}, "us_per_row": {"hint": 15.0, "quote": 15.0}}}}
+    regressions = compare_with_baseline(report, baseline)
+    assert len(regressions) == 1 and "quote" in regressions[0]
+
+
+def test_query_check_flags_new_full_scan_and_latency():
+    assert "MATCH '\"tỳ khưu\"'" in fts_search_query("tỳ* 'khưu'")
+    assert fts_search_query("\"*") is None
+
+    baseline = {"thresholds": {"latency": 1.0}, "queries": {
+        "load": {"full_scans": ["c"], "p95_ms": 5.0},
+        "search_fts_single": {"full_scans": [], "p95_ms": 1.0},
+    }}
+    report = {"queries": {
+        "load": {"full_scans": ["c"], "p95_ms": 9.0, "plan": ["SCAN c"]},
+        "search_fts_single": {"full_scans": ["c"], "p95_ms": 1.2, "plan": ["SCAN c"]},
+    }}
+    problems = check_query_report(report, baseline)
+    assert len(problems) == 1 and "search_fts_single" in problems[0]
+    report["queries"]["load"]["p95_ms"] = 12.0
+    assert len(check_query_report(report, baseline)) == 2
@@ -0,0 +1,33 @@
+# Path: tests/test_build_graph.py
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.build_graph import BuildGraph
+
+
+def test_stage_reruns_only_when_inputs_or_outputs_change(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    output = tmp_path / "out.txt"
+    output.write_text("x")
+
+    graph = BuildGraph(state_path)
+    first = graph.decide("tsv", "fp1", [str(output)])
+    assert first.run
+    graph.mark_done(first)
+    graph.save()
+
+    graph = BuildGraph(state_path)
+    assert not graph.decide("tsv", "fp1", [str(output)]).run
+    assert graph.decide("tsv", "fp2", [str(output)]).run
+
+    output.unlink()
+    assert graph.decide("tsv", "fp1", [str(output)]).run
+
+
+def test_force_and_derived_stages(tmp_path):
+    graph = BuildGraph(str(tmp_path / "state.json"), force=True)
+    tsv = graph.decide("tsv", "fp")
+    assert tsv.run and tsv.reason == "--force"
+    assert graph.derive("process", [tsv]).run
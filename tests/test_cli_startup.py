@@ -0,0 +1,33 @@
+# Path: tests/test_cli_startup.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Ngân sách thời gian import của src.main (µs, cộng dồn theo -X importtime). Hiện tại ~12 ms,
+# trước khi chuyển sang import lười là ~190 ms; ngân sách rộng để không phụ thuộc máy chạy CI.
+IMPORT_BUDGET_US = 80_000
+# Các module nặng chỉ được nạp khi một lệnh thực sự cần
+HEAVY_MODULES = ("pydantic", "requests", "dotenv", "mutagen", "src.data_builder", "src.benchmarks")
+
+
+def _import_times(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_is_lazy_and_within_budget():
+    times = _import_times("src.main")
+    heavy = sorted(name for name in times if name.startswith(HEAVY_MODULES))
+    assert heavy == []
+    assert times["src.main"] < IMPORT_BUDGET_US
@@ -0,0 +1,48 @@
+# Path: tests/test_corpus_builder.py
+import csv
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.corpus_builder import build_corpora
+from src.data_builder.models import CorpusConfig
+from src.data_builder.telemetry import Telemetry
+from src.data_builder.tts_generator import TTSGenerator
+
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+SHARED = [("<p>{}</p>", "pc1", "Vị tỳ khưu nào nói dối, phạm tội pācittiya."), ("<p>{}</p>", "pc2", "Vị tỳ khưu nào mắng nhiếc, phạm tội pācittiya.")]
+
+
+def _corpus(tmp_path, name, rows):
+    source = tmp_path / f"{name}.tsv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["html", "label", "segment"])
+        writer.writerows(rows)
+    return CorpusConfig(
+        id=name, source=str(source), rule_groups=RULE_GROUPS, tsv_out=str(tmp_path / name / "content.tsv"), output_dir=str(tmp_path / name / "web")
+    )
+
+
+def test_text_shared_by_corpora_is_synthesized_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_TTS_API_KEY", "test")
+    fetched = []
+
+    def fetch(self, text, output_filepath, voice_name=None, profile=None):
+        fetched.append(os.path.basename(output_filepath))
+        with open(output_filepath, "wb") as f:
+            f.write(text.encode("utf-8"))
+        return True
+
+    monkeypatch.setattr(TTSGenerator, "_fetch_audio_from_api", fetch)
+    bhikkhu = _corpus(tmp_path, "bhikkhu", SHARED + [("<p>{}</p>", "pc3", "Vị tỳ khưu nào nói đâm thọc, phạm tội pācittiya.")])
+    bhikkhuni = _corpus(tmp_path, "bhikkhuni", SHARED + [("<p>{}</p>", "pc4", "Vị tỳ khưu ni nào nói đâm thọc, phạm tội pācittiya.")])
+    telemetry = Telemetry()
+    results = build_corpora([bhikkhu, bhikkhuni], str(tmp_path / "audio-tmp"), telemetry=telemetry)
+
+    # Mỗi corpus lập 3 job, hàng đợi chung loại trùng 2 đoạn giống nhau: chỉ gọi API 4 lần
+    assert telemetry.counters["tts.jobs"] == 6
+    assert len(fetched) == len(set(fetched)) == 4
+    shared = set(results[0].audio_names) & set(results[1].audio_names)
+    assert len(shared) == 2 and shared <= set(fetched)
@@ -0,0 +1,65 @@
+# Path: tests/test_db_layout.py
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.benchmarks.query_benchmark import fts_search_query, joined_fts_search_query, joined_like_search_query, like_search_query
+from src.data_builder.db_layout import RANGE_PAGE_SIZE
+from src.data_builder.records import SegmentRecord, RuleRecord, HeadingRecord
+from src.data_builder.writer import DataWriter
+
+
+def _segments(count, text="Tỳ khưu"):
+    return [
+        SegmentRecord(uid, "<p>{}</p>", "text", f"{text} {uid} " * 40, "skip", f"{text} {uid}", 0, None, 1, None)
+        for uid in range(1, count + 1)
+    ]
+
+
+def _rows(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_range_layout_keeps_data_and_writes_manifest(tmp_path):
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), db_layout="range")
+    headings = [HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn")]
+    writer.write_content(_segments(300), [RuleRecord("pj", 0, "Pj", "Pārājika", "Bất cộng trụ", None)], headings)
+
+    assert _rows(writer.db_path, "PRAGMA page_size") == [(RANGE_PAGE_SIZE,)]
+    assert len(_rows(writer.db_path, "SELECT uid FROM contents")) == 300
+    assert len(_rows(writer.db_path, "SELECT rowid FROM contents_fts WHERE contents_fts MATCH 'khưu'")) == 300
+    # search_rows mang sẵn breadcrumbs/rule, FTS dựng lại sau khi sắp xếp file: tìm kiếm không join cho cùng kết quả với dạng join cũ
+    assert _rows(writer.db_path, fts_search_query("khưu 7")) == _rows(writer.db_path, joined_fts_search_query("khưu 7"))
+    assert _rows(writer.db_path, like_search_query("khưu 7")) == _rows(writer.db_path, joined_like_search_query("khưu 7"))
+    assert _rows(writer.db_path, "SELECT breadcrumbs FROM contents_fts WHERE rowid = 7") == [("Giới bổn",)]
+
+    with open(writer.page_manifest_path(), encoding="utf-8") as f:
+        manifest = json.load(f)
+    first_screen = manifest["first_screen"]
+    assert first_screen["rows"] == 100
+    assert first_screen["pages"][0][0] == 1
+    # Cây heading nằm ngay sau trang schema, màn hình đầu chỉ cần một phần file
+    assert manifest["objects"]["headings"][0][0] == 2
+    assert first_screen["bytes"] < manifest["file_size"]
+
+    # Cập nhật delta (chế độ watch) giữ nguyên bố cục và FTS
+    writer.update_content(_segments(1, "Tỳ khưu ni"), removed_uids=[300])
+    assert _rows(writer.db_path, "PRAGMA page_size") == [(RANGE_PAGE_SIZE,)]
+    assert _rows(writer.db_path, "SELECT rowid FROM contents_fts WHERE contents_fts MATCH 'ni'") == [(1,)]
+    assert len(_rows(writer.db_path, "SELECT uid FROM contents")) == 299
+    assert _rows(writer.db_path, "SELECT breadcrumbs FROM contents_fts WHERE rowid = 1") == [("Giới bổn",)]
+    # Thay headings: breadcrumbs phi chuẩn hoá trong search_rows được ghi lại theo
+    writer.update_content([], headings=[HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn Tỳ khưu")])
+    assert _rows(writer.db_path, "SELECT DISTINCT breadcrumbs FROM contents_fts") == [("Giới bổn Tỳ khưu",)]
+    assert _rows(writer.db_path, fts_search_query("khưu 7")) == _rows(writer.db_path, joined_fts_search_query("khưu 7"))
+
+    # Quay về bố cục mặc định thì manifest cũ bị xoá
+    DataWriter(writer.tsv_path, writer.db_path).write_content(_segments(10), [], headings)
+    assert not os.path.exists(writer.page_manifest_path())
@@ -0,0 +1,59 @@
+# Path: tests/test_mp3_frames.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.mp3_frames import TrimOptions, mp3_duration_ms, parse_mp3_frames, trim_silence, trim_source_name, trimmed_audio_name
+from src.data_builder.records import SegmentRecord
+from src.data_builder.tts_generator import TTSGenerator, TTSJob
+from src.data_builder.writer import DataWriter
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono, không CRC: mỗi frame 96 byte, 576 mẫu (24 ms)
+HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+
+
+def _frame(part2_3_length, main_data_begin=0):
+    bits = f"{main_data_begin:08b}0{part2_3_length:012b}".ljust(72, "0")
+    side_info = int(bits, 2).to_bytes(9, "big")
+    return HEADER + side_info + bytes([0x55]) * 83
+
+
+def _clip(main_data_begin=0):
+    frames = [_frame(0) for _ in range(10)] + [_frame(500) for _ in range(5)] + [_frame(0) for _ in range(10)]
+    frames[8] = _frame(0, main_data_begin)
+    return b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"".join(frames)
+
+
+def test_trim_keeps_padding_and_bit_reservoir():
+    data = _clip()
+    start, frames = parse_mp3_frames(data)
+    assert start == 10 and len(frames) == 25 and mp3_duration_ms(data) == 600
+
+    # Giữ 40 ms (2 frame) mỗi đầu: frame 8..16
+    trimmed = trim_silence(data, TrimOptions(silence_bits=40, keep_ms=40))
+    assert trimmed[:10] == data[:10] and mp3_duration_ms(trimmed) == 9 * 24
+
+    # Frame đầu tham chiếu 100 byte dữ liệu của các frame trước (83 byte/frame) -> giữ thêm 2 frame
+    assert mp3_duration_ms(trim_silence(_clip(main_data_begin=100), TrimOptions(40, 40))) == 11 * 24
+    assert trim_silence(b"not an mp3") is None
+
+
+def test_trimmed_variant_is_cached_and_durations_stored(tmp_path):
+    (tmp_path / "0123456789abcdef.mp3").write_bytes(_clip())
+    tts = TTSGenerator("", str(tmp_path), offline=True, trim=TrimOptions())
+    name = tts.trimmed(TTSJob("x", "0123456789abcdef.mp3"))
+    assert name == trimmed_audio_name("0123456789abcdef.mp3") and trim_source_name(name) == "0123456789abcdef.mp3"
+    assert tts.trimmed(TTSJob("x", "0123456789abcdef.mp3")) == name
+    assert tts.telemetry.counters["audio.trim.created"] == 1 and tts.telemetry.counters["audio.trim.cache_hit"] == 1
+
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), str(tmp_path))
+    writer.write_content([SegmentRecord(1, "<p>{}</p>", "text", "x", name, "x", 0, None, None, None)])
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        size = os.path.getsize(tmp_path / name)
+        assert conn.execute("SELECT * FROM audio_files").fetchall() == [(name, 9 * 24, size)]
+    finally:
+        conn.close()
+    assert writer.cache_audio_names() == {name, "0123456789abcdef.mp3"}
@@ -0,0 +1,27 @@
+# Path: tests/test_records.py
+import os
+import sys
+
+import pytest
+from pydantic import ValidationError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.records import CONTENT_COLUMN_COUNT, SegmentRecord, iter_validated
+from src.data_builder.writer import TSV_FIELDNAMES
+
+
+def test_segment_record_is_a_row_and_validates_on_demand():
+    record = SegmentRecord(7, "<p>{}</p>", "pc1", "Vị tỳ khưu nào...", "0123456789abcdef.mp3", "Vị tỳ khưu nào...", 1, "Vị tỳ khưu nào", 3, "pc1")
+
+    # Các cột đầu trùng thứ tự cột TSV/bảng contents: ghi thẳng bằng csv.writer/executemany
+    assert list(record._fields[:CONTENT_COLUMN_COUNT]) == TSV_FIELDNAMES
+    assert record.voice_audio == () and record._replace(voice_audio=("x.mp3",))[:CONTENT_COLUMN_COUNT] == record[:CONTENT_COLUMN_COUNT]
+
+    # Pydantic chỉ chạy khi cần (theo từng record): trả lại đúng record gốc, báo lỗi với dữ liệu sai kiểu
+    assert record.to_model().uid == 7
+    assert list(iter_validated([record])) == [record]
+    validated = iter_validated([record, record._replace(has_hint="có")])
+    assert next(validated) is record
+    with pytest.raises(ValidationError):
+        next(validated)
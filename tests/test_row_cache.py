@@ -0,0 +1,64 @@
+# Path: tests/test_row_cache.py
+import os
+import shutil
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.processors import TsvContentProcessor
+from src.data_builder.row_cache import RowCache
+from src.data_builder.tts_generator import TTSGenerator
+
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+
+# Trích dẫn mở ở dòng 2 và đóng ở dòng 3: dòng 3 chỉ render đúng khi trạng thái quote được mang sang
+ROWS = [
+    ("<p>{}</p>", "pc1", "Vị tỳ khưu nào nói dối, phạm tội pācittiya."),
+    ("<p>{}</p>", "pc2", "Đức Thế Tôn dạy: ‘Này các tỳ khưu, các ngươi chớ"),
+    ("<p>{}</p>", "pc3", "nói lời mắng nhiếc.’ Vị nào vi phạm thì phạm tội."),
+]
+
+
+def _render(tmp_path, rule_groups, cache=None):
+    processor = TsvContentProcessor(TTSGenerator("", str(tmp_path / "audio-tmp"), offline=True), rule_groups, row_cache=cache)
+    records = list(processor.iter_rows(ROWS))
+    return records, processor.quote_proc.in_quote
+
+
+def _cache(tmp_path, rule_groups, fingerprint=None):
+    return RowCache(str(tmp_path / "row_cache.db"), fingerprint, rule_groups_path=rule_groups)
+
+
+def test_row_cache_hits_restore_quote_state_and_invalidate(tmp_path):
+    rule_groups = str(tmp_path / "rule_groups.tsv")
+    shutil.copy(RULE_GROUPS, rule_groups)
+    expected, expected_quote = _render(tmp_path, rule_groups)
+    assert "quote-text" in expected[2].segment_html
+
+    cache = _cache(tmp_path, rule_groups)
+    assert _render(tmp_path, rule_groups, cache) == (expected, expected_quote)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.close()
+
+    # Lần sau: mọi dòng lấy từ cache, trạng thái quote (mở ở dòng 2) được khôi phục để dòng 3 cũng trúng cache
+    cache = _cache(tmp_path, rule_groups)
+    assert _render(tmp_path, rule_groups, cache) == (expected, expected_quote)
+    assert (cache.hits, cache.misses) == (3, 0)
+    key = cache.make_key(*ROWS[2], True)
+    assert cache.get(key).segment_html == expected[2].segment_html
+    assert cache.get(cache.make_key(*ROWS[2], False)) is None
+    cache.close()
+
+    # Sửa rule groups: fingerprint đổi nên mọi dòng bị tính lại
+    with open(rule_groups, "a", encoding="utf-8") as f:
+        f.write("pc999\t1\tPc 999\t\t\tpc\n")
+    cache = _cache(tmp_path, rule_groups)
+    assert cache.make_key(*ROWS[2], True) != key
+    assert _render(tmp_path, rule_groups, cache)[0] == expected
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.close()
+
+    # Đổi mã nguồn bộ xử lý (fingerprint khác) cũng làm mất hiệu lực cache
+    cache = _cache(tmp_path, rule_groups, fingerprint="other-code")
+    assert cache.get(cache.make_key(*ROWS[2], True)) is None
+    cache.close()
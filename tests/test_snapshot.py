@@ -0,0 +1,29 @@
+# Path: tests/test_snapshot.py
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.records import SegmentRecord, HeadingRecord
+from src.data_builder.snapshot import write_snapshot
+from src.data_builder.writer import DataWriter
+
+
+def test_snapshot_is_rewritten_only_when_content_changes(tmp_path):
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"))
+    segments = [SegmentRecord(uid, "<p>{}</p>", "text", f"Câu {uid}", "skip", f"Câu {uid}", 0, None, 1, None) for uid in range(1, 151)]
+    writer.write_content(segments, [], [HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn")])
+
+    assert write_snapshot(writer.db_path, writer.snapshot_path())
+    with open(writer.snapshot_path(), encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["total_segments"] == 150
+    assert len(snapshot["segments"]["rows"]) == 100
+    assert snapshot["segments"]["columns"][-1] == "heading_level"
+    assert snapshot["segments"]["rows"][0][-1] == 1
+    assert snapshot["headings"]["rows"] == [[1, "Giới bổn", 1, None, "Giới bổn"]]
+
+    assert not write_snapshot(writer.db_path, writer.snapshot_path())
+    writer.write_content(segments[:120], [], [])
+    assert write_snapshot(writer.db_path, writer.snapshot_path())
@@ -0,0 +1,44 @@
+# Path: tests/test_spell_index.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.records import SegmentRecord, HeadingRecord
+from src.data_builder.spell_index import correct_query, delete_variants, edit_distance, fold_diacritics, suggest_words
+from src.data_builder.writer import DataWriter
+
+
+def test_fold_and_delete_variants():
+    assert fold_diacritics("Saṅghādisesa Đức") == "sanghadisesa duc"
+    assert delete_variants("abc", 1) == {"abc", "bc", "ac", "ab"}
+    # Chỉ xoá trong tiền tố 7 ký tự
+    assert max(len(v) for v in delete_variants("pacittiya")) == 7
+    assert edit_distance("kathina", "kahtina") == 1
+
+
+def test_suggestions_from_written_db(tmp_path):
+    segments = [
+        SegmentRecord(1, "<p>{}</p>", "text", "Tội pācittiya của vị tỳ khưu.", "skip", "", 0, None, 1, None),
+        SegmentRecord(2, "<p>{}</p>", "text", "Tội saṅghādisesa trong hội chúng.", "skip", "", 0, None, 1, None),
+        SegmentRecord(3, "<p>{}</p>", "text", "Tôi hỏi thăm, của chung.", "skip", "", 0, None, 1, None),
+    ]
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "content.db"))
+    writer.write_content(segments, [], [HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn")])
+
+    # Chỉ mục nằm ở file riêng, content.db không chứa bảng spell_*
+    assert writer.spell_index_path() == str(tmp_path / "content_spell.db")
+    conn, spell_conn = sqlite3.connect(writer.db_path), sqlite3.connect(writer.spell_index_path())
+    try:
+        assert not conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'spell%'").fetchall()
+        assert suggest_words(spell_conn, "pacitiya")[0].word == "pācittiya"
+        assert suggest_words(spell_conn, "sangadisesa")[0].word == "saṅghādisesa"
+        assert suggest_words(spell_conn, "xyzxyz") == []
+        # Cụm từ: chọn tổ hợp thực sự xuất hiện trong corpus
+        assert correct_query(spell_conn, conn, "hoi chung") == "hội chúng"
+        assert correct_query(spell_conn, conn, "ty khuu") == "tỳ khưu"
+        assert correct_query(spell_conn, conn, "tỳ khưu") is None
+    finally:
+        conn.close()
+        spell_conn.close()
@@ -0,0 +1,38 @@
+# Path: tests/test_telemetry.py
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import src.main as cli
+
+SOURCE_TSV = os.path.join(os.path.dirname(__file__), "..", "data", "content", "content_source.tsv")
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+STAGES = ["process", "version", "snapshot", "audio-sync", "audio-manifest", "zip", "assets"]
+
+
+def test_build_report_records_each_stage_once(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_TTS_API_KEY", raising=False)
+    source = tmp_path / "source.tsv"
+    with open(SOURCE_TSV, "r", encoding="utf-8") as src, open(source, "w", encoding="utf-8") as dst:
+        dst.writelines(line for _, line in zip(range(51), src))
+    web_dir, cache_dir = tmp_path / "web", tmp_path / "build-cache"
+    for name, value in {
+        "TSV_SOURCE": source, "RULE_GROUPS_SOURCE": RULE_GROUPS, "TSV_OUT": tmp_path / "content.tsv",
+        "WEB_DATA_DIR": web_dir, "AUDIO_FINAL_DIR": web_dir / "audio", "AUDIO_TMP_DIR": tmp_path / "audio-tmp",
+        "BUILD_CACHE_DIR": cache_dir, "BUILD_REPORT": cache_dir / "build_report.json", "CORPUS_MANIFEST": tmp_path / "corpora.json",
+    }.items():
+        monkeypatch.setattr(cli, name, str(value))
+
+    cli.run_data_builder()
+    with open(cache_dir / "build_report.json", "r", encoding="utf-8") as f:
+        report = json.load(f)
+
+    # Mỗi bước xuất bản được ghi một lần (tên có gạch nối), CPU được ghi rõ là CPU của cả tiến trình
+    stages = report["corpora"]["bhikkhu"]["stages"]
+    assert [name for name in stages if name in STAGES] == STAGES
+    assert not [name for name in stages if "_" in name]
+    assert all(stage["calls"] == 1 and "process_cpu_ms" in stage for name, stage in stages.items() if name in STAGES)
+    assert {"plan", "build"} <= set(report["build"]["stages"]) and "process_cpu_ms" in report
+    assert report["segments"] == 50
@@ -0,0 +1,75 @@
+# Path: tests/test_timepoints.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.records import SegmentRecord
+from src.data_builder.timepoints import decode_timepoints, load_marks, marks_path, save_marks
+from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.writer import DataWriter
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono, không CRC: mỗi frame 96 byte, 576 mẫu (24 ms)
+HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+
+
+def _clip(frames=25):
+    side_info = bytes(9)
+    return b"ID3\x03\x00\x00\x00\x00\x00\x00" + (HEADER + side_info + bytes([0x55]) * 83) * frames
+
+
+def test_timepoints_from_duration_or_api_marks(tmp_path):
+    (tmp_path / "0123456789abcdef.mp3").write_bytes(_clip())
+    writer = DataWriter(str(tmp_path / "content.tsv"), str(tmp_path / "web" / "content.db"), str(tmp_path), timepoints=True)
+    record = SegmentRecord(1, "<p>{}</p>", "text", "Vị tỳ khưu.", "0123456789abcdef.mp3", "x", 0, None, None, None)
+    writer.write_content([record])
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        (points,) = conn.execute("SELECT points FROM content_timepoints").fetchone()
+    finally:
+        conn.close()
+    # 600 ms chia theo trọng số từ: "Vị"=2, "tỳ"=2, "khưu."=5+5
+    assert decode_timepoints(points) == [(0, 0), (3, 86), (6, 171)]
+
+    save_marks(marks_path(str(tmp_path), "0123456789abcdef.mp3"), [{"markName": str(i), "timeSeconds": i * 0.25} for i in range(3)])
+    writer.write_content([record])
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        assert decode_timepoints(conn.execute("SELECT points FROM content_timepoints").fetchone()[0]) == [(0, 0), (3, 250), (6, 500)]
+    finally:
+        conn.close()
+
+
+def test_cached_audio_without_marks_is_synthesized_again(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_TTS_API_KEY", "test")
+    tts = TTSGenerator("", str(tmp_path), voices=["vi-VN-Standard-A"], timepoints=True)
+    (job,) = tts.plan_segment("Vị tỳ khưu.", "<p>{}</p>", "text")
+    # Audio sinh từ trước khi bật --timepoints: có trong cache nhưng chưa có mốc
+    (tmp_path / job.filename).write_bytes(_clip())
+    assert tts.is_cached(job.filename) and tts.is_pending(job)
+
+    calls = []
+
+    def fetch(text, output_filepath, voice_name=None, profile=None):
+        calls.append(output_filepath)
+        save_marks(marks_path(str(tmp_path), job.filename), [{"markName": "0", "timeSeconds": 0}])
+        return True
+
+    monkeypatch.setattr(tts, "_fetch_audio_from_api", fetch)
+    assert tts.synthesize_jobs([job]) == 1
+    assert len(calls) == 1 and load_marks(marks_path(str(tmp_path), job.filename)) is not None
+    assert not tts.is_pending(job) and tts.synthesize_jobs([job]) == 0
+
+    # Giọng Chirp không hỗ trợ <mark>: audio trong cache dùng luôn, mốc được ước lượng
+    chirp = TTSGenerator("", str(tmp_path), timepoints=True)
+    (chirp_job,) = chirp.plan_segment("Vị tỳ khưu.", "<p>{}</p>", "text")
+    (tmp_path / chirp_job.filename).write_bytes(_clip())
+    assert not chirp.needs_marks(chirp_job) and not chirp.is_pending(chirp_job)
+
+    # API lỗi khi lấy lại mốc: vẫn giữ audio đã có
+    other = TTSGenerator("", str(tmp_path), voices=["vi-VN-Wavenet-A"], timepoints=True)
+    (other_job,) = other.plan_segment("Vị tỳ khưu.", "<p>{}</p>", "text")
+    (tmp_path / other_job.filename).write_bytes(_clip())
+    monkeypatch.setattr(other, "_fetch_audio_from_api", lambda *args: False)
+    assert other.synthesize(other_job) and (tmp_path / other_job.filename).exists()
@@ -0,0 +1,71 @@
+# Path: tests/test_token_stream.py
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.processors.token_stream import TokenStream
+from src.data_builder.processors.quote_processor import QuoteStateProcessor
+from src.data_builder.processors.addition_processor import AdditionProcessor
+from src.data_builder.processors.selection_processor import SelectionProcessor
+from src.data_builder.processors.list_processor import ListProcessor
+
+
+def test_parse_and_serialize_roundtrip():
+    text = "Hôm nay là ngày <b>mười lăm</b> là ngày lễ Uposatha."
+    stream = TokenStream.parse(text)
+    assert [t.is_tag for t in stream] == [False, True, False, True, False]
+    assert stream.serialize() == text
+
+
+def test_adjacent_text_is_merged():
+    stream = TokenStream()
+    stream.append_text("ab")
+    stream.append_text("cd")
+    stream.append_tag("<b>")
+    assert [t.value for t in stream] == ["abcd", "<b>"]
+
+
+def test_quote_state_spans_segments():
+    proc = QuoteStateProcessor()
+    first = proc.process(TokenStream.parse("nói: ‘Các vị")).serialize()
+    second = proc.process(TokenStream.parse("trong sạch.’ xong")).serialize()
+    assert first == "nói: <span class='quote-text'>‘Các vị</span>"
+    assert second == "<span class='quote-text'>trong sạch.’</span> xong"
+
+
+def test_selection_over_injected_spans():
+    tokens = TokenStream.parse("[của hai nam gia chủ hoặc (của hai) nữ gia chủ] không")
+    tokens = AdditionProcessor().process(tokens, False, "x", "<p>{}</p>")
+    html = SelectionProcessor().process(tokens).serialize()
+    assert html == (
+        "<div class='selection-group is-stacked'>"
+        "<div class='selection-row'><span class='selection-item'>của hai nam gia chủ</span></div>"
+        "<div class='selection-row'><span class='selection-or'>hoặc</span> "
+        "<span class='selection-item'><span class='trans-addition'>của hai</span> nữ gia chủ</span></div>"
+        "</div> không"
+    )
+
+
+def test_duyenco_list_promotes_template():
+    proc = ListProcessor()
+    tokens = proc.process_duyenco(TokenStream.parse(" một; hai ;"))
+    assert tokens.serialize() == (
+        "<ol class='duyenco-list multi-item'>"
+        "<li><span class='duyenco-content'>một</span></li>"
+        "<li><span class='duyenco-content'>hai</span></li></ol>"
+    )
+    assert proc.ensure_valid_html("<p>{}</p>", tokens) == "<div>{}</div>"
+
+
+def test_pairs_do_not_span_newlines():
+    # Giống regex `\((.*?)\)` không DOTALL của bản cũ: cặp ngoặc không vắt qua xuống dòng
+    for text in ["(a\nb) c", "(a\n(b) c", "(a(b\nc) d", "[a\nb] (c)"]:
+        stream = TokenStream.parse(text)
+        expected = [(m.start(), m.end() - 1) for m in re.finditer(r"\(.*?\)", text)]
+        assert [(start[1], end[1]) for start, end in stream.find_pairs("(", ")")] == expected
+    assert TokenStream.parse("[a\nb]").find_pairs("[", "]") == []
+
+    tokens = AdditionProcessor().process(TokenStream.parse("vị ấy (nói\nrằng) xong"), False, "x", "<p>{}</p>")
+    assert tokens.serialize() == "vị ấy (nói\nrằng) xong"
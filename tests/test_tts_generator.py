@@ -0,0 +1,64 @@
+# Path: tests/test_tts_generator.py
+import csv
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config.constants import DEFAULT_TTS_VOICE
+from src.data_builder.corpus_builder import build_corpus, corpus_db_path
+from src.data_builder.models import CorpusConfig
+from src.data_builder.tts_generator import TTSGenerator
+
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+SECOND_VOICE = "vi-VN-Standard-A"
+ROWS = [
+    ("<h2>{}</h2>", "pc-name", "Ưng đối trị"),
+    ("<p>{}</p>", "pc1", "Vị tỳ khưu nào nói dối, phạm tội pācittiya."),
+    ("<p>{}</p>", "pc2", "Vị tỳ khưu nào mắng nhiếc, phạm tội pācittiya."),
+]
+
+
+def _build(tmp_path, name, voices):
+    source = tmp_path / "source.tsv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["html", "label", "segment"])
+        writer.writerows(ROWS)
+    corpus = CorpusConfig(
+        id=name, source=str(source), rule_groups=RULE_GROUPS, tsv_out=str(tmp_path / name / "content.tsv"),
+        output_dir=str(tmp_path / name / "web"), voices=voices
+    )
+    build_corpus(corpus, str(tmp_path / "audio-tmp"))
+    conn = sqlite3.connect(corpus_db_path(corpus))
+    try:
+        contents = conn.execute("SELECT uid, audio_name FROM contents ORDER BY uid").fetchall()
+        content_audio = conn.execute("SELECT voice, uid, audio_name FROM content_audio ORDER BY voice, uid").fetchall()
+        return contents, content_audio
+    finally:
+        conn.close()
+
+
+def test_second_voice_lands_in_content_audio_and_default_keeps_legacy_names(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_TTS_API_KEY", raising=False)
+    audio_tmp_dir = tmp_path / "audio-tmp"
+    audio_tmp_dir.mkdir()
+    tts = TTSGenerator("", str(audio_tmp_dir), offline=True, voices=[DEFAULT_TTS_VOICE, SECOND_VOICE])
+    planned = {}
+    for uid, (html, label, segment) in enumerate(ROWS, start=1):
+        for job in tts.plan_segment(segment, html, label):
+            (audio_tmp_dir / job.filename).write_bytes(job.filename.encode("utf-8"))
+            planned[(job.voice, uid)] = job.filename
+    assert set(planned) == {(voice, uid) for voice in (DEFAULT_TTS_VOICE, SECOND_VOICE) for uid in (2, 3)}
+
+    legacy_contents, legacy_audio = _build(tmp_path, "legacy", [DEFAULT_TTS_VOICE])
+    contents, content_audio = _build(tmp_path, "voices", [DEFAULT_TTS_VOICE, SECOND_VOICE])
+
+    # Giọng chính giữ nguyên tên file như khi chỉ có một giọng (cache audio và client cũ vẫn dùng được)
+    assert contents == legacy_contents == [(1, "skip"), (2, planned[(DEFAULT_TTS_VOICE, 2)]), (3, planned[(DEFAULT_TTS_VOICE, 3)])]
+    assert [row for row in content_audio if row[0] == DEFAULT_TTS_VOICE] == legacy_audio
+    # Giọng phụ chỉ nằm trong content_audio, với tên file riêng
+    second = [row for row in content_audio if row[0] == SECOND_VOICE]
+    assert second == [(SECOND_VOICE, uid, planned[(SECOND_VOICE, uid)]) for uid in (2, 3)]
+    assert not {name for _, _, name in second} & {name for _, name in contents}
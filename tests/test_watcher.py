@@ -0,0 +1,127 @@
+# Path: tests/test_watcher.py
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_builder.corpus_builder import build_corpus, corpus_db_path
+from src.data_builder.models import CorpusConfig
+from src.data_builder.processors.base import clean_brackets, strip_html_tags
+from src.data_builder.tts_generator import TTSGenerator
+from src.data_builder.watcher import CorpusWatcher
+
+SOURCE_TSV = os.path.join(os.path.dirname(__file__), "..", "data", "content", "content_source.tsv")
+RULE_GROUPS = os.path.join(os.path.dirname(__file__), "..", "data", "content", "rule_groups.tsv")
+TABLES = ["contents", "content_audio", "content_chunks", "audio_files", "headings", "rules", "search_rows"]
+
+
+def _write_rows(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["html", "label", "segment"])
+        writer.writerows(rows)
+
+
+def _seed_audio(rows, audio_tmp_dir):
+    """Audio giả trong cache cho mọi dòng (không gọi API)."""
+    tts = TTSGenerator("", audio_tmp_dir, offline=True)
+    for html, label, segment in rows:
+        for job in tts.plan_segment(strip_html_tags(clean_brackets(segment)), html, label):
+            with open(os.path.join(audio_tmp_dir, job.filename), "wb") as f:
+                f.write(job.filename.encode("utf-8"))
+
+
+def _corpus(tmp_path, source, name):
+    return CorpusConfig(
+        id=name, source=str(source), rule_groups=RULE_GROUPS, tsv_out=str(tmp_path / name / "content.tsv"), output_dir=str(tmp_path / name / "web")
+    )
+
+
+def _dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("INSERT INTO contents_fts(contents_fts) VALUES ('integrity-check')")
+        conn.execute("ATTACH DATABASE ? AS spell", (db_path.replace("content.db", "content_spell.db"),))
+        tables = TABLES + ["spell.spell_words", "spell.spell_deletes"]
+        dump = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall() for table in tables}
+        dump["fts"] = conn.execute("SELECT rowid FROM contents_fts WHERE contents_fts MATCH 'kiểmtra' ORDER BY rowid").fetchall()
+        return dump
+    finally:
+        conn.close()
+
+
+def _published_assets(corpus):
+    with open(os.path.join(os.path.dirname(corpus_db_path(corpus)), "asset-manifest.json"), "r", encoding="utf-8") as f:
+        assets = json.load(f)["assets"]
+    return {name: assets[name] for name in ("content.db", "content_spell.db")}
+
+
+def test_watch_delta_matches_full_build(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_TTS_API_KEY", raising=False)
+    with open(SOURCE_TSV, "r", encoding="utf-8") as f:
+        rows = [(row["html"], row["label"], row["segment"]) for row in csv.DictReader(f, delimiter="\t")][:200]
+    audio_tmp_dir = tmp_path / "audio-tmp"
+    audio_tmp_dir.mkdir()
+    source = tmp_path / "source.tsv"
+    _write_rows(source, rows)
+    _seed_audio(rows, str(audio_tmp_dir))
+
+    corpus = _corpus(tmp_path, source, "watch")
+    state_dir = str(tmp_path / "state")
+    watcher = CorpusWatcher(corpus, str(audio_tmp_dir), str(tmp_path / "cache"), state_dir)
+    try:
+        watcher.start()
+        published = _published_assets(corpus)
+        inodes = [os.stat(path).st_ino for path in (corpus_db_path(corpus), watcher.writer.spell_index_path())]
+
+        # Sửa một dòng (thêm từ mới), xoá một dòng và thêm một dòng cuối
+        edited = list(rows)
+        html, label, segment = edited[20]
+        edited[20] = (html, label, segment + " Kiểmtra")
+        del edited[40]
+        edited.append(("<p>{}</p>", "ketthuc", "Dòng mới thêm."))
+        _seed_audio(edited, str(audio_tmp_dir))
+        _write_rows(source, edited)
+        watcher.rebuild()
+
+        # Delta được áp lên bản sao rồi thay thế nguyên tử (không ghi dở vào file đang phục vụ),
+        # bản theo hash của lần xuất bản trước không bị sửa
+        for path, inode in zip((corpus_db_path(corpus), watcher.writer.spell_index_path()), inodes):
+            assert os.stat(path).st_ino != inode, path
+        output_dir = os.path.dirname(corpus_db_path(corpus))
+        for name, entry in published.items():
+            assert _published_assets(corpus)[name]["hash"] != entry["hash"]
+            with open(os.path.join(output_dir, entry["file"]), "rb") as f:
+                assert hashlib.md5(f.read()).hexdigest() == entry["hash"], name
+
+        # Sửa một dòng giữa file (không đổi số dòng): chỉ xử lý lại tới khi trạng thái bộ xử lý khớp checkpoint cũ
+        updates, lookups = [], []
+        update_content, lookup = watcher.writer.update_content, watcher.tts.process_segment_voices
+        monkeypatch.setattr(watcher.writer, "update_content", lambda changed, *args: updates.append(changed) or update_content(changed, *args))
+        monkeypatch.setattr(watcher.tts, "process_segment_voices", lambda *args: lookups.append(args) or lookup(*args))
+        html, label, segment = edited[100]
+        edited[100] = (html, label, segment.replace("tỳ khưu", "tỳ-khưu"))
+        _seed_audio(edited, str(audio_tmp_dir))
+        _write_rows(source, edited)
+        watcher.rebuild()
+        assert [record.uid for record in updates[0]] == [101]
+        assert len(lookups) == 1
+    finally:
+        watcher.close()
+
+    # Kết quả giống hệt build đầy đủ từ cùng nguồn
+    full = _corpus(tmp_path, source, "full")
+    build_corpus(full, str(audio_tmp_dir))
+    watched, expected = _dump(corpus_db_path(corpus)), _dump(corpus_db_path(full))
+    assert watched["fts"] == [(21,)]
+    assert watched == expected
+    with open(corpus.tsv_out, "rb") as a, open(full.tsv_out, "rb") as b:
+        assert a.read() == b.read()
+
+    # Build state ghi nhận mọi bước (kể cả audio manifest, zip, asset manifest): `gioibon data` sau đó không chạy lại gì
+    report = build_corpus(corpus, str(audio_tmp_dir), state_dir=state_dir).report
+    assert report["counters"]["stages.run"] == 0
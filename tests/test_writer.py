@@ -0,0 +1,49 @@
+# Path: tests/test_writer.py
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import src.data_builder.writer as writer_module
+from src.data_builder.records import HeadingRecord, RuleRecord, SegmentRecord
+from src.data_builder.writer import INSERT_CHUNK_SIZE, DataWriter
+
+TABLES = ["contents", "content_audio", "audio_files", "headings", "rules"]
+
+
+def _segments(count):
+    return [
+        SegmentRecord(uid, "<p>{}</p>", "text", f"Đoạn {uid}.", f"{uid:016x}.mp3", f"Đoạn {uid}.", 1, f"Đoạn {uid}.", 1, "pc1")
+        for uid in range(1, count + 1)
+    ]
+
+
+def _write(tmp_path, name, segments):
+    audio_dir = tmp_path / "audio-tmp"
+    audio_dir.mkdir(exist_ok=True)
+    for segment in segments:
+        (audio_dir / segment.audio).write_bytes(segment.segment.encode("utf-8"))
+    writer = DataWriter(str(tmp_path / name / "content.tsv"), str(tmp_path / name / "content.db"), str(audio_dir))
+    # Generator: writer chỉ đọc dữ liệu theo dạng stream, từng chunk một
+    writer.write_content(iter(segments), [RuleRecord("pc1", 1, "Pc 1", "", "", None)], [HeadingRecord(1, "Giới bổn", 1, None, "Giới bổn")])
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        dump = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall() for table in TABLES}
+        dump["fts"] = conn.execute("SELECT rowid FROM contents_fts WHERE contents_fts MATCH '501' ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+    with open(writer.tsv_path, "rb") as f:
+        return dump, f.read()
+
+
+def test_chunked_write_matches_single_write(tmp_path, monkeypatch):
+    # Cắt ngang hai ranh giới chunk: 500 | 500 | 1
+    segments = _segments(2 * INSERT_CHUNK_SIZE + 1)
+    chunked = _write(tmp_path, "chunked", segments)
+    monkeypatch.setattr(writer_module, "INSERT_CHUNK_SIZE", len(segments) + 1)
+    single = _write(tmp_path, "single", segments)
+
+    assert chunked == single
+    assert len(chunked[0]["contents"]) == len(segments) and chunked[0]["fts"] == [(501,)]
+    assert chunked[1].count(b"\n") == len(segments) + 1
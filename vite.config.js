@@ -99,7 +99,7 @@ export default defineConfig(({ mode }) => {
                     // [FIX] Bỏ clientsClaim và skipWaiting để tránh xung đột với registerType: 'prompt'
                     navigateFallback: 'index.html',
                     globPatterns: ['**/*.{js,css,html,ico,png,svg,woff2,wasm,json}'], 
-                    globIgnores: ['**/node_modules/**/*', 'sw.js', 'workbox-*.js', '**/*_version.json', '**/*.db', '**/*.zip'],
+                    globIgnores: ['**/node_modules/**/*', 'sw.js', 'workbox-*.js', '**/*_version.json', '**/*.db', '**/*.zip', '**/asset-manifest.json', '**/app-content/*.*.json'],
                     maximumFileSizeToCacheInBytes: 5 * 1024 * 1024, 
                     runtimeCaching: [
                         // 1. Cache API ngoại lai: CSS của Google Fonts & FontAwesome
@@ -133,19 +133,30 @@ export default defineConfig(({ mode }) => {
                                 cacheableResponse: { statuses: [0, 200] }
                             }
                         },
-                        // 4. Cache file Database (content.db) cho offline
+                        // 4. Cache file Database (content.db, chỉ mục sửa chính tả content_spell.db) cho offline.
+                        //    Tên có hash nội dung (theo asset-manifest.json) không bao giờ đổi nội dung nên lấy thẳng từ cache
                         {
-                            urlPattern: ({ url }) => url.pathname.endsWith('content.db'),
+                            urlPattern: ({ url }) => /\/content(_spell)?\.[0-9a-f]{12}\.db$/.test(url.pathname),
+                            handler: 'CacheFirst',
+                            options: {
+                                cacheName: 'database-cache',
+                                expiration: { maxEntries: 4, maxAgeSeconds: 60 * 60 * 24 * 365 },
+                                cacheableResponse: { statuses: [0, 200] }
+                            }
+                        },
+                        // Tên cố định: chỉ dùng khi chưa có asset manifest (bản build cũ)
+                        {
+                            urlPattern: ({ url }) => url.pathname.endsWith('content.db') || url.pathname.endsWith('content_spell.db'),
                             handler: 'StaleWhileRevalidate',
                             options: {
                                 cacheName: 'database-cache',
-                                expiration: { maxEntries: 2, maxAgeSeconds: 60 * 60 * 24 * 365 },
+                                expiration: { maxEntries: 4, maxAgeSeconds: 60 * 60 * 24 * 365 },
                                 cacheableResponse: { statuses: [0, 200] }
                             }
                         },
-                        // 5. Cache Version Check
+                        // 5. Asset manifest: file duy nhất được hỏi lại server, bản cache giúp mở app ngoại tuyến vẫn ra đúng tên có hash
                         {
-                            urlPattern: ({ url }) => url.pathname.endsWith('_version.json'),
+                            urlPattern: ({ url }) => url.pathname.endsWith('/asset-manifest.json'),
                             handler: 'NetworkFirst',
                             options: {
                                 cacheName: 'version-check-cache',
@@ -1,12 +1,77 @@
 // Path: web/modules/data/content_loader.js
 import { SqliteConnection } from 'services/sqlite_connection.js';
 
+// Tham số chỉ mục sửa chính tả (khớp với src/data_builder/spell_index.py, sửa một bên phải sửa cả bên kia)
+const SPELL_MAX_DISTANCE = 2;
+const SPELL_PREFIX_LENGTH = 7;
+const MIN_WORD_LENGTH = 2;
+const SHORT_WORD_LENGTH = 4;
+const PHRASE_CANDIDATES = 3;
+const MAX_PHRASE_TOKENS = 4;
+// Chỉ mục sửa chính tả là file SQLite riêng (không nằm trong content.db), chỉ tải ở lần tìm kiếm đầu tiên không có kết quả
+const SPELL_DB_NAME = 'content_spell.db';
+
+// Chữ thường, bỏ dấu thanh/dấu phụ, đ -> d (VD: Saṅghādisesa -> sanghadisesa)
+function foldDiacritics(text) {
+    return text.toLowerCase().replace(/đ/g, 'd').normalize('NFD').replace(/[\u0300-\u036f]/g, '');
+}
+
+function wordMaxDistance(folded, maxDistance = SPELL_MAX_DISTANCE) {
+    return Array.from(folded).length <= SHORT_WORD_LENGTH ? Math.min(maxDistance, 1) : maxDistance;
+}
+
+// Các chuỗi thu được khi xoá 0..maxDistance ký tự trong tiền tố của từ
+function deleteVariants(word, maxDistance) {
+    const prefix = Array.from(word).slice(0, SPELL_PREFIX_LENGTH).join('');
+    const variants = new Set([prefix]);
+    let frontier = [prefix];
+    for (let d = 0; d < maxDistance; d++) {
+        const next = new Set();
+        for (const variant of frontier) {
+            const chars = Array.from(variant);
+            if (chars.length <= 1) continue;
+            for (let i = 0; i < chars.length; i++) {
+                next.add(chars.slice(0, i).concat(chars.slice(i + 1)).join(''));
+            }
+        }
+        next.forEach(v => variants.add(v));
+        frontier = [...next];
+    }
+    return [...variants];
+}
+
+// Khoảng cách Damerau-Levenshtein (optimal string alignment)
+function editDistance(a, b) {
+    const x = Array.from(a), y = Array.from(b);
+    let previous2 = [];
+    let previous = Array.from({ length: y.length + 1 }, (_, j) => j);
+    for (let i = 1; i <= x.length; i++) {
+        const current = [i];
+        for (let j = 1; j <= y.length; j++) {
+            const cost = x[i - 1] === y[j - 1] ? 0 : 1;
+            current[j] = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost);
+            if (i > 1 && j > 1 && x[i - 1] === y[j - 2] && x[i - 2] === y[j - 1]) {
+                current[j] = Math.min(current[j], previous2[j - 2] + 1);
+            }
+        }
+        previous2 = previous;
+        previous = current;
+    }
+    return previous[y.length];
+}
+
 export class ContentLoader {
     constructor(dbConnection) {
         this.db = dbConnection || new SqliteConnection();
+        this.spellDb = null;
         this.data = null;
     }
 
+    getSpellDb() {
+        if (!this.spellDb) this.spellDb = new SqliteConnection(SPELL_DB_NAME);
+        return this.spellDb;
+    }
+
     async load() {
         if (this.data) return this.data;
 
@@ -71,22 +136,20 @@ export class ContentLoader {
             const ftsMatch = `"${tokens.join(' ')}"`; 
             const limitClause = tokens.length >= 2 ? '' : 'LIMIT 51';
 
+            // contents_fts (external content trên search_rows) có sẵn breadcrumbs và thông tin rule (cột UNINDEXED): một lần tra FTS, không join
             const query = `
-                SELECT 
-                    c.uid as id, 
-                    c.segment as raw_segment,
-                    c.heading_id,
-                    h.breadcrumbs,
-                    r.id as rule_id,
-                    r.viet as rule_viet,
-                    r.pali as rule_pali,
-                    r.acronym as rule_acronym
-                FROM contents_fts fts
-                JOIN contents c ON fts.rowid = c.uid
-                LEFT JOIN headings h ON c.heading_id = h.uid
-                LEFT JOIN rules r ON c.rule_id = r.id
+                SELECT
+                    rowid as id,
+                    segment as raw_segment,
+                    heading_id,
+                    breadcrumbs,
+                    rule_id,
+                    rule_viet,
+                    rule_pali,
+                    rule_acronym
+                FROM contents_fts
                 WHERE contents_fts MATCH '${ftsMatch}'
-                ORDER BY fts.rank
+                ORDER BY rank
                 ${limitClause}
             `;
             const rows = await this.db.query(query);
@@ -99,20 +162,18 @@ export class ContentLoader {
                 const limitClause = tokens.length >= 2 ? '' : 'LIMIT 51';
                 const safeKeyword = keyword.replace(/'/g, "''");
                 const fallbackQuery = `
-                    SELECT 
-                        c.uid as id, 
-                        c.segment as raw_segment, 
-                        c.heading_id,
-                        h.breadcrumbs,
-                        r.id as rule_id,
-                        r.viet as rule_viet,
-                        r.pali as rule_pali,
-                        r.acronym as rule_acronym
-                    FROM contents c
-                    LEFT JOIN headings h ON c.heading_id = h.uid
-                    LEFT JOIN rules r ON c.rule_id = r.id
-                    WHERE c.segment LIKE '%${safeKeyword}%'
-                    ORDER BY c.uid ASC
+                    SELECT
+                        rowid as id,
+                        segment as raw_segment,
+                        heading_id,
+                        breadcrumbs,
+                        rule_id,
+                        rule_viet,
+                        rule_pali,
+                        rule_acronym
+                    FROM search_rows
+                    WHERE segment LIKE '%${safeKeyword}%'
+                    ORDER BY rowid ASC
                     ${limitClause}
                 `;
                 return await this.db.query(fallbackQuery) || [];
@@ -122,6 +183,65 @@ export class ContentLoader {
         }
     }
 
+    // Gợi ý sửa chính tả cho một từ: tra chỉ mục symmetric delete (spell_deletes) theo biến thể xoá của từ nhập,
+    // chỉ tính khoảng cách trên vài ứng viên trả về (không quét corpus)
+    async suggestWords(word, limit = 5) {
+        const folded = foldDiacritics(word);
+        if (Array.from(folded).length < MIN_WORD_LENGTH) return [];
+        const maxDistance = wordMaxDistance(folded);
+        const variants = deleteVariants(folded, maxDistance).sort();
+        const rows = await this.getSpellDb().query(
+            `SELECT DISTINCT w.word, w.folded, w.count
+             FROM spell_deletes d
+             JOIN spell_words w ON w.folded = d.folded
+             WHERE d.variant IN (${variants.map(() => '?').join(', ')})`,
+            variants
+        ) || [];
+        const lowered = word.toLowerCase();
+        const ranked = [];
+        for (const row of rows) {
+            const distance = editDistance(folded, row.folded);
+            if (distance <= wordMaxDistance(row.folded, maxDistance)) {
+                ranked.push({ word: row.word, distance, accent: editDistance(lowered, row.word), count: row.count });
+            }
+        }
+        ranked.sort((a, b) => a.distance - b.distance || a.accent - b.accent || b.count - a.count || (a.word < b.word ? -1 : a.word > b.word ? 1 : 0));
+        return ranked.slice(0, limit).map(({ word, distance, count }) => ({ word, distance, count }));
+    }
+
+    // Sửa từ khoá gõ sai/không dấu (VD: "pacitiya" -> "pācittiya", "hoi chung" -> "hội chúng"). Trả về null nếu không sửa gì
+    async suggestCorrection(keyword) {
+        try {
+            const tokens = keyword.toLowerCase().trim().split(/\s+/).filter(t => t.length > 0);
+            if (tokens.length === 0) return null;
+            const options = [];
+            for (const token of tokens) {
+                const words = (await this.suggestWords(token, PHRASE_CANDIDATES)).map(s => s.word);
+                options.push(words.length > 0 ? words : [token]);
+            }
+            let best = options.map(words => words[0]);
+            if (tokens.length > 1 && tokens.length <= MAX_PHRASE_TOKENS) {
+                // Ưu tiên tổ hợp có xuất hiện thành cụm trong corpus
+                const combos = options.reduce((acc, words) => acc.flatMap(prefix => words.map(w => [...prefix, w])), [[]]);
+                for (const phrase of combos) {
+                    const match = `"${phrase.join(' ').replace(/"/g, '')}"`;
+                    const hit = await this.db.query(`SELECT 1 FROM contents_fts WHERE contents_fts MATCH ? LIMIT 1`, [match]);
+                    if (hit && hit.length > 0) {
+                        best = phrase;
+                        break;
+                    }
+                }
+            }
+            const corrected = best.join(' ');
+            return corrected !== tokens.join(' ') ? corrected : null;
+        } catch (error) {
+            // Chưa tải được chỉ mục sửa chính tả (ngoại tuyến lần đầu, bản build cũ)
+            this.spellDb = null;
+            console.warn("Spell suggestion unavailable:", error);
+            return null;
+        }
+    }
+
     getAllSegments() {
         if (!this.data) return [];
         return this.data.filter(item => item.audio !== 'skip').map(item => ({
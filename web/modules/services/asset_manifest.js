@@ -0,0 +1,33 @@
+// Path: web/modules/services/asset_manifest.js
+import { BASE_URL } from 'core/config.js';
+
+// asset-manifest.json là file duy nhất cần kiểm tra lại với server (no-cache). Mọi artifact khác (content.db, content_spell.db,
+// manifest audio, audio.zip) được tải theo tên có hash nội dung trong manifest nên cache vĩnh viễn được (src/data_builder/asset_publisher.py)
+const ASSET_MANIFEST_URL = `${BASE_URL}app-content/asset-manifest.json`;
+
+let manifestPromise = null;
+
+/**
+ * Asset manifest của bản build hiện tại (tải một lần mỗi phiên, refresh = true để hỏi lại server).
+ * Trả về null khi không tải được (ngoại tuyến và Service Worker chưa cache, hoặc bản build cũ chưa có manifest).
+ */
+export function loadAssetManifest(refresh = false) {
+    if (!manifestPromise || refresh) {
+        manifestPromise = fetch(ASSET_MANIFEST_URL, { cache: 'no-cache' })
+            .then(response => response.ok ? response.json() : null)
+            .catch(() => null);
+    }
+    return manifestPromise;
+}
+
+// Mục của một artifact (file, hash, size) theo tên gốc, null nếu manifest không có
+export async function assetEntry(name, refresh = false) {
+    const manifest = await loadAssetManifest(refresh);
+    return manifest?.assets?.[name] || null;
+}
+
+// URL tải một artifact: tên có hash theo manifest, hoặc tên cố định khi chưa có manifest
+export async function assetUrl(name) {
+    const entry = await assetEntry(name);
+    return `${BASE_URL}app-content/${entry ? entry.file : name}`;
+}
@@ -1,9 +1,19 @@
 // Path: web/modules/services/audio_zip_loader.js
 import { BASE_URL } from 'core/config.js';
+import { assetUrl } from 'services/asset_manifest.js';
+
+// Manifest audio của lần đối chiếu thành công gần nhất (cây hash: nhóm điều luật -> điều luật -> file)
+const MANIFEST_STORAGE_KEY = 'audio_manifest';
+// Quá số file này thì tải cả audio.zip thay vì tải lẻ từng file
+const MAX_DIRECT_FETCH = 30;
+const FETCH_BATCH_SIZE = 3;
 
 /**
  * Tải ngầm file audio.zip, giải nén và đưa thẳng vào Service Worker Cache (Cache Storage)
  * Giúp ứng dụng hoạt động offline mượt mà và giảm thiểu RTT đáng kể.
+ *
+ * Khi đã có manifest audio của lần trước, chỉ so hash từ gốc xuống các nhánh thay đổi (giống diff_audio_manifest
+ * bên data_builder) rồi tải lẻ đúng các file đó: chi phí mỗi lần khởi động tỉ lệ với thay đổi, không phải với corpus.
  */
 export class AudioZipLoader {
     constructor(contentLoader) {
@@ -20,130 +30,254 @@ export class AudioZipLoader {
             // Đảm bảo Cache Storage đã sẵn sàng
             if (!('caches' in window)) return;
             const cache = await caches.open(this.cacheName);
-            
-            // 1. Lấy danh sách segment có audio từ DB hiện tại
-            const allSegments = this.contentLoader.getAllSegments();
-            const requiredAudioFiles = [...new Set(allSegments.map(s => s.audio).filter(a => a && a !== 'skip'))];
-
-            // ==========================================
-            // BƯỚC 1: DỌN DẸP CACHE RÁC
-            // ==========================================
-            const cachedRequests = await cache.keys();
-            let deletedCount = 0;
-            const existingCacheKeys = new Set();
-
-            for (const request of cachedRequests) {
-                const url = new URL(request.url);
-                const filename = url.pathname.split('/').pop();
-
-                // Nếu file trong cache là mp3 nhưng không nằm trong DB mới -> XÓA
-                if (filename && filename.endsWith('.mp3')) {
-                    if (!requiredAudioFiles.includes(filename)) {
-                        await cache.delete(request);
-                        deletedCount++;
-                    } else {
-                        existingCacheKeys.add(filename);
-                    }
-                }
-            }
 
-            if (deletedCount > 0) {
-                console.log(`🗑️ Đã dọn dẹp ${deletedCount} file audio cũ khỏi Cache.`);
+            const manifest = await this.fetchManifest();
+            const previous = manifest ? this.loadStoredManifest() : null;
+            if (manifest && previous && await this.reconcile(cache, previous, manifest)) {
+                this.storeManifest(manifest);
+                return;
             }
 
-            // ==========================================
-            // BƯỚC 2: KIỂM TRA FILE THIẾU
-            // ==========================================
-            const missingFiles = requiredAudioFiles.filter(f => !existingCacheKeys.has(f));
-            if (missingFiles.length === 0) {
-                console.log(`✨ Toàn bộ dữ liệu âm thanh đã sẵn sàng (Cached).`);
-                return;
+            // Lần đầu (hoặc thay đổi quá nhiều): dò toàn bộ cache và tải audio.zip
+            if (await this.syncFromZip(cache) && manifest) {
+                this.storeManifest(manifest);
             }
+        } catch (error) {
+            console.error("❌ Lỗi khi chạy Audio Zip Loader:", error);
+        } finally {
+            this.isProcessing = false;
+        }
+    }
 
-            console.log(`⬇️ Thiếu ${missingFiles.length} file. Bắt đầu tải và giải nén audio.zip...`);
-
-            // ==========================================
-            // BƯỚC 3: TẢI VÀ GIẢI NÉN ZIP
-            // ==========================================
-            // Sử dụng cache busting để đảm bảo luôn tải ZIP mới nhất
-            const zipUrl = `${BASE_URL}app-content/audio.zip?t=${Date.now()}`;
-            let response;
-            
-            try {
-                response = await fetch(zipUrl);
-            } catch (fetchError) {
-                // Xử lý êm ái khi đang offline (mất mạng sẽ ném lỗi TypeError ở đây)
-                console.warn(`⚠️ Đang ngoại tuyến hoặc lỗi kết nối. Sẽ tải audio.zip sau. (${fetchError.message})`);
-                return;
+    audioUrl(filename) {
+        return `${window.location.origin}${BASE_URL}app-content/audio/${filename}`;
+    }
+
+    async fetchManifest() {
+        try {
+            // Tên có hash theo asset manifest: đổi nội dung là đổi URL, không cần cache busting
+            const response = await fetch(await assetUrl('content_audio_manifest.json'));
+            return response.ok ? await response.json() : null;
+        } catch (e) {
+            return null; // Ngoại tuyến hoặc bản build cũ chưa có manifest
+        }
+    }
+
+    loadStoredManifest() {
+        try {
+            return JSON.parse(localStorage.getItem(MANIFEST_STORAGE_KEY));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    storeManifest(manifest) {
+        try {
+            localStorage.setItem(MANIFEST_STORAGE_KEY, JSON.stringify(manifest));
+        } catch (e) {
+            console.warn("⚠️ Không lưu được audio manifest:", e);
+        }
+    }
+
+    /**
+     * So hai manifest từ gốc xuống, bỏ qua nhánh (nhóm/điều luật) có hash trùng.
+     * Trả về { fetch, drop }: file cần tải và file bỏ khỏi cache.
+     */
+    diffManifest(old, manifest) {
+        if (old.version !== manifest.version || old.voice !== manifest.voice) return null;
+        if (old.hash === manifest.hash) return { fetch: [], drop: [] };
+
+        const changed = new Map();
+        const dropped = new Set();
+        const oldGroups = old.groups || {};
+        const newGroups = manifest.groups || {};
+        for (const groupId of new Set([...Object.keys(oldGroups), ...Object.keys(newGroups)])) {
+            const oldGroup = oldGroups[groupId];
+            const newGroup = newGroups[groupId];
+            if (oldGroup && newGroup && oldGroup.hash === newGroup.hash) continue;
+
+            const oldRules = oldGroup?.rules || {};
+            const newRules = newGroup?.rules || {};
+            for (const ruleId of new Set([...Object.keys(oldRules), ...Object.keys(newRules)])) {
+                const oldRule = oldRules[ruleId];
+                const newRule = newRules[ruleId];
+                if (oldRule && newRule && oldRule.hash === newRule.hash) continue;
+
+                const oldFiles = oldRule?.files || {};
+                const newFiles = newRule?.files || {};
+                for (const [name, hash] of Object.entries(newFiles)) {
+                    if (oldFiles[name] !== hash) changed.set(name, hash);
+                }
+                for (const name of Object.keys(oldFiles)) {
+                    if (!(name in newFiles)) dropped.add(name);
+                }
             }
-            
-            if (!response.ok) {
-                console.warn(`⚠️ Không thể tải audio.zip (${response.status}). Sẽ tải lại sau.`);
-                return;
+        }
+
+        // File chỉ chuyển sang điều luật khác (hoặc còn dùng ở nhánh không đổi) thì không tải lại, không xoá khỏi cache
+        const allFiles = (groups) => Object.values(groups).flatMap(group => Object.values(group.rules).flatMap(rule => Object.entries(rule.files)));
+        if (changed.size > 0) {
+            const cached = new Map(allFiles(oldGroups));
+            for (const [name, hash] of [...changed]) {
+                if (cached.get(name) === hash) changed.delete(name);
             }
+        }
+        if (dropped.size > 0) {
+            for (const [name] of allFiles(newGroups)) dropped.delete(name);
+        }
+        return { fetch: [...changed.keys()], drop: [...dropped] };
+    }
 
-            let blob = await response.blob();
-            
-            // Lấy đối tượng JSZip từ global window
-            const JSZip = window.JSZip;
-            if (!JSZip) {
-                console.error("❌ Thư viện JSZip chưa được tải vào global.");
-                blob = null; // Giải phóng bộ nhớ
-                return;
+    /**
+     * Đối chiếu theo manifest: xoá file bị bỏ, tải lẻ file mới/đổi vào cache.
+     * Trả về false nếu không đối chiếu được (manifest khác phiên bản, quá nhiều file, lỗi mạng) để quay về tải audio.zip.
+     */
+    async reconcile(cache, previous, manifest) {
+        const diff = this.diffManifest(previous, manifest);
+        if (!diff || diff.fetch.length > MAX_DIRECT_FETCH) return false;
+        if (diff.fetch.length === 0 && diff.drop.length === 0) {
+            console.log(`✨ Audio manifest không đổi (${manifest.hash}), bỏ qua kiểm tra cache.`);
+            return true;
+        }
+
+        for (const filename of diff.drop) {
+            await cache.delete(this.audioUrl(filename));
+        }
+        for (let i = 0; i < diff.fetch.length; i += FETCH_BATCH_SIZE) {
+            const batch = diff.fetch.slice(i, i + FETCH_BATCH_SIZE);
+            const results = await Promise.allSettled(batch.map(filename => cache.add(this.audioUrl(filename))));
+            if (results.some(result => result.status === 'rejected')) {
+                console.warn(`⚠️ Không tải được một số file audio thay đổi. Sẽ đối chiếu lại sau.`);
+                return false;
             }
+        }
+        console.log(`✅ Đối chiếu audio manifest: tải ${diff.fetch.length} file, xoá ${diff.drop.length} file khỏi Cache.`);
+        return true;
+    }
 
-            let jszip = new JSZip();
-            let zip = await jszip.loadAsync(blob);
-            
-            // Ép dọn dẹp biến blob khổng lồ do JSZip đã parse xong
-            blob = null; 
-            
-            let injectedCount = 0;
-
-            // ==========================================
-            // BƯỚC 4: BƠM FILE VÀO CACHE STORAGE
-            // ==========================================
-            for (const filename of missingFiles) {
-                const zipEntry = zip.file(filename);
-                if (zipEntry) {
-                    const audioBlob = await zipEntry.async("blob");
-                    
-                    // Tạo một Response giả lập để đưa vào Cache Storage.
-                    // URL này phải khớp ĐÚNG với định dạng URL mà ứng dụng gọi khi phát MP3.
-                    const fileUrl = `${window.location.origin}${BASE_URL}app-content/audio/${filename}`;
-                    
-                    const res = new Response(audioBlob, {
-                        status: 200,
-                        statusText: 'OK',
-                        headers: {
-                            'Content-Type': 'audio/mpeg',
-                            'Content-Length': audioBlob.size.toString(),
-                            'Accept-Ranges': 'bytes', // [FIX] Hỗ trợ Safari iOS
-                            'Cache-Control': 'max-age=31536000' // Cho phép cache vĩnh viễn (1 năm)
-                        }
-                    });
-
-                    await cache.put(fileUrl, res);
-                    injectedCount++;
-                    
-                    // [FIX iOS CRASH] Ép JS nhường Main Thread mỗi chu kỳ 
-                    // để hệ điều hành kích hoạt Garbage Collection, tránh tràn RAM
-                    if (injectedCount % 10 === 0) {
-                        await new Promise(resolve => setTimeout(resolve, 30));
-                    }
+    /**
+     * Dò toàn bộ cache theo danh sách audio trong DB rồi bổ sung file thiếu từ audio.zip.
+     * Trả về true khi cache đã đủ mọi file.
+     */
+    async syncFromZip(cache) {
+        // 1. Lấy danh sách segment có audio từ DB hiện tại
+        const allSegments = this.contentLoader.getAllSegments();
+        const requiredAudioFiles = [...new Set(allSegments.map(s => s.audio).filter(a => a && a !== 'skip'))];
+
+        // ==========================================
+        // BƯỚC 1: DỌN DẸP CACHE RÁC
+        // ==========================================
+        const cachedRequests = await cache.keys();
+        let deletedCount = 0;
+        const existingCacheKeys = new Set();
+
+        for (const request of cachedRequests) {
+            const url = new URL(request.url);
+            const filename = url.pathname.split('/').pop();
+
+            // Nếu file trong cache là mp3 nhưng không nằm trong DB mới -> XÓA
+            if (filename && filename.endsWith('.mp3')) {
+                if (!requiredAudioFiles.includes(filename)) {
+                    await cache.delete(request);
+                    deletedCount++;
+                } else {
+                    existingCacheKeys.add(filename);
                 }
             }
-            
-            // Xóa sổ toàn bộ JSZip object khỏi RAM sau khi xong việc
-            zip = null;
-            jszip = null;
+        }
 
-            console.log(`✅ Đã giải nén và lưu trực tiếp ${injectedCount} file âm thanh vào Cache để dùng Offline.`);
+        if (deletedCount > 0) {
+            console.log(`🗑️ Đã dọn dẹp ${deletedCount} file audio cũ khỏi Cache.`);
+        }
 
-        } catch (error) {
-            console.error("❌ Lỗi khi chạy Audio Zip Loader:", error);
-        } finally {
-            this.isProcessing = false;
+        // ==========================================
+        // BƯỚC 2: KIỂM TRA FILE THIẾU
+        // ==========================================
+        const missingFiles = requiredAudioFiles.filter(f => !existingCacheKeys.has(f));
+        if (missingFiles.length === 0) {
+            console.log(`✨ Toàn bộ dữ liệu âm thanh đã sẵn sàng (Cached).`);
+            return true;
+        }
+
+        console.log(`⬇️ Thiếu ${missingFiles.length} file. Bắt đầu tải và giải nén audio.zip...`);
+
+        // ==========================================
+        // BƯỚC 3: TẢI VÀ GIẢI NÉN ZIP
+        // ==========================================
+        // Tên có hash theo asset manifest: luôn là ZIP của bản build hiện tại, trình duyệt/CDN cache được
+        const zipUrl = await assetUrl('audio.zip');
+        let response;
+        
+        try {
+            response = await fetch(zipUrl);
+        } catch (fetchError) {
+            // Xử lý êm ái khi đang offline (mất mạng sẽ ném lỗi TypeError ở đây)
+            console.warn(`⚠️ Đang ngoại tuyến hoặc lỗi kết nối. Sẽ tải audio.zip sau. (${fetchError.message})`);
+            return false;
+        }
+        
+        if (!response.ok) {
+            console.warn(`⚠️ Không thể tải audio.zip (${response.status}). Sẽ tải lại sau.`);
+            return false;
+        }
+
+        let blob = await response.blob();
+        
+        // Lấy đối tượng JSZip từ global window
+        const JSZip = window.JSZip;
+        if (!JSZip) {
+            console.error("❌ Thư viện JSZip chưa được tải vào global.");
+            blob = null; // Giải phóng bộ nhớ
+            return false;
         }
+
+        let jszip = new JSZip();
+        let zip = await jszip.loadAsync(blob);
+        
+        // Ép dọn dẹp biến blob khổng lồ do JSZip đã parse xong
+        blob = null; 
+        
+        let injectedCount = 0;
+
+        // ==========================================
+        // BƯỚC 4: BƠM FILE VÀO CACHE STORAGE
+        // ==========================================
+        for (const filename of missingFiles) {
+            const zipEntry = zip.file(filename);
+            if (zipEntry) {
+                const audioBlob = await zipEntry.async("blob");
+                
+                // Tạo một Response giả lập để đưa vào Cache Storage.
+                // URL này phải khớp ĐÚNG với định dạng URL mà ứng dụng gọi khi phát MP3.
+                const fileUrl = this.audioUrl(filename);
+                
+                const res = new Response(audioBlob, {
+                    status: 200,
+                    statusText: 'OK',
+                    headers: {
+                        'Content-Type': 'audio/mpeg',
+                        'Content-Length': audioBlob.size.toString(),
+                        'Accept-Ranges': 'bytes', // [FIX] Hỗ trợ Safari iOS
+                        'Cache-Control': 'max-age=31536000' // Cho phép cache vĩnh viễn (1 năm)
+                    }
+                });
+
+                await cache.put(fileUrl, res);
+                injectedCount++;
+                
+                // [FIX iOS CRASH] Ép JS nhường Main Thread mỗi chu kỳ 
+                // để hệ điều hành kích hoạt Garbage Collection, tránh tràn RAM
+                if (injectedCount % 10 === 0) {
+                    await new Promise(resolve => setTimeout(resolve, 30));
+                }
+            }
+        }
+        
+        // Xóa sổ toàn bộ JSZip object khỏi RAM sau khi xong việc
+        zip = null;
+        jszip = null;
+
+        console.log(`✅ Đã giải nén và lưu trực tiếp ${injectedCount} file âm thanh vào Cache để dùng Offline.`);
+        return injectedCount === missingFiles.length;
     }
-}
\ No newline at end of file
+}
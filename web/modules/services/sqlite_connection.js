@@ -1,9 +1,10 @@
 // Path: web/modules/services/sqlite_connection.js
 import { initSQLite, withExistDB, useIdbStorage } from './sqlite_helper.js';
-import { BASE_URL } from 'core/config.js';
+import { assetUrl } from 'services/asset_manifest.js';
 
 export class SqliteConnection {
-    constructor(dbName = "content.db", dbUrl = `${BASE_URL}app-content/content.db`) {
+    // dbUrl bỏ trống: tải theo tên có hash của dbName trong asset manifest
+    constructor(dbName = "content.db", dbUrl = null) {
         this.dbName = dbName;
         this.dbUrl = dbUrl;
         this.db = null;
@@ -14,9 +15,8 @@ export class SqliteConnection {
 
         try {
             console.log("⬇️ Loading DB into RAM (MemoryVFS)...");
-            // App dựa vào Service Worker để cache file này, nên cứ fetch bình thường.
-            // Nếu có bản cập nhật, SW sẽ trả về file mới.
-            const response = await fetch(this.dbUrl);
+            // Tên file có hash nội dung: Service Worker cache vĩnh viễn, bản cập nhật có tên (URL) mới trong asset manifest
+            const response = await fetch(this.dbUrl || await assetUrl(this.dbName));
             if (!response.ok) throw new Error(`Failed to load DB: ${response.status}`);
             
             const buffer = await response.arrayBuffer();
@@ -20,7 +20,17 @@ export class SearchRenderer {
             localStorage.setItem('sutta_last_segment_id', activeSegmentId.toString());
         }
 
-        const allResults = await this.contentLoader.searchSegments(keyword);
+        let allResults = await this.contentLoader.searchSegments(keyword);
+        let correctedFrom = null;
+        if (allResults.length === 0) {
+            // Không có kết quả: thử sửa chính tả (gõ sai, thiếu dấu) bằng chỉ mục dựng sẵn (content_spell.db, tải lần đầu cần dùng)
+            const corrected = await this.contentLoader.suggestCorrection(keyword);
+            if (corrected) {
+                allResults = await this.contentLoader.searchSegments(corrected);
+                correctedFrom = keyword;
+                keyword = corrected;
+            }
+        }
         const tokens = keyword.trim().split(/\s+/).filter(t => t.length > 0);
         const isSingleWord = tokens.length === 1;
         const isLimited = isSingleWord && allResults.length > 50;
@@ -29,6 +39,10 @@ export class SearchRenderer {
         const results = isLimited ? allResults.slice(0, 50) : allResults;
         
         this._renderResults(results, keyword, isLimited);
+        if (correctedFrom && results.length > 0 && this.resultsContainer) {
+            const notice = `<div class="search-correction">Không có kết quả cho "${this._escapeHtml(correctedFrom)}", đang hiển thị kết quả cho "<strong>${this._escapeHtml(keyword)}</strong>".</div>`;
+            this.resultsContainer.insertAdjacentHTML('afterbegin', notice);
+        }
     }
 
     _renderResults(results, keyword, isLimited = false) {
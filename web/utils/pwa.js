@@ -3,6 +3,7 @@
 // @ts-ignore
 import { registerSW } from 'virtual:pwa-register';
 import { BASE_URL } from 'core/config.js';
+import { assetEntry, assetUrl } from 'services/asset_manifest.js';
 import { CustomDialog } from 'ui/custom_dialog.js';
 
 export function setupPWA() {
@@ -112,13 +113,20 @@ export function setupPWA() {
     });
 
     // --- HÀM KIỂM TRA DỮ LIỆU NGẦM ---
+    // Version DB vẫn là trường version của content_version.json (giá trị các bản cài đặt cũ đã lưu trong db_version_content.db).
+    // Chỉ asset-manifest.json được hỏi lại server; file version theo tên hash là immutable. Chưa có manifest thì hỏi file tên cố định.
+    const fetchDataVersion = async () => {
+        const entry = await assetEntry('content_version.json', true);
+        const url = entry ? await assetUrl('content_version.json') : `${BASE_URL}app-content/content_version.json?t=${Date.now()}`;
+        const res = await fetch(url, entry ? {} : { cache: 'no-store' });
+        return res.ok ? (await res.json()).version : null;
+    };
+
     const checkDataUpdateSilently = async () => {
         try {
-            const versionUrl = `${BASE_URL}app-content/content_version.json?t=${Date.now()}`;
-            const res = await fetch(versionUrl, { cache: 'no-store' });
-            if (res.ok) {
-                const remoteData = await res.json();
-                latestDataVersion = remoteData.version; 
+            const remoteVersion = await fetchDataVersion();
+            if (remoteVersion) {
+                latestDataVersion = remoteVersion;
                 
                 const localVersion = localStorage.getItem('db_version_content.db');
                 if (!localVersion) {